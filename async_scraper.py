@@ -0,0 +1,668 @@
+# async_scraper.py
+# asyncio scraping core behind scraper_logic.scrape_indeed_jobs.
+#
+# Search pages are walked in order, as before. Once a search page is parsed, the job
+# pages of its cards are fetched concurrently: at most `concurrency` at a time (a
+# semaphore) and no faster than the RateLimiter allows. Reaching max_jobs limits how
+# many cards are fetched, and a stop request cancels the fetches still in flight.
+#
+# Pages come from a fetcher with `async fetch(url, is_job_page)` / `async close()`:
+#   DriverPoolFetcher - a pool of Chrome drivers (ReplayDrivers in fixture replay
+#                       mode); the blocking selenium calls run on worker threads
+#   HttpFetcher       - plain HTTP (aiohttp when installed, urllib otherwise), for a
+#                       local fixture site such as the one `benchmarks.py async-scrape` serves
+#
+# Fetchers only return page_source; parsing and extraction go through parse_pool,
+# which runs them in-process by default, or in worker processes with
+# JOBMATCHER_PARSE_WORKERS=N so the browser that loaded a page is free for the
+# next one while the previous page is still being parsed.
+#
+# ScraperSession keeps the loop and the browser pool alive between scrapes (used by
+# the long-lived search_service.SearchService).
+import asyncio
+import os
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+
+import scraper_logic
+from job_record import JobRecord
+from parse_pool import parse_pool
+from query_planner import build_search_plan
+from scraper_logic import (DriverUnavailable, FAILED_DESCRIPTIONS, RESTART_STATUSES,
+                           job_desc_key, search_page_key)
+from tracing import span, tracer
+
+# Job pages fetched at the same time (= browsers in the driver pool). One browser by
+# default, as before: more browsers against the same site look more like a bot.
+SCRAPE_CONCURRENCY = int(os.environ.get("JOBMATCHER_SCRAPE_CONCURRENCY", "1"))
+# Seconds between the starts of two live page loads, across all browsers (random in range)
+RATE_LIMIT_INTERVAL = (1.5, 3.5)
+# Pause after each live search page (the sequential loop slept the same 10-20 s)
+PAGE_PAUSE = (10, 20)
+# How often pending fetches and pauses check stop_checker
+STOP_POLL_INTERVAL = 0.1
+
+BLOCKED_DESCRIPTION = "Full Description Failed to Load (Blocked)"
+
+
+# =====================================================================
+# --- PACING ---
+# =====================================================================
+
+class RateLimiter:
+    """
+    Spaces out live page loads: consecutive acquire() calls return at least a random
+    `low`..`high` seconds apart, however many fetches are waiting. Disabled in fixture
+    replay mode, like polite_sleep.
+    """
+
+    def __init__(self, low=RATE_LIMIT_INTERVAL[0], high=RATE_LIMIT_INTERVAL[1]):
+        self.low = low
+        self.high = high
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if scraper_logic.fixture_mode() == 'replay' or self.high <= 0:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                with span('sleep'):
+                    await asyncio.sleep(delay)
+            self._next_start = loop.time() + random.uniform(self.low, self.high)
+
+
+async def polite_pause(low, high, stop_checker=None):
+    """Async polite_sleep that returns early once stop_checker() is true."""
+    if scraper_logic.fixture_mode() == 'replay' or high <= 0:
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + random.uniform(low, high)
+    with span('sleep'):
+        while loop.time() < deadline:
+            if stop_checker and stop_checker():
+                return
+            await asyncio.sleep(min(STOP_POLL_INTERVAL, deadline - loop.time()))
+
+
+async def gather_until_stopped(coros, stop_checker=None):
+    """
+    Runs the coroutines concurrently and returns their results in order. When
+    stop_checker() turns true, the ones still running are cancelled and come back as
+    None. The first exception raised by a coroutine is re-raised.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    pending = set(tasks)
+    try:
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=STOP_POLL_INTERVAL)
+            if pending and stop_checker and stop_checker():
+                print(f"Stop signal received: cancelling {len(pending)} page fetch(es) in flight.")
+                tracer.count('fetches_cancelled', len(pending))
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for task in tasks:
+        if task.cancelled():
+            results.append(None)
+        elif task.exception() is not None:
+            raise task.exception()
+        else:
+            results.append(task.result())
+    return results
+
+
+# =====================================================================
+# --- FETCHERS ---
+# =====================================================================
+
+class DriverPoolFetcher:
+    """
+    Pool of `size` browsers. fetch() borrows an idle one, runs the blocking page load
+    on a worker thread and restarts that browser after a lost session or a suspected
+    block. The browsers are started on the first fetch, so cached runs never open one.
+    """
+
+    def __init__(self, size=SCRAPE_CONCURRENCY):
+        self.size = max(1, size)
+        self.drivers = []
+        self._idle = None
+        self._executor = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._start_lock = asyncio.Lock()
+
+    def _create_driver(self):
+        new_driver = scraper_logic.create_driver()
+        with self._lock:
+            if new_driver is not None and not self._closed:
+                self.drivers.append(new_driver)
+                return new_driver
+        # Closed while this browser was starting (e.g. the user pressed stop)
+        if new_driver is not None:
+            _quit_driver(new_driver)
+        return None
+
+    def _restart_driver(self, old_driver):
+        with span('restart_driver'):
+            tracer.count('driver_restarts')
+            print("\nAttempting to restart driver session...")
+            with self._lock:
+                if old_driver in self.drivers:
+                    self.drivers.remove(old_driver)
+            _quit_driver(old_driver)
+            scraper_logic.polite_sleep(5, 10)
+            return self._create_driver()
+
+    async def start(self):
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            loop = asyncio.get_running_loop()
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='scraper-driver')
+            started = await asyncio.gather(*(loop.run_in_executor(self._executor, self._create_driver)
+                                             for _ in range(self.size)))
+            idle = asyncio.Queue()
+            for started_driver in started:
+                if started_driver is not None:
+                    idle.put_nowait(started_driver)
+            if idle.empty():
+                idle.put_nowait(None)
+            self._idle = idle
+
+    async def fetch(self, url, is_job_page=False):
+        await self.start()
+        pool_driver = await self._idle.get()
+        if pool_driver is None:
+            # Every browser is gone; leave the marker for the other waiting fetches
+            self._idle.put_nowait(None)
+            raise DriverUnavailable("Could not start the Chrome driver.")
+
+        loop = asyncio.get_running_loop()
+        page_source, status = None, 'load_error'
+        try:
+            for attempt in range(2):
+                load = loop.run_in_executor(self._executor, scraper_logic.load_page_source,
+                                            pool_driver, url, is_job_page)
+                try:
+                    page_source, status = await asyncio.shield(load)
+                except asyncio.CancelledError:
+                    # The browser stays busy until the load returns; hand it back then
+                    busy_driver, pool_driver = pool_driver, None
+                    load.add_done_callback(lambda _: self._release(busy_driver))
+                    raise
+                if status in RESTART_STATUSES:
+                    print("ACTION: Forcing driver restart due to suspected block or load error.")
+                    old_driver, pool_driver = pool_driver, None
+                    pool_driver = await loop.run_in_executor(self._executor, self._restart_driver, old_driver)
+                    if pool_driver is None:
+                        self._release_lost()
+                    # Only a lost session is worth retrying on the fresh browser
+                    elif status == 'session_lost' and attempt == 0:
+                        continue
+                break
+        finally:
+            self._release(pool_driver)
+        return page_source if status == 'ok' else None
+
+    @property
+    def healthy(self):
+        """False once the pool is closed or every browser is gone (fetches would only fail)."""
+        with self._lock:
+            return not self._closed and (self._idle is None or bool(self.drivers))
+
+    def _release(self, pool_driver):
+        if pool_driver is not None and not self._closed:
+            self._idle.put_nowait(pool_driver)
+
+    def _release_lost(self):
+        """Called when a browser could not be restarted; fails the waiting fetches once none are left."""
+        with self._lock:
+            if not self.drivers:
+                self._idle.put_nowait(None)
+
+    async def close(self):
+        with self._lock:
+            self._closed = True
+            drivers, self.drivers = self.drivers, []
+        if drivers:
+            print(f"\nShutting down {len(drivers)} WebDriver(s) after scraping completion...")
+            await asyncio.gather(*(asyncio.to_thread(_quit_driver, d) for d in drivers))
+        if self._executor is not None:
+            # Loads still blocked in selenium fail as soon as their browser is gone
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if drivers:
+            await polite_pause(2, 2)
+
+
+def _quit_driver(pool_driver):
+    try:
+        pool_driver.quit()
+    except Exception as e:
+        print(f"Error during driver quit: {e}")
+
+
+class HttpFetcher:
+    """
+    Fetches pages over plain HTTP, with aiohttp when it is installed and urllib on a
+    worker thread otherwise. `site_url` replaces scraper_logic.base_url in every
+    request, so a local fixture site can stand in for Indeed while the records keep
+    their real job links. A page only counts as loaded when it contains the element
+    load_page_source would wait for.
+    """
+    READY_MARKERS = {
+        True: re.compile(r"""id=["']jobDescriptionText["']"""),
+        False: re.compile(r"""id=["']sj_"""),
+    }
+
+    def __init__(self, site_url=None, timeout=20):
+        self.site_url = site_url.rstrip('/') if site_url else None
+        self.timeout = timeout
+        self._session = None
+
+    def _site_url(self, url):
+        if self.site_url and url.startswith(scraper_logic.base_url):
+            return self.site_url + url[len(scraper_logic.base_url):]
+        return url
+
+    async def _get(self, url):
+        try:
+            import aiohttp
+        except ImportError:
+            return await asyncio.to_thread(self._urllib_get, url)
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        async with self._session.get(url) as response:
+            response.raise_for_status()
+            return await response.text()
+
+    def _urllib_get(self, url):
+        import urllib.request
+
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return response.read().decode(response.headers.get_content_charset() or 'utf-8')
+
+    async def fetch(self, url, is_job_page=False):
+        try:
+            with span('get_dom.navigate', job_page=is_job_page):
+                page_source = await self._get(self._site_url(url))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+        scraper_logic.count_page_load()
+        if not self.READY_MARKERS[is_job_page].search(page_source):
+            tracer.count('wait_timeouts')
+            print(f"FAILURE: Element not found on page {url}.")
+            return None
+        return page_source
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# =====================================================================
+# --- CACHED PAGE LOADING ---
+# =====================================================================
+
+def search_url(job_keyword, location_keyword, page_no, radius=None):
+    # Format keywords for URL (space -> +; quotes / parentheses of planned OR queries,
+    # and & / # in either field, escaped)
+    formatted_job = quote_plus(job_keyword, safe=',/')
+    formatted_location = quote_plus(location_keyword, safe=',')
+    url = scraper_logic.paginaton_url.format(formatted_job, formatted_location, page_no)
+    return f"{url}&radius={radius}" if radius else url
+
+
+async def load_search_cards(fetcher, job_keyword, location_keyword, page_no, max_age=None, cache_only=False,
+                            rate_limiter=None, radius=None):
+    """
+    Returns (cards, from_cache) for one search results page. `cards` is None when the
+    page failed to load. In cache-only mode only cached pages are used (any age) and a
+    missing page counts as the end of the results. `radius` (miles) widens or narrows
+    the search around the location (None = Indeed's default).
+    """
+    key = search_page_key(job_keyword, location_keyword, page_no, radius)
+    cards = scraper_logic.search_page_cache.get(key, max_age=float('inf') if cache_only else max_age)
+    if cards is not None:
+        return cards, True
+    if cache_only:
+        return [], True
+
+    url = search_url(job_keyword, location_keyword, page_no, radius)
+    if rate_limiter:
+        await rate_limiter.acquire()
+    with span('get_dom'):
+        page_source = await fetcher.fetch(url)
+    if page_source is None:
+        print(f"Skipping search URL {url} due to block or load failure. Moving to next search combination.")
+        return None, False
+
+    cards = await parse_pool.parse(scraper_logic.parse_search_page, page_source)
+    if cards:
+        scraper_logic.search_page_cache.set(key, cards)
+    return cards, False
+
+
+async def load_job_description(fetcher, card, max_age=None, cache_only=False, rate_limiter=None):
+    """Returns (description, from_cache) for a job card; failed loads are not cached."""
+    key = job_desc_key(card)
+    description = scraper_logic.job_desc_cache.get(key, max_age=float('inf') if cache_only else max_age)
+    if description is not None:
+        return description, True
+    if cache_only:
+        return BLOCKED_DESCRIPTION, True
+
+    if rate_limiter:
+        await rate_limiter.acquire()
+    print(f"   -> Navigating to job page: {card['job_link']}")
+    with span('get_full_job_desc'):
+        page_source = await fetcher.fetch(card['job_link'], is_job_page=True)
+        if page_source is None:
+            description = BLOCKED_DESCRIPTION
+        else:
+            description = await parse_pool.parse(scraper_logic.parse_job_page, page_source)
+    if description and description not in FAILED_DESCRIPTIONS:
+        scraper_logic.job_desc_cache.set(key, description)
+    return description, False
+
+
+def make_job_record(card, full_description, job_keyword, location_keyword, titles=None):
+    """
+    `titles` are the generated titles behind the `job_keyword` query (a planned query
+    can stand for several): searched_job is the first, searched_titles all of them.
+    """
+    titles = tuple(titles or (job_keyword,))
+    return JobRecord(
+        job_link=card['job_link'],
+        job_title=card['job_title'],
+        company_name=card['company_name'],
+        company_location=card['company_location'],
+        salary=card['salary'],
+        job_type=card['job_type'],
+        rating=card['rating'],
+        job_description=full_description,
+        searched_job=titles[0],
+        searched_location=location_keyword,
+        job_key=card.get('job_key', 'Not available'),
+        search_query=job_keyword,
+        searched_titles=titles
+    )
+
+
+# =====================================================================
+# --- MAIN SCRAPER COROUTINE ---
+# =====================================================================
+
+async def scrape_indeed_jobs_async(job_keywords, location_keyword, max_jobs=10, max_pages=5, stop_checker=None,
+                                   max_age=None, cache_only=None, concurrency=None, fetcher=None, rate_limiter=None,
+                                   job_records=None, plan=None, on_record=None, radius=None, location_stats=None,
+                                   seen_jobs=None, card_filter=None):
+    """
+    Async scrape_indeed_jobs: same arguments and records. The job pages of each search
+    page are fetched concurrently through `fetcher` (default: a DriverPoolFetcher with
+    `concurrency` browsers, closed at the end), at most `concurrency` at a time and
+    paced by `rate_limiter`. Records are appended to `job_records` (a new list by
+    default), so a caller that is interrupted still has the jobs scraped so far.
+
+    `plan` (a search_plan.SearchPlan) decides which keyword / page is loaded next;
+    the default walks the keywords in order. `on_record(record)` is called for every
+    job as soon as its page is in, e.g. to score while scraping continues.
+
+    A list of locations fans out (see scrape_locations_async); max_jobs then applies
+    per location and `plan` may be a {location: SearchPlan} dict. `location_stats`
+    (a dict) receives per-location counters. `seen_jobs` is the set of job keys
+    already taken, shared when several searches must not return the same posting.
+
+    `card_filter` (a card_filter.SnippetFilter) scores each search page's cards from
+    their snippet fields first: only cards that pass its cutoff have their job page
+    fetched, best first.
+    """
+    if not isinstance(location_keyword, str):
+        return await scrape_locations_async(
+            job_keywords, location_keyword, max_jobs=max_jobs, max_pages=max_pages, stop_checker=stop_checker,
+            max_age=max_age, cache_only=cache_only, concurrency=concurrency, fetcher=fetcher, rate_limiter=rate_limiter,
+            job_records=job_records, plans=plan, on_record=on_record, radius=radius, location_stats=location_stats,
+            card_filter=card_filter)
+
+    if cache_only is None:
+        cache_only = scraper_logic.CACHE_ONLY
+    concurrency = max(1, concurrency or SCRAPE_CONCURRENCY)
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = DriverPoolFetcher(concurrency)
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+    if job_records is None:
+        job_records = []
+    if plan is None:
+        plan = build_search_plan(job_keywords, location_keyword, max_pages)
+    # Postings already taken this run: overlapping searches return the same jobs
+    if seen_jobs is None:
+        seen_jobs = set()
+    stats = {'search_pages': 0, 'cached_pages': 0, 'jobs': 0, 'duplicates': 0, 'cards_skipped': 0}
+    if location_stats is not None:
+        location_stats[location_keyword] = stats
+
+    def should_stop():
+        return (stop_checker and stop_checker()) or len(job_records) >= max_jobs
+
+    async def fetch_description(card):
+        async with semaphore:
+            try:
+                return await load_job_description(fetcher, card, max_age, cache_only, rate_limiter)
+            except DriverUnavailable:
+                raise
+            except Exception as e:
+                print(f"   -> CRITICAL ERROR fetching description for {card['job_link']}: {e}. Skipping this job.")
+                return "CRITICAL FETCH ERROR", False
+
+    print(f"Starting Scrape for Titles: {job_keywords} in Location: {location_keyword} "
+          f"({concurrency} job pages at a time)")
+
+    try:
+        while True:
+            if should_stop():
+                print("Stop signal received before loading new page.")
+                break
+            query = plan.next_query()
+            if query is None:
+                break
+            job_keyword, page_no = query
+
+            print(f"\n--- Loading Search Page {page_no//10 + 1} for {job_keyword} in {location_keyword} ---")
+
+            [search_result] = await gather_until_stopped(
+                [load_search_cards(fetcher, job_keyword, location_keyword, page_no, max_age, cache_only,
+                                   rate_limiter, radius)], stop_checker)
+            if search_result is None:
+                continue    # stopped while loading; reported above
+            cards, page_cached = search_result
+            stats['search_pages'] += 1
+            stats['cached_pages'] += page_cached
+
+            if cards is None:
+                plan.finish_keyword(job_keyword)
+                continue
+
+            if not cards:
+                print("Warning: No job cards found. Assuming end of results.")
+                plan.finish_keyword(job_keyword)
+                if not page_cached:
+                    await polite_pause(*PAGE_PAUSE, stop_checker)
+                continue
+
+            new_cards = [card for card in cards if job_desc_key(card) not in seen_jobs]
+            if len(new_cards) < len(cards):
+                print(f"Skipping {len(cards) - len(new_cards)} postings already scraped in this run.")
+                stats['duplicates'] += len(cards) - len(new_cards)
+            if card_filter is not None and new_cards:
+                new_cards, skipped = card_filter.select(new_cards, job_keyword)
+                if skipped:
+                    print(f"Skipping {len(skipped)} cards below snippet score {card_filter.cutoff}.")
+                    stats['cards_skipped'] += len(skipped)
+                    tracer.count('description_fetches_saved', len(skipped))
+
+            # Only fetch as many job pages as max_jobs still allows
+            batch = new_cards[:max_jobs - len(job_records)]
+            seen_jobs.update(job_desc_key(card) for card in batch)
+            results = await gather_until_stopped([fetch_description(card) for card in batch], stop_checker)
+
+            jobs_scraped_on_page = 0
+            for card, result in zip(batch, results):
+                if result is None:
+                    continue    # cancelled by a stop request
+                full_description, _ = result
+                record = make_job_record(card, full_description, job_keyword, location_keyword,
+                                         plan.titles_for(job_keyword))
+                job_records.append(record)
+                jobs_scraped_on_page += 1
+                stats['jobs'] += 1
+                if on_record:
+                    on_record(record)
+
+            if len(job_records) >= max_jobs:
+                print(f"Goal reached! Scraped {len(job_records)} jobs. Stopping search immediately.")
+                break
+
+            print(f"Processed {jobs_scraped_on_page} jobs from page {page_no//10 + 1}. Total scraped: {len(job_records)}")
+
+            if not page_cached:
+                await polite_pause(*PAGE_PAUSE, stop_checker)
+
+        print(f"Finished search for {job_keywords} in {location_keyword}. Total Jobs: {len(job_records)}")
+
+    except DriverUnavailable as e:
+        print(f"FATAL SETUP ERROR: {e} Returning {len(job_records)} jobs scraped so far.")
+
+    finally:
+        print(f"Cache stats: {scraper_logic.cache_stats()}")
+        if own_fetcher:
+            await fetcher.close()
+
+    return job_records
+
+
+async def scrape_locations_async(job_keywords, locations, max_jobs=10, max_pages=5, stop_checker=None,
+                                 max_age=None, cache_only=None, concurrency=None, fetcher=None, rate_limiter=None,
+                                 job_records=None, plans=None, on_record=None, radius=None, location_stats=None,
+                                 card_filter=None):
+    """
+    Fan-out search: every location runs its own search loop (up to max_jobs jobs
+    each), side by side on one browser pool and one rate limiter, so the
+    (title x location x page) work shares the browsers instead of running location
+    after location. A posting found in several locations (remote jobs) is only
+    scraped once, for the location that reached it first. Records of all locations
+    go to `job_records`; `plans` is an optional {location: SearchPlan} dict.
+    """
+    concurrency = max(1, concurrency or SCRAPE_CONCURRENCY)
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = DriverPoolFetcher(concurrency)
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    if job_records is None:
+        job_records = []
+    if location_stats is None:
+        location_stats = {}
+    seen_jobs = set()
+
+    def collect(record):
+        job_records.append(record)
+        if on_record:
+            on_record(record)
+
+    print(f"Fan-out search over {len(locations)} locations: {', '.join(locations)}"
+          + (f" (radius {radius} mi)" if radius else ""))
+    try:
+        await asyncio.gather(*(
+            scrape_indeed_jobs_async(job_keywords, location, max_jobs=max_jobs, max_pages=max_pages,
+                                     stop_checker=stop_checker, max_age=max_age, cache_only=cache_only,
+                                     concurrency=concurrency, fetcher=fetcher, rate_limiter=rate_limiter,
+                                     plan=(plans or {}).get(location), on_record=collect, radius=radius,
+                                     location_stats=location_stats, seen_jobs=seen_jobs, card_filter=card_filter)
+            for location in locations))
+    finally:
+        if own_fetcher:
+            await fetcher.close()
+    return job_records
+
+
+# =====================================================================
+# --- LONG-LIVED SESSION ---
+# =====================================================================
+
+class ScraperSession:
+    """
+    Keeps one event loop (on its own thread), one browser pool and one rate limiter
+    alive across scrapes, so searches run back to back skip the browser start-up and
+    keep the page pacing. scrape() blocks the calling thread and takes the arguments
+    of scraper_logic.scrape_indeed_jobs. A pool that lost all its browsers is
+    replaced on the next scrape. close() quits the browsers.
+    """
+
+    def __init__(self, concurrency=None):
+        self.concurrency = max(1, concurrency or SCRAPE_CONCURRENCY)
+        self.fetcher = None
+        self.rate_limiter = None
+        self.scrapes = 0
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="scraper-session", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _scrape(self, job_keywords, location_keyword, job_records, kwargs):
+        if self.fetcher is not None and not self.fetcher.healthy:
+            print("Browser pool lost all its drivers; starting a new one.")
+            await self.fetcher.close()
+            self.fetcher = None
+        if self.fetcher is None:
+            self.fetcher = DriverPoolFetcher(self.concurrency)
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimiter()
+        await scrape_indeed_jobs_async(job_keywords, location_keyword, concurrency=self.concurrency,
+                                       fetcher=self.fetcher, rate_limiter=self.rate_limiter,
+                                       job_records=job_records, **kwargs)
+
+    def scrape(self, job_keywords, location_keyword, **kwargs):
+        """Same as scraper_logic.scrape_indeed_jobs, on the session's browsers. Returns the records."""
+        job_records = []
+        future = asyncio.run_coroutine_threadsafe(
+            self._scrape(job_keywords, location_keyword, job_records, kwargs), self._ensure_loop())
+        future.result()
+        self.scrapes += 1
+        return job_records
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+        if self.fetcher is not None:
+            asyncio.run_coroutine_threadsafe(self.fetcher.close(), loop).result()
+            self.fetcher = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
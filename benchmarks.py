@@ -0,0 +1,1519 @@
+# benchmarks.py
+"""
+Benchmark harness for JobMatcher.
+
+Usage:  python benchmarks.py <suite> [options]
+
+Every suite prints a small report. Suites that have a budget exit with a
+non-zero status when it is exceeded, so they can be used as a gate.
+"""
+import argparse
+import csv
+import glob
+import os
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Resume used when no --resume file is given
+SAMPLE_RESUME = (
+    "Full-stack software engineer with 6 years of experience building web applications. "
+    "Skills: Angular, TypeScript, JavaScript, Python, Django, Node.js, SQL, PostgreSQL, AWS, "
+    "Docker, Git, REST APIs, CI/CD. Led a team of 4 developers migrating a monolith to "
+    "microservices on AWS. Built a real-time mapping dashboard in Angular and Python."
+)
+
+
+# =====================================================================
+# --- FIXTURES ---
+# =====================================================================
+
+def load_fixture_jobs(path=None):
+    """Reads job records from a scraped CSV (default: every indeed_jobs_*.csv in the repo)."""
+    paths = [path] if path else sorted(glob.glob(os.path.join(REPO_DIR, 'indeed_jobs_*.csv')))
+    jobs = []
+    for csv_path in paths:
+        with open(csv_path, newline='', encoding='utf-8') as csvfile:
+            jobs.extend(csv.DictReader(csvfile))
+    return jobs
+
+
+def load_resume_text(path=None):
+    """Returns resume text from a .pdf / .txt file, or SAMPLE_RESUME."""
+    if not path:
+        return SAMPLE_RESUME
+    if path.lower().endswith('.pdf'):
+        from model_loader import extract_text_from_pdf
+        return extract_text_from_pdf(path)
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+# =====================================================================
+# --- IMPORT TIME (python -X importtime) ---
+# =====================================================================
+
+# Heavy stacks that only the code paths which really need them may load.
+HEAVY_MODULES = ['PySide6', 'torch', 'transformers', 'selenium', 'undetected_chromedriver',
+                 'bs4', 'lxml', 'pdfplumber']
+GUI_MODULES = ['PySide6']
+
+# entry point -> (cumulative import budget in ms, top-level packages that must not be imported)
+IMPORT_BUDGETS = {
+    'llm_constants':   (50, HEAVY_MODULES),
+    'llm_match_logic': (50, HEAVY_MODULES),
+    'model_loader':    (50, HEAVY_MODULES),
+    'scraper_logic':   (50, HEAVY_MODULES),
+    'utils_constants': (50, HEAVY_MODULES),
+    'inference_backends': (50, HEAVY_MODULES),
+    'text_preprocessing': (50, HEAVY_MODULES),
+    'cache_store':     (50, HEAVY_MODULES),
+    'tracing':         (50, HEAVY_MODULES),
+    'page_archive':    (50, HEAVY_MODULES),
+    'async_scraper':   (100, HEAVY_MODULES),   # asyncio itself is ~50 ms
+    'job_record':      (50, HEAVY_MODULES),
+    'weight_cache':    (50, HEAVY_MODULES),
+    'model_manager':   (50, HEAVY_MODULES),
+    'search_plan':     (50, HEAVY_MODULES),
+    'query_planner':   (50, HEAVY_MODULES),
+    'card_filter':     (50, HEAVY_MODULES),
+    'browser_profile': (50, HEAVY_MODULES),
+    'sharded_scoring': (50, HEAVY_MODULES),
+    'skill_index': (50, HEAVY_MODULES + ['numpy', 'scipy']),
+    'parse_pool':      (50, HEAVY_MODULES),
+    'inference_log':   (50, HEAVY_MODULES),
+    'scraper_worker':  (800, [m for m in HEAVY_MODULES if m not in GUI_MODULES]),
+    'gui_widgets':     (1500, [m for m in HEAVY_MODULES if m not in GUI_MODULES]),
+    'main_app':        (1500, [m for m in HEAVY_MODULES if m not in GUI_MODULES]),
+}
+
+
+def compile_entry_points():
+    """
+    Writes the repo's .pyc files, so import times measure loading bytecode as an
+    installed app does, not compiling edited sources (e.g. under PYTHONDONTWRITEBYTECODE).
+    """
+    import compileall
+    compileall.compile_dir(REPO_DIR, maxlevels=0, quiet=1)
+
+
+def measure_import(module_name):
+    """
+    Imports `module_name` in a fresh interpreter with -X importtime.
+    Returns (cumulative_ms, set_of_imported_top_level_packages), or raises RuntimeError.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'unknown error'
+        raise RuntimeError(last_line)
+
+    cumulative_us = None
+    imported = set()
+    for line in proc.stderr.splitlines():
+        # Format: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [p.strip() for p in line[len('import time:'):].split('|')]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2].strip()
+        imported.add(name.split('.')[0])
+        if name == module_name:
+            cumulative_us = int(parts[1])
+
+    if cumulative_us is None:
+        raise RuntimeError(f"no importtime entry for {module_name}")
+    return cumulative_us / 1000.0, imported
+
+
+def run_import_benchmark(args):
+    """Checks every entry point against its import-time budget and forbidden imports."""
+    modules = args.modules or list(IMPORT_BUDGETS)
+    failures = 0
+    compile_entry_points()
+
+    print(f"{'entry point':<18} {'median ms':>10} {'budget':>8}  status")
+    for module_name in modules:
+        budget_ms, forbidden = IMPORT_BUDGETS.get(module_name, (None, HEAVY_MODULES))
+        try:
+            samples = []
+            imported = set()
+            for _ in range(args.repeat):
+                ms, imported = measure_import(module_name)
+                samples.append(ms)
+        except RuntimeError as e:
+            print(f"{module_name:<18} {'-':>10} {budget_ms or '-':>8}  ERROR ({e})")
+            failures += 1
+            continue
+
+        median_ms = statistics.median(samples)
+        leaked = sorted(set(forbidden) & imported)
+        status = 'ok'
+        if leaked:
+            status = f"FAIL (imports {', '.join(leaked)})"
+        elif budget_ms is not None and median_ms > budget_ms:
+            status = 'FAIL (over budget)'
+        if status != 'ok':
+            failures += 1
+        print(f"{module_name:<18} {median_ms:>10.1f} {budget_ms or '-':>8}  {status}")
+
+    return 1 if failures else 0
+
+
+# =====================================================================
+# --- INFERENCE BACKENDS ---
+# =====================================================================
+
+def benchmark_backend(backend, resume_text, job_descriptions):
+    """
+    Runs one title generation plus one match prompt per job description.
+    Returns a dict with tokens/sec and per-job latency figures.
+    """
+    from model_loader import build_title_prompt
+    from llm_match_logic import build_match_prompt
+
+    start = time.perf_counter()
+    titles_text = backend.generate(build_title_prompt(resume_text), max_new_tokens=100)
+    title_seconds = time.perf_counter() - start
+
+    latencies = []
+    prompt_tokens = 0
+    generated_tokens = backend.count_tokens(titles_text)
+    generation_seconds = title_seconds
+    for job_desc in job_descriptions:
+        prompt = build_match_prompt(resume_text, job_desc)
+        start = time.perf_counter()
+        reply = backend.generate(prompt, max_new_tokens=256)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        generation_seconds += elapsed
+        prompt_tokens += backend.count_tokens(prompt)
+        generated_tokens += backend.count_tokens(reply)
+
+    return {
+        'title_latency_s': title_seconds,
+        'jobs': len(latencies),
+        'job_latency_mean_s': statistics.mean(latencies) if latencies else 0.0,
+        'job_latency_p95_s': percentile(latencies, 95) if latencies else 0.0,
+        'prompt_tokens_per_job': prompt_tokens / max(1, len(latencies)),
+        'tokens_per_sec': generated_tokens / generation_seconds if generation_seconds else 0.0,
+    }
+
+
+def run_backend_benchmark(args):
+    """Reports tokens/sec and per-job latency for each requested backend."""
+    from inference_backends import load_backend
+
+    resume_text = load_resume_text(args.resume)
+    job_descriptions = [job['job_description'] for job in load_fixture_jobs(args.jobs)][:args.limit]
+
+    print(f"{'backend':<8} {'load s':>8} {'tok/s':>9} {'job mean s':>11} {'job p95 s':>10} {'prompt tok/job':>15}")
+    for name in args.backends:
+        start = time.perf_counter()
+        try:
+            backend = load_backend(name)
+        except Exception as e:
+            print(f"{name:<8} could not load backend: {e}")
+            continue
+        load_seconds = time.perf_counter() - start
+        r = benchmark_backend(backend, resume_text, job_descriptions)
+        print(f"{name:<8} {load_seconds:>8.2f} {r['tokens_per_sec']:>9.1f} {r['job_latency_mean_s']:>11.3f} "
+              f"{r['job_latency_p95_s']:>10.3f} {r['prompt_tokens_per_job']:>15.0f}")
+    return 0
+
+
+def run_speculative_benchmark(args):
+    """
+    Speculative decoding on the CPU backend with small stand-in models: greedy title
+    and match generations without a draft model, then with it at each lookahead.
+    Reports decode tokens/sec, speedup, draft acceptance rate and whether the
+    greedy outputs stayed identical (they should: verification is exact).
+    """
+    from inference_backends import load_backend
+    from model_loader import build_title_prompt
+    from llm_match_logic import build_match_prompt
+
+    resume_text = load_resume_text(args.resume)
+    job_descriptions = [job['job_description'] for job in load_fixture_jobs(args.jobs)][:args.limit]
+    backend = load_backend('cpu', args.main, draft_model_id=None)
+    prompts = [(build_title_prompt(resume_text, backend.count_tokens), 100)]
+    prompts += [(build_match_prompt(resume_text, job_desc, backend.count_tokens), args.max_new_tokens)
+                for job_desc in job_descriptions]
+
+    def generate_all():
+        outputs = []
+        tokens = 0
+        start = time.perf_counter()
+        for prompt, max_new_tokens in prompts:
+            reply = backend.generate(prompt, max_new_tokens=max_new_tokens, do_sample=False)
+            outputs.append(reply)
+            tokens += backend.count_tokens(reply)
+        return outputs, tokens / (time.perf_counter() - start)
+
+    baseline_outputs, baseline_rate = generate_all()
+    print(f"\nmain {args.main}, draft {args.draft}, {len(prompts)} prompts")
+    print(f"{'lookahead':>9} {'tok/s':>8} {'speedup':>8} {'accept':>7} {'tok/step':>9} {'same output':>12}")
+    print(f"{'-':>9} {baseline_rate:>8.1f} {1.0:>7.2f}x {'-':>7} {1.0:>9.2f} {'-':>12}")
+
+    mismatches = 0
+    for lookahead in args.lookahead:
+        backend.enable_speculative(args.draft, lookahead)
+        outputs, rate = generate_all()
+        stats = backend.speculative_stats
+        same = sum(a == b for a, b in zip(outputs, baseline_outputs))
+        mismatches += len(outputs) - same
+        acceptance = backend.acceptance_rate
+        print(f"{lookahead:>9} {rate:>8.1f} {rate / baseline_rate:>7.2f}x "
+              f"{acceptance if acceptance is not None else 0.0:>7.1%} "
+              f"{stats['new_tokens'] / max(1, stats['main_steps']):>9.2f} {f'{same}/{len(outputs)}':>12}")
+    backend.disable_speculative()
+
+    if mismatches:
+        # Tiny numeric differences in batched verification can flip near-ties
+        print(f"note: {mismatches} greedy output(s) differed from the baseline")
+    return 0
+
+
+# =====================================================================
+# --- MODEL LIFECYCLE (idle unload / weight cache) ---
+# =====================================================================
+
+# Runs in a fresh interpreter: load, one request, idle unload, on-demand reload
+LIFECYCLE_CHILD = """
+import json, sys, time
+from model_manager import ManagedBackend, resident_memory_mb
+from model_loader import build_title_prompt
+backend_name, model_id, idle = sys.argv[1], sys.argv[2], float(sys.argv[3])
+rss_start = resident_memory_mb()
+manager = ManagedBackend(backend_name, model_id, draft_model_id=None, idle_seconds=idle)
+manager.generate(build_title_prompt("Python developer"), max_new_tokens=8, do_sample=False)
+deadline = time.monotonic() + idle * 10 + 5
+while manager.loaded and time.monotonic() < deadline:
+    time.sleep(idle / 10)
+manager.generate(build_title_prompt("Python developer"), max_new_tokens=8, do_sample=False)
+manager.close()
+print("LIFECYCLE " + json.dumps({'rss_start': rss_start, 'events': manager.events}))
+"""
+
+
+def run_lifecycle_child(backend_name, model_id, idle, env):
+    result = subprocess.run([sys.executable, '-c', LIFECYCLE_CHILD, backend_name, model_id, str(idle)],
+                            cwd=REPO_DIR, env=env, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("LIFECYCLE "):
+            return json.loads(line[len("LIFECYCLE "):])
+    print(result.stdout[-2000:], result.stderr[-2000:])
+    return None
+
+
+def run_model_lifecycle_benchmark(args):
+    """
+    Cold vs. warm process start (empty vs. populated weight cache), resident memory
+    while loaded / after the idle unload, and the on-demand reload time.
+    """
+    def mb(value):
+        return f"{value:.0f}" if value is not None else "n/a"
+
+    print(f"{'start':<6} {'load s':>7} {'weights from':<28} {'RSS base':>9} {'RSS loaded':>11} "
+          f"{'RSS unloaded':>13} {'reload s':>9}")
+    failed = False
+    with tempfile.TemporaryDirectory() as weight_dir:
+        env = dict(os.environ, JOBMATCHER_WEIGHT_CACHE_DIR=args.weight_cache or weight_dir)
+        for label in ('cold', 'warm'):
+            run = run_lifecycle_child(args.backend, args.model, args.idle, env)
+            if run is None:
+                print(f"{label:<6} failed")
+                failed = True
+                continue
+            loads = [event for event in run['events'] if event['event'] == 'load']
+            unloads = [event for event in run['events'] if event['event'] == 'unload']
+            if len(loads) < 2 or not unloads:
+                print(f"{label:<6} model was not unloaded after {args.idle}s idle")
+                failed = True
+                continue
+            print(f"{label:<6} {loads[0]['seconds']:>7.2f} {str(loads[0]['source']):<28} {mb(run['rss_start']):>9} "
+                  f"{mb(loads[0]['rss_mb']):>11} {mb(unloads[0]['rss_mb']):>13} {loads[1]['seconds']:>9.2f}")
+    return 1 if failed else 0
+
+
+# =====================================================================
+# --- SHARDED SCORING (K replica processes) ---
+# =====================================================================
+
+def run_sharded_scoring_benchmark(args):
+    """
+    Scores the same match prompts (greedy, so replies are comparable) with 1..N
+    replica processes. Reports load time, prompts/sec and speedup per replica count,
+    and checks every count returns the K=1 replies in order. With --kill one replica
+    of the largest run is killed mid-batch; the other replicas must finish its work.
+    """
+    from llm_match_logic import build_match_prompt
+    from sharded_scoring import ShardedScorer
+
+    resume_text = load_resume_text(args.resume)
+    job_descriptions = [job['job_description'] for job in load_fixture_jobs(args.jobs)]
+    job_descriptions = (job_descriptions * (args.prompts // max(1, len(job_descriptions)) + 1))[:args.prompts]
+
+    rows = []
+    reference = None
+    failed = False
+    for replicas in args.replicas:
+        scorer = ShardedScorer(args.backend, args.model, replicas=replicas, chunk_size=args.chunk)
+        start = time.perf_counter()
+        try:
+            scorer.start()
+        except RuntimeError as e:
+            print(f"K={replicas}: {e}")
+            return 1
+        load_seconds = time.perf_counter() - start
+        prompts = [build_match_prompt(resume_text, job_desc, scorer.count_tokens) for job_desc in job_descriptions]
+        killer = None
+        if args.kill and replicas == max(args.replicas) and replicas > 1:
+            victim = scorer.processes[0]
+            killer = threading.Timer(args.kill, victim.kill)
+            killer.start()
+        try:
+            start = time.perf_counter()
+            replies = scorer.generate_batch(prompts, max_new_tokens=args.max_new_tokens, do_sample=False)
+            elapsed = time.perf_counter() - start
+        finally:
+            if killer is not None:
+                killer.cancel()
+            scorer.close()
+        missing = sum(reply is None for reply in replies)
+        if reference is None:
+            reference = replies
+        elif replies != reference:
+            failed = True
+        rows.append((replicas, load_seconds, elapsed, missing, scorer.replica_stats))
+
+    print(f"\n{'K':>3} {'load s':>7} {'score s':>8} {'prompts/s':>10} {'speedup':>8} {'missing':>8}  prompts per replica")
+    base_seconds = rows[0][2]
+    for replicas, load_seconds, elapsed, missing, stats in rows:
+        per_replica = " ".join(f"{s['prompts']}{'' if s['state'] in ('ready', 'stopped') else '(' + s['state'] + ')'}"
+                               for s in stats.values())
+        print(f"{replicas:>3} {load_seconds:>7.1f} {elapsed:>8.2f} {len(job_descriptions) / elapsed:>10.2f} "
+              f"{base_seconds / elapsed:>7.2f}x {missing:>8}  {per_replica}")
+    if failed:
+        print("FAIL: replies differ from the single-replica run")
+        return 1
+    return 0
+
+
+# =====================================================================
+# --- PROMPT TOKENS (truncation / boilerplate stripping) ---
+# =====================================================================
+
+def build_legacy_match_prompt(resume_text, job_desc):
+    """The matching prompt as it was built before token budgeting ([:4000] character slices)."""
+    from llm_constants import SYSTEM_PROMPT_MATCHING
+    user_input = f"""
+    --- RESUME ---
+    {resume_text[:4000]} 
+
+    --- JOB DESCRIPTION ---
+    {job_desc[:4000]}
+    """
+    return (
+        f"<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n{SYSTEM_PROMPT_MATCHING}<|eot_id|>"
+        f"<|start_header_id|>user<|end_header_id|>\n{user_input}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n"
+    )
+
+
+def run_prompt_token_benchmark(args):
+    """Compares matching-prompt token counts before/after preprocessing on the fixture corpus."""
+    from llm_match_logic import build_match_prompt
+    from text_preprocessing import approx_token_count
+
+    count_tokens = approx_token_count
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer, token=os.environ.get("HF_TOKEN"))
+        count_tokens = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+    resume_text = load_resume_text(args.resume)
+    jobs = load_fixture_jobs(args.jobs)
+
+    before_total = after_total = 0
+    print(f"{'job':<45} {'before':>7} {'after':>7}")
+    for job in jobs:
+        before = count_tokens(build_legacy_match_prompt(resume_text, job['job_description']))
+        after = count_tokens(build_match_prompt(resume_text, job['job_description'], count_tokens))
+        before_total += before
+        after_total += after
+        print(f"{job['job_title'][:45]:<45} {before:>7} {after:>7}")
+
+    if jobs:
+        saved = 100.0 * (before_total - after_total) / before_total
+        print(f"\nmean prompt tokens/job: {before_total / len(jobs):.0f} -> {after_total / len(jobs):.0f} "
+              f"({saved:.1f}% fewer)")
+    return 0
+
+
+# =====================================================================
+# --- TRACING OVERHEAD ---
+# =====================================================================
+
+def run_tracing_benchmark(args):
+    """Per-call cost of span() / @traced with tracing disabled and enabled."""
+    import timeit
+    from tracing import tracer, span, traced
+
+    def plain():
+        return None
+
+    decorated = traced('bench')(plain)
+
+    def with_span():
+        with span('bench'):
+            return None
+
+    results = {}
+    was_enabled = tracer.enabled
+    try:
+        for enabled in (False, True):
+            tracer.enabled = enabled
+            tracer.reset()
+            for label, func in (('plain call', plain), ('@traced', decorated), ('with span()', with_span)):
+                if label == 'plain call' and enabled:
+                    continue
+                seconds = min(timeit.repeat(func, number=args.calls, repeat=5))
+                results[(label, enabled)] = seconds / args.calls * 1e9
+    finally:
+        tracer.enabled = was_enabled
+        tracer.reset()
+
+    print(f"{'call':<14} {'tracing':>8} {'ns/call':>9}")
+    for (label, enabled), ns in results.items():
+        print(f"{label:<14} {'on' if enabled else 'off':>8} {ns:>9.0f}")
+    return 0
+
+
+# =====================================================================
+# --- JOB RECORD MEMORY ---
+# =====================================================================
+
+def build_job_rows(count, jobs):
+    """
+    `count` scraped-looking rows cycled from the fixture jobs. Every string is a
+    fresh object, as it would be when parsed from separate pages.
+    """
+    fresh = lambda text: (text + ' ')[:-1]
+    # One tuple per planned query, shared by every record it returns
+    searched_titles = ('Software Engineer', 'Software Developer')
+    rows = []
+    for i in range(count):
+        job = jobs[i % len(jobs)]
+        rows.append({
+            'job_link': f"https://www.indeed.com/rc/clk?jk={i:016x}",
+            'job_title': fresh(job.get('job_title', 'Software Engineer')),
+            'company_name': fresh(job.get('company_name', 'Not available')),
+            'company_location': fresh(job.get('company_location', 'Not available')),
+            'salary': fresh('Not available'),
+            'job_type': fresh('Full-time'),
+            'rating': fresh('Not available'),
+            'job_description': fresh(job.get('job_description', '')),
+            'searched_job': fresh('Software Engineer'),
+            'searched_location': fresh('San Diego, CA'),
+            'job_key': f"sj_{i:016x}",
+            'search_query': fresh('Software Engineer'),
+            'searched_titles': searched_titles,
+        })
+    return rows
+
+
+def run_records_benchmark(args):
+    """
+    Memory per `--count` job records as plain dicts vs JobRecord with each
+    description storage, measured with tracemalloc, plus the cost of reading every
+    description back.
+    """
+    import tracemalloc
+    import job_record
+    from job_record import JobRecord
+
+    jobs = load_fixture_jobs(args.jobs)
+    if not jobs:
+        print("No fixture jobs found.")
+        return 1
+
+    def build(kind):
+        # Measure what stays allocated once the scraped strings are held only by the records
+        tracemalloc.start()
+        rows = build_job_rows(args.count, jobs)
+        if kind == 'dict':
+            records = rows
+        else:
+            records = [JobRecord(row, storage=kind) for row in rows]
+        del rows
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return records, size
+
+    print(f"{'representation':<18} {'MB / ' + str(args.count):>12} {'bytes/record':>13} {'read all ms':>12}")
+    results = {}
+    for kind in ('dict', 'plain', 'zlib', 'disk'):
+        records, size = build(kind)
+        start = time.perf_counter()
+        for record in records:
+            record.get('job_description')
+        read_ms = (time.perf_counter() - start) * 1000
+        results[kind] = size
+        label = 'dict' if kind == 'dict' else f"JobRecord ({kind})"
+        print(f"{label:<18} {size / 1e6:>12.2f} {size / args.count:>13.0f} {read_ms:>12.1f}")
+        del records
+    print(f"\nJobRecord ({job_record.DESCRIPTION_STORAGE}, the default) uses "
+          f"{results[job_record.DESCRIPTION_STORAGE] / results['dict']:.0%} of the dict memory")
+    return 0
+
+
+# =====================================================================
+# --- RECORD / REPLAY PIPELINE ---
+# =====================================================================
+
+def use_scratch_caches(directory):
+    """Points the search / description / score caches at `directory` so runs start cold."""
+    import scraper_logic
+    import llm_match_logic
+    from cache_store import DiskCache
+
+    scraper_logic.search_page_cache = DiskCache("search_pages", ttl=scraper_logic.SEARCH_CACHE_TTL, cache_dir=directory)
+    scraper_logic.job_desc_cache = DiskCache("job_descriptions", ttl=scraper_logic.SEARCH_CACHE_TTL, cache_dir=directory)
+    llm_match_logic.score_cache = DiskCache("scores", cache_dir=directory)
+
+
+def use_fixture_replay(fixture_dir):
+    """Switches the scraper to serve pages from the fixture archive. Returns the archive."""
+    import page_archive
+    import scraper_logic
+
+    archive = page_archive.PageArchive(fixture_dir)
+    page_archive.FIXTURE_MODE = 'replay'
+    scraper_logic.fixture_archive = archive
+    scraper_logic.driver = None
+    return archive
+
+
+def stage_latencies(summary):
+    return {name: {'p50_s': st['p50_s'], 'p95_s': st['p95_s'], 'count': st['count']}
+            for name, st in summary['stages'].items()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def record_history(path, metrics):
+    """Appends this run to the JSONL history and returns the previous entry from another commit."""
+    previous = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('commit') != metrics['commit']:
+                    previous = entry
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(metrics) + "\n")
+    return previous
+
+
+def run_record(args):
+    """Runs a live scrape with page recording on, to build a fixture archive."""
+    import page_archive
+    import scraper_logic
+
+    page_archive.FIXTURE_MODE = 'record'
+    scraper_logic.fixture_archive = page_archive.PageArchive(args.fixtures)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        use_scratch_caches(cache_dir)
+        jobs = scraper_logic.scrape_indeed_jobs(args.keywords, args.location,
+                                                max_jobs=args.max_jobs, max_pages=args.max_pages)
+    print(f"Recorded {len(scraper_logic.fixture_archive.urls())} pages ({len(jobs)} jobs) into {args.fixtures}")
+    return 0
+
+
+# Titles / location of the synthetic archive committed under fixtures/pages
+SAMPLE_FIXTURE_TITLES = ['Software Engineer', 'Full Stack Developer']
+SAMPLE_FIXTURE_LOCATION = 'San Diego, CA'
+_SAMPLE_COMPANIES = ['SeeScan', 'Qualcomm', 'Intuit', 'ServiceNow', 'Illumina', 'Viasat', 'Teradata']
+_SAMPLE_SALARIES = ['$120,000 - $150,000 a year', 'Not available', '$65 - $80 an hour']
+_SAMPLE_JOB_TYPES = ['Full-time', 'Contract', 'Full-time']
+# Search results always include some unrelated postings (every third card here)
+_SAMPLE_OFF_TARGET = ['Warehouse Associate', 'Dental Assistant', 'Retail Sales Associate', 'Delivery Driver']
+
+
+def build_sample_fixture(directory, jobs, titles=SAMPLE_FIXTURE_TITLES, location=SAMPLE_FIXTURE_LOCATION,
+                         pages=2, per_page=5):
+    """
+    Writes a small synthetic search site into a fixture archive, like
+    build_query_plan_fixture: `pages` result pages of `per_page` cards per title
+    (the last title's second page repeats two postings of the first title, as
+    overlapping searches do) and one job page per posting, with the descriptions
+    of the fixture `jobs`. Every third card is an unrelated posting, and cards
+    carry salary / job type / rating, so every extractor has something to find.
+    Returns the archive.
+    """
+    import html
+    import page_archive
+    import scraper_logic
+    from async_scraper import search_url
+
+    archive = page_archive.PageArchive(directory)
+    jobs = [job for job in jobs if job.get('job_description') not in scraper_logic.FAILED_DESCRIPTIONS] or [{}]
+    postings = []
+    for title in titles:
+        for _ in range(pages * per_page):
+            index = len(postings)
+            job = jobs[index % len(jobs)]
+            off_target = _SAMPLE_OFF_TARGET[index // 3 % len(_SAMPLE_OFF_TARGET)] if index % 3 == 2 else None
+            postings.append({'key': f"sample{index:03d}", 'title': off_target or title,
+                             'company': _SAMPLE_COMPANIES[index % len(_SAMPLE_COMPANIES)],
+                             'salary': _SAMPLE_SALARIES[index % len(_SAMPLE_SALARIES)],
+                             'job_type': _SAMPLE_JOB_TYPES[index % len(_SAMPLE_JOB_TYPES)],
+                             'rating': f"{3 + index % 20 / 10:.1f}",
+                             'description': (f"{off_target} needed. No experience required." if off_target
+                                             else job.get('job_description') or title)})
+    for posting in postings:
+        archive.record(f"{scraper_logic.base_url}/rc/clk?jk={posting['key']}",
+                       '<html><head><title>Job</title></head><body><nav>Indeed</nav>'
+                       '<div id="jobDescriptionText"><p>'
+                       f"{html.escape(posting['description'])}</p></div><footer>© Indeed</footer></body></html>")
+
+    def card(p):
+        salary = ('' if p['salary'] == 'Not available' else
+                  f'<div class="metadata salary-snippet-container"><div>{p["salary"]}</div></div>')
+        return (f'<li><div class="job"><h2><a id="sj_{p["key"]}" href="/rc/clk?jk={p["key"]}">'
+                f'<span title="{p["title"]}">{p["title"]}</span></a></h2>'
+                f'<span class="companyName">{p["company"]}</span>'
+                f'<span class="ratingNumber"><span>{p["rating"]}</span></span>'
+                f'<div class="companyLocation">{location}</div>{salary}'
+                f'<div class="metadata"><div>{p["job_type"]}</div></div></div></li>')
+
+    for number, title in enumerate(titles):
+        results = postings[number * pages * per_page:(number + 1) * pages * per_page]
+        if number:
+            # Overlapping searches return some of the same postings
+            results = results[:per_page] + postings[:2] + results[per_page + 2:]
+        for page in range(pages):
+            items = ''.join(card(p) for p in results[page * per_page:(page + 1) * per_page])
+            archive.record(search_url(title, location, page * 10),
+                           f"<html><body><div id=\"mosaic\"><ul>{items}</ul></div></body></html>")
+    return archive
+
+
+def run_sample_fixture(args):
+    """Rebuilds the synthetic fixture archive (committed under fixtures/pages)."""
+    archive = build_sample_fixture(args.fixtures, load_fixture_jobs(args.jobs) or [{}])
+    print(f"Wrote {len(archive.urls())} pages into {args.fixtures}")
+    return 0
+
+
+def run_browser_profile_benchmark(args):
+    """
+    Live: loads the same search pages, and the job pages of their first cards, with a
+    fresh browser per profile. Reports per-page load time (navigation until the
+    awaited element) and bytes transferred for search and job pages.
+    """
+    import browser_profile
+    import scraper_logic
+    from async_scraper import search_url
+
+    failures = {}
+    for name in args.profiles:
+        profile = browser_profile.set_profile(name)
+        print(f"\n=== '{name}' profile: {profile} ===")
+        drv = scraper_logic.create_driver()
+        if drv is None:
+            return 1
+        failures[name] = 0
+        try:
+            for page in range(args.pages):
+                page_source, status = scraper_logic.load_page_source(
+                    drv, search_url(args.keyword, args.location, page * 10))
+                if status != 'ok':
+                    failures[name] += 1
+                    continue
+                for card in scraper_logic.parse_search_page(page_source)[:args.jobs_per_page]:
+                    scraper_logic.polite_sleep(*args.pause)
+                    _, status = scraper_logic.load_page_source(drv, card['job_link'], is_job_page=True)
+                    failures[name] += status != 'ok'
+                scraper_logic.polite_sleep(*args.pause)
+        finally:
+            drv.quit()
+
+    print(f"\n{'profile':<8} {'kind':<7} {'pages':>5} {'p50 s':>7} {'p95 s':>7} {'avg KB':>8}")
+    for name in args.profiles:
+        samples = list(browser_profile.page_load_stats.get(name, {}).get('samples', []))
+        for kind, job_page in (('search', False), ('job', True)):
+            rows = [(seconds, size) for seconds, size, is_job in samples if is_job == job_page]
+            if not rows:
+                continue
+            seconds = [s for s, _ in rows]
+            sizes = [size for _, size in rows if size is not None]
+            print(f"{name:<8} {kind:<7} {len(rows):>5} {percentile(seconds, 50):>7.2f} {percentile(seconds, 95):>7.2f} "
+                  f"{sum(sizes) / len(sizes) / 1024 if sizes else 0:>8.0f}")
+        print(f"{name:<8} failed loads: {failures[name]}")
+    return 0
+
+
+def run_pipeline_benchmark(args):
+    """
+    Replays a fixture archive through the whole pipeline with the fake LLM backend:
+    scrape_indeed_jobs, the extractors, ScraperWorker.run and the GUI result rendering.
+    Results are appended to a JSONL history keyed by git commit.
+    """
+    import inference_backends
+    import scraper_logic
+    from tracing import tracer
+
+    archive = use_fixture_replay(args.fixtures)
+    searches = archive.searches()
+    if not searches:
+        print(f"No recorded search pages in {args.fixtures}. Record some with: python benchmarks.py record ...")
+        return 1
+    location = searches[0][1]
+    keywords = [keyword for keyword, loc in searches if loc == location]
+
+    inference_backends.DEFAULT_BACKEND = 'fake'
+    backend = inference_backends.load_backend('fake')
+    resume_text = load_resume_text(args.resume)
+    metrics = {'commit': git_commit(), 'timestamp': time.time(), 'fixtures': args.fixtures}
+    was_enabled = tracer.enabled
+    tracer.enabled = True
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # 1. scrape_indeed_jobs
+        use_scratch_caches(scratch)
+        tracer.reset()
+        start = time.perf_counter()
+        jobs = scraper_logic.scrape_indeed_jobs(keywords, location, max_jobs=args.max_jobs, max_pages=args.max_pages)
+        elapsed = time.perf_counter() - start
+        metrics['scrape'] = {
+            'jobs': len(jobs),
+            'seconds': elapsed,
+            'jobs_per_minute': len(jobs) / elapsed * 60 if elapsed else 0.0,
+            'stages': stage_latencies(tracer.summary()),
+        }
+
+        # 2. Extractors on every recorded search page (parse once, extract repeatedly)
+        doms = [scraper_logic.parse_html(archive.lookup(url)) for url in archive.urls() if '/jobs?' in url]
+        tracer.enabled = False
+        start = time.perf_counter()
+        cards = 0
+        for _ in range(args.repeat):
+            for dom in doms:
+                cards += len(scraper_logic.parse_job_cards(dom))
+        elapsed = time.perf_counter() - start
+        tracer.enabled = True
+        metrics['extractors'] = {'cards': cards, 'cards_per_sec': cards / elapsed if elapsed else 0.0}
+
+        # 3. ScraperWorker.run (Qt only needed for the signal plumbing)
+        try:
+            from scraper_worker import ScraperWorker
+        except ImportError as e:
+            print(f"Skipping ScraperWorker benchmark: {e}")
+        else:
+            use_scratch_caches(os.path.join(scratch, 'worker'))
+            worker = ScraperWorker(backend, resume_text, keywords, location)
+            matched = []
+            worker.result_ready.connect(matched.extend)
+            cwd = os.getcwd()
+            os.chdir(scratch)   # the worker writes its CSV into the working directory
+            try:
+                start = time.perf_counter()
+                worker.run()
+                elapsed = time.perf_counter() - start
+            finally:
+                os.chdir(cwd)
+            worker_stages = stage_latencies(tracer.summary())
+            worker_jobs = worker_stages.get('get_full_job_desc', {}).get('count', 0)
+            metrics['worker'] = {
+                'seconds': elapsed,
+                'jobs_per_minute': worker_jobs / elapsed * 60 if elapsed else 0.0,
+                'high_matches': len(matched),
+                'stages': worker_stages,
+            }
+
+        # 4. GUI result rendering (offscreen)
+        try:
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            from PySide6.QtWidgets import QApplication
+            from gui_widgets import MainWindowWidget
+            app = QApplication.instance() or QApplication([])
+            # The window imports the Qt PDF widgets itself
+            window = MainWindowWidget()
+        except ImportError as e:
+            print(f"Skipping GUI rendering benchmark: {e}")
+        else:
+            scored = [dict(job, match_score=70 + i % 30) for i, job in enumerate(jobs)]
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                window.display_matched_jobs(scored)
+                app.processEvents()
+            elapsed = time.perf_counter() - start
+            metrics['gui_render'] = {'cards': len(scored), 'ms_per_render': elapsed / args.repeat * 1000}
+            window.close()
+
+    tracer.enabled = was_enabled
+    tracer.reset()
+
+    # --- Report ---
+    print(f"\nscrape_indeed_jobs: {metrics['scrape']['jobs']} jobs, "
+          f"{metrics['scrape']['jobs_per_minute']:.1f} jobs/min")
+    for name, st in sorted(metrics['scrape']['stages'].items()):
+        print(f"   {name:<30} n={st['count']:<5} p50={st['p50_s'] * 1000:8.2f} ms  p95={st['p95_s'] * 1000:8.2f} ms")
+    print(f"extractors: {metrics['extractors']['cards_per_sec']:.0f} cards/sec")
+    if 'worker' in metrics:
+        print(f"ScraperWorker.run: {metrics['worker']['seconds']:.2f} s, "
+              f"{metrics['worker']['jobs_per_minute']:.1f} jobs/min, {metrics['worker']['high_matches']} high matches")
+    if 'gui_render' in metrics:
+        print(f"GUI render: {metrics['gui_render']['ms_per_render']:.1f} ms for {metrics['gui_render']['cards']} cards")
+
+    previous = record_history(args.history, metrics)
+    if previous:
+        before = previous.get('scrape', {}).get('jobs_per_minute')
+        if before:
+            change = 100.0 * (metrics['scrape']['jobs_per_minute'] - before) / before
+            print(f"\nvs {previous['commit']}: scrape jobs/min {before:.1f} -> "
+                  f"{metrics['scrape']['jobs_per_minute']:.1f} ({change:+.1f}%)")
+    return 0
+
+
+# =====================================================================
+# --- ASYNC SCRAPER AGAINST A LOCAL FIXTURE SITE ---
+# =====================================================================
+
+def serve_fixture_site(archive, latency):
+    """
+    Serves the archived pages over HTTP on 127.0.0.1 (random port), each response
+    delayed by `latency` seconds to stand in for network + render time.
+    Returns (server, site_url); call server.shutdown() when done.
+    """
+    import http.server
+    import threading
+    import scraper_logic
+
+    class FixtureHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            page_source = archive.lookup(scraper_logic.base_url + self.path)
+            time.sleep(latency)
+            if page_source is None:
+                self.send_error(404)
+                return
+            body = page_source.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_async_scrape_benchmark(args):
+    """
+    Scrapes a local HTTP copy of a fixture archive with the async core at several
+    concurrency levels (cold caches each time), checks that every level returns the
+    same records, and measures how quickly a stop request returns.
+    """
+    import asyncio
+    import page_archive
+    import async_scraper
+
+    archive = page_archive.PageArchive(args.fixtures)
+    searches = archive.searches()
+    if not searches:
+        print(f"No recorded search pages in {args.fixtures}. Record some with: python benchmarks.py record ...")
+        return 1
+    location = searches[0][1]
+    keywords = [keyword for keyword, loc in searches if loc == location]
+
+    server, site_url = serve_fixture_site(archive, args.latency)
+    async_scraper.PAGE_PAUSE = (0, 0)
+
+    def scrape(concurrency, cache_dir, stop_checker=None):
+        use_scratch_caches(cache_dir)
+        return asyncio.run(async_scraper.scrape_indeed_jobs_async(
+            keywords, location, max_jobs=args.max_jobs, max_pages=args.max_pages, stop_checker=stop_checker,
+            concurrency=concurrency, fetcher=async_scraper.HttpFetcher(site_url),
+            rate_limiter=async_scraper.RateLimiter(0, 0)))
+
+    results = {}
+    reference = None
+    failed = False
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            for concurrency in args.concurrency:
+                start = time.perf_counter()
+                jobs = scrape(concurrency, os.path.join(scratch, f"c{concurrency}"))
+                elapsed = time.perf_counter() - start
+                links = [job['job_link'] for job in jobs]
+                if reference is None:
+                    reference = links
+                elif links != reference:
+                    failed = True
+                results[concurrency] = (len(jobs), elapsed)
+
+            # Stop halfway through the first batch of job-page fetches
+            stop_at = []
+            search_loaded = []
+            loads_before = async_scraper.scraper_logic.page_loads
+            def stop_checker():
+                now = time.perf_counter()
+                if not search_loaded and async_scraper.scraper_logic.page_loads > loads_before:
+                    search_loaded.append(now)
+                if not stop_at and search_loaded and now - search_loaded[0] > args.latency / 2:
+                    stop_at.append(now)
+                return bool(stop_at)
+            stopped_jobs = scrape(max(args.concurrency), os.path.join(scratch, 'stop'), stop_checker)
+            stop_latency = time.perf_counter() - stop_at[0] if stop_at else None
+    finally:
+        server.shutdown()
+
+    print(f"\n{'concurrency':>11} {'jobs':>5} {'seconds':>8} {'jobs/min':>9} {'speedup':>8}")
+    base_seconds = results[args.concurrency[0]][1]
+    for concurrency, (count, elapsed) in results.items():
+        print(f"{concurrency:>11} {count:>5} {elapsed:>8.2f} {count / elapsed * 60:>9.1f} "
+              f"{base_seconds / elapsed:>7.2f}x")
+    if stop_latency is not None:
+        print(f"stop -> return: {stop_latency * 1000:.0f} ms ({len(stopped_jobs)} jobs kept, "
+              f"page latency {args.latency * 1000:.0f} ms)")
+    if failed:
+        print("FAIL: concurrency levels returned different records")
+        return 1
+    return 0
+
+
+# =====================================================================
+# --- SNIPPET PRE-FILTER ---
+# =====================================================================
+
+def run_card_filter_benchmark(args):
+    """
+    Replays a fixture archive at several snippet cutoffs (cold caches each time) and
+    scores what was fetched with the fake backend. Reports the description fetches
+    each cutoff saves and how many of the matches found with every card fetched it
+    still finds.
+    """
+    import inference_backends
+    import scraper_logic
+    from card_filter import SnippetFilter
+    from llm_match_logic import calculate_match_scores
+
+    archive = use_fixture_replay(args.fixtures)
+    searches = archive.searches()
+    if not searches:
+        print(f"No recorded search pages in {args.fixtures}. Record some with: python benchmarks.py record ...")
+        return 1
+    location = searches[0][1]
+    keywords = [keyword for keyword, loc in searches if loc == location]
+    backend = inference_backends.load_backend('fake')
+    resume_text = load_resume_text(args.resume)
+
+    def run(cutoff, cache_dir):
+        use_scratch_caches(cache_dir)
+        card_filter = SnippetFilter(resume_text, cutoff) if cutoff else None
+        location_stats = {}
+        jobs = scraper_logic.scrape_indeed_jobs(keywords, location, max_jobs=args.max_jobs,
+                                                max_pages=args.max_pages, card_filter=card_filter,
+                                                location_stats=location_stats)
+        scores = calculate_match_scores(backend, resume_text, [job['job_description'] for job in jobs],
+                                        use_cache=False)
+        matches = {job['job_link'] for job, score in zip(jobs, scores) if score >= args.min_score}
+        return location_stats[location]['search_pages'], len(jobs), matches
+
+    rows = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for cutoff in [0] + [c for c in args.cutoffs if c]:
+            rows.append((cutoff,) + run(cutoff, os.path.join(scratch, f"c{cutoff}")))
+
+    _, _, base_fetches, base_matches = rows[0]
+    print(f"\n{'cutoff':>6} {'search pages':>13} {'fetches':>8} {'saved':>6} {'matches':>8} {'kept':>6}")
+    for cutoff, search_pages, fetches, matches in rows:
+        kept = len(matches & base_matches) / len(base_matches) if base_matches else 1.0
+        print(f"{cutoff if cutoff else 'off':>6} {search_pages:>13} {fetches:>8} {base_fetches - fetches:>6} "
+              f"{len(matches):>8} {kept:>6.0%}")
+    return 0
+
+
+# =====================================================================
+# --- SKILL INDEX ---
+# =====================================================================
+
+_FILLER_SENTENCES = (
+    "You will design, build and maintain services used by millions of customers.",
+    "Collaborate with product managers and designers in a fast-paced environment.",
+    "We offer competitive pay, medical, dental and vision benefits.",
+    "Strong communication skills and a bachelor's degree in computer science or equivalent.",
+    "Own features end to end, from design reviews to production monitoring.",
+    "This role is hybrid, three days a week in our downtown office.",
+)
+
+
+def synthetic_skill_jobs(count, seed=7):
+    """`count` job dicts whose descriptions mention random skill aliases and experience requirements."""
+    import random
+    from skill_index import ALIASES, CAPITALIZED_ALIASES
+    rng = random.Random(seed)
+    # Written the way postings do ("React", "Spark"), so the capitalized-only aliases match
+    aliases = sorted(alias.capitalize() if alias in CAPITALIZED_ALIASES else alias for alias in ALIASES)
+    jobs = []
+    for i in range(count):
+        skills = ", ".join(rng.sample(aliases, rng.randint(3, 12)))
+        years = f"{rng.randint(1, 10)}+ years of experience. " if rng.random() < 0.6 else ""
+        filler = " ".join(rng.sample(_FILLER_SENTENCES, 3))
+        jobs.append({'job_link': f"synthetic/{i}",
+                     'job_description': f"{filler} Requirements: {years}Experience with {skills}."})
+    return jobs
+
+
+def run_skill_index_benchmark(args):
+    """
+    Indexes `--jobs` synthetic postings and scores them all against one resume with
+    SkillIndex.features(). Reports indexing throughput, the feature pass time
+    (budget: --budget-ms) and the same features computed job by job in Python.
+    """
+    from skill_index import SkillIndex, extract_skills, extract_years, YEARS_PENALTY, _numeric
+
+    try:
+        _numeric()
+    except ImportError as e:
+        # Same fallback as ScraperWorker.skill_prefilter: no numpy / scipy, no skill features
+        print(f"Skipping skill index benchmark: {e}")
+        return 0
+
+    resume_text = load_resume_text(args.resume)
+    jobs = synthetic_skill_jobs(args.jobs)
+    index = SkillIndex()
+    start = time.perf_counter()
+    index.add_jobs(jobs)
+    index_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index.postings
+    matrix_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        features = index.features(resume_text)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Reference: the same features, one job at a time over Python sets
+    resume_skills, resume_years = extract_skills(resume_text), extract_years(resume_text)
+    job_skills = [set(index.job_skills(row)) for row in range(len(index))]
+    start = time.perf_counter()
+    reference = []
+    for skills, years in zip(job_skills, index._years):
+        overlap = len(skills & resume_skills)
+        coverage = overlap / len(skills) if skills else 0.0
+        gap = max(years - resume_years, 0) if resume_years else 0
+        reference.append(min(100, max(0, round(100 * coverage) - YEARS_PENALTY * gap)))
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    feature_ms = statistics.median(timings)
+    scores = features['skill_score']
+    mismatches = sum(int(a) != b for a, b in zip(scores, reference))
+    print(f"\n{len(jobs)} jobs, {len(index.skills)} skills, {index.matrix.nnz} job-skill entries "
+          f"({index.matrix.nnz / len(jobs):.1f} per job); resume: {len(resume_skills)} skills, {resume_years} years")
+    print(f"indexing:           {index_seconds:.2f} s ({len(jobs) / index_seconds:,.0f} jobs/s)")
+    print(f"matrix + postings:  {matrix_ms:.1f} ms")
+    print(f"features():         p50 {feature_ms:.1f} ms, p95 {percentile(timings, 95):.1f} ms "
+          f"({len(jobs) / feature_ms * 1000:,.0f} jobs/s)")
+    print(f"per-job Python:     {loop_ms:.1f} ms ({loop_ms / feature_ms:.1f}x slower)")
+    for cutoff in args.cutoffs:
+        print(f"skill score >= {cutoff:>3}:  {int((scores >= cutoff).sum()):>7} jobs")
+    if mismatches:
+        print(f"FAIL: {mismatches} skill scores differ from the per-job computation")
+        return 1
+    if feature_ms > args.budget_ms:
+        print(f"FAIL: features() took {feature_ms:.1f} ms, budget {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+# =====================================================================
+# --- PARSE POOL ---
+# =====================================================================
+
+def run_parse_pool_benchmark(args):
+    """
+    Parses every page of a fixture archive (`--repeat` times) through a ParsePool of
+    each size, all pages in flight at once as in a scrape. Reports pages/sec and the
+    longest event-loop stall (how long a finished page load could wait to be handed
+    its next URL), and checks every size returns what in-process parsing returns.
+    """
+    import asyncio
+    from urllib.parse import urlparse
+    import page_archive
+    import scraper_logic
+    from parse_pool import ParsePool
+
+    archive = page_archive.PageArchive(args.fixtures)
+    pages = []
+    for url in archive.urls():
+        parser = (scraper_logic.parse_search_page if urlparse(url).path == '/jobs'
+                  else scraper_logic.parse_job_page)
+        pages.append((parser, archive.lookup(url)))
+    if not pages:
+        print(f"No recorded pages in {args.fixtures}. Record some with: python benchmarks.py record ...")
+        return 1
+    work = pages * args.repeat
+    print(f"{len(pages)} fixture pages x {args.repeat} = {len(work)} parses "
+          f"({sum(len(source) for _, source in pages) / len(pages) / 1024:.0f} KB per page), "
+          f"{os.cpu_count()} CPUs")
+
+    async def parse_all(pool):
+        stalls = []
+        done = asyncio.Event()
+
+        async def ticker():
+            loop = asyncio.get_running_loop()
+            while not done.is_set():
+                before = loop.time()
+                await asyncio.sleep(0.005)
+                stalls.append(loop.time() - before - 0.005)
+
+        tick = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(pool.parse(parser, source) for parser, source in work))
+        done.set()
+        await tick
+        return results, max(stalls, default=0.0)
+
+    reference = [parser(source) for parser, source in pages]
+    rows = []
+    failed = False
+    for workers in args.workers:
+        pool = ParsePool(workers)
+        pool.start()
+        try:
+            start = time.perf_counter()
+            results, stall = asyncio.run(parse_all(pool))
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+        if results[:len(pages)] != reference:
+            failed = True
+        rows.append((workers, elapsed, stall))
+
+    print(f"\n{'workers':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'max stall ms':>13}")
+    base_seconds = rows[0][1]
+    for workers, elapsed, stall in rows:
+        print(f"{workers if workers else 'inline':>7} {elapsed:>8.2f} {len(work) / elapsed:>8.1f} "
+              f"{base_seconds / elapsed:>7.2f}x {stall * 1000:>13.1f}")
+    if failed:
+        print("FAIL: pooled parsing returned different results")
+        return 1
+    return 0
+
+
+# =====================================================================
+# --- QUERY PLANNING ---
+# =====================================================================
+
+# Synthetic postings (title words, count) behind the query-plan fixture: the titles
+# the suite searches overlap the way generate_job_titles' output does
+SYNTHETIC_POSTINGS = [
+    ('Senior Software Engineer', 6),
+    ('Software Engineer', 3),
+    ('Software Engineer Developer', 4),
+    ('Software Developer', 1),
+    ('Full Stack Developer', 5),
+    ('Senior Full Stack Developer', 3),
+]
+QUERY_PLAN_TITLES = ['Software Engineer', 'Senior Software Engineer', 'Software Developer',
+                     'Full Stack Developer', 'Senior Full Stack Developer']
+
+
+def synthetic_search_results(query, postings):
+    """Postings a query returns: every word of the title (or of one quoted OR alternative) must match."""
+    import re
+    from query_planner import title_tokens
+
+    alternatives = re.findall(r'"([^"]+)"', query) or [query]
+    wanted = [title_tokens(alternative) for alternative in alternatives]
+    return [p for p in postings if any(words <= title_tokens(p['title']) for words in wanted)]
+
+
+def build_query_plan_fixture(directory, titles, location, max_pages, per_page, jobs):
+    """
+    Records a synthetic search site into a fixture archive: the result pages of every
+    title and of every query plan_queries makes of them once those pages are cached
+    (plus the empty page after the last result), and one job page per posting.
+    """
+    import html
+    import page_archive
+    import scraper_logic
+    import query_planner
+    from async_scraper import search_url
+
+    archive = page_archive.PageArchive(directory)
+    postings = []
+    for title, count in SYNTHETIC_POSTINGS:
+        for _ in range(count):
+            job = jobs[len(postings) % len(jobs)]
+            postings.append({'key': f"syn{len(postings):04d}", 'title': title,
+                             'description': job.get('job_description') or title})
+    for posting in postings:
+        archive.record(f"{scraper_logic.base_url}/rc/clk?jk={posting['key']}",
+                       '<html><body><div id="jobDescriptionText"><p>'
+                       f"{html.escape(posting['description'])}</p></div></body></html>")
+
+    def record_query(query, pages):
+        results = synthetic_search_results(query, postings)
+        for page in range(min(pages, len(results) // per_page + 1)):
+            items = ''.join(
+                f'<li><div class="job"><a id="sj_{p["key"]}" href="/rc/clk?jk={p["key"]}">'
+                f'<span title="{p["title"]}">{p["title"]}</span></a>'
+                f'<span class="companyName">Company {p["key"][-2:]}</span>'
+                f'<div class="companyLocation">{location}</div></div></li>'
+                for p in results[page * per_page:(page + 1) * per_page])
+            archive.record(search_url(query, location, page * 10), f"<html><body><ul>{items}</ul></body></html>")
+
+    for title in titles:
+        record_query(title, max_pages)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        use_scratch_caches(cache_dir)
+        for title in titles:
+            for page in range(max_pages):
+                page_source = archive.lookup(search_url(title, location, page * 10))
+                cards = scraper_logic.parse_job_cards(scraper_logic.parse_html(page_source)) if page_source else None
+                if cards:
+                    scraper_logic.search_page_cache.set(scraper_logic.search_page_key(title, location, page * 10), cards)
+        for planned in query_planner.plan_queries(titles, location, max_pages):
+            record_query(planned.query, planned.pages)
+    return archive
+
+
+def compare_query_plans(titles, location, max_pages, per_page, max_jobs, jobs):
+    """
+    Replays a synthetic search site twice: every title searched separately, then the
+    query plan built from the first run's cached pages. Returns the plan and
+    {'separate' | 'planned': (search page loads, job keys, records)}.
+    """
+    import scraper_logic
+    import query_planner
+    from search_plan import SearchPlan
+    from tracing import tracer
+
+    was_enabled = tracer.enabled
+    tracer.enabled = True
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            build_query_plan_fixture(os.path.join(scratch, 'pages'), titles, location, max_pages, per_page, jobs)
+            use_fixture_replay(os.path.join(scratch, 'pages'))
+
+            def scrape(label, plan):
+                tracer.reset()
+                records = scraper_logic.scrape_indeed_jobs(titles, location, max_jobs=max_jobs,
+                                                           max_pages=max_pages, plan=plan)
+                search_loads = tracer.summary()['stages'].get('get_dom', {}).get('count', 0)
+                results[label] = (search_loads, {job['job_key'] for job in records}, len(records))
+
+            use_scratch_caches(os.path.join(scratch, 'separate'))
+            scrape('separate', SearchPlan(titles, max_pages))
+            # Planned against the first run's cache, scraped with a cold one
+            plan = query_planner.build_search_plan(titles, location, max_pages, planning=True)
+            use_scratch_caches(os.path.join(scratch, 'planned'))
+            scrape('planned', plan)
+    finally:
+        tracer.enabled = was_enabled
+        tracer.reset()
+    return plan, results
+
+
+def run_query_plan_benchmark(args):
+    """
+    Runs compare_query_plans on the synthetic site. The plan has to load fewer
+    search pages without losing any posting the separate searches found.
+    """
+    plan, results = compare_query_plans(args.titles, args.location, args.max_pages, args.per_page,
+                                        args.max_jobs, load_fixture_jobs(args.jobs) or [{}])
+
+    print(f"\n{'searches':<10} {'queries':>8} {'search pages':>13} {'postings':>9} {'records':>8}")
+    for label, plan_queries in (('separate', len(args.titles)), ('planned', len(plan.keywords))):
+        search_loads, keys, records = results[label]
+        print(f"{label:<10} {plan_queries:>8} {search_loads:>13} {len(keys):>9} {records:>8}")
+    separate_loads, separate_keys, _ = results['separate']
+    planned_loads, planned_keys, _ = results['planned']
+    print(f"search page loads saved: {1 - planned_loads / separate_loads:.0%}")
+    failed = False
+    if planned_loads >= separate_loads:
+        print("FAIL: the query plan did not load fewer search pages")
+        failed = True
+    if not separate_keys <= planned_keys:
+        print(f"FAIL: the query plan lost {len(separate_keys - planned_keys)} postings")
+        failed = True
+    return 1 if failed else 0
+
+
+# =====================================================================
+# --- COMMAND LINE ---
+# =====================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JobMatcher benchmarks")
+    suites = parser.add_subparsers(dest='suite', required=True)
+
+    p = suites.add_parser('imports', help="import time per entry point (python -X importtime)")
+    p.add_argument('modules', nargs='*', help="entry points to check (default: all)")
+    p.add_argument('--repeat', type=int, default=3, help="fresh interpreters per entry point")
+    p.set_defaults(func=run_import_benchmark)
+
+    p = suites.add_parser('backends', help="tokens/sec and per-job latency per inference backend")
+    p.add_argument('backends', nargs='*', default=['fake'], help="backend names (hf, cpu, fake)")
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.add_argument('--jobs', help="CSV of scraped jobs (default: indeed_jobs_*.csv)")
+    p.add_argument('--limit', type=int, default=10, help="number of jobs to score")
+    p.set_defaults(func=run_backend_benchmark)
+
+    p = suites.add_parser('speculative', help="speculative decoding speedup / acceptance rate on the CPU backend")
+    p.add_argument('--main', default="HuggingFaceTB/SmolLM2-360M-Instruct", help="main model (stand-in for the 3B)")
+    p.add_argument('--draft', default="HuggingFaceTB/SmolLM2-135M-Instruct", help="draft model, same tokenizer")
+    p.add_argument('--lookahead', type=int, nargs='+', default=[2, 4, 8], help="draft tokens per main step")
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.add_argument('--jobs', help="CSV of scraped jobs (default: indeed_jobs_*.csv)")
+    p.add_argument('--limit', type=int, default=5, help="number of match prompts")
+    p.add_argument('--max-new-tokens', type=int, default=128)
+    p.set_defaults(func=run_speculative_benchmark)
+
+    p = suites.add_parser('model-lifecycle', help="cold / warm model load, RSS, idle unload and reload")
+    p.add_argument('--backend', default='cpu', help="backend name (hf, cpu, fake)")
+    p.add_argument('--model', default="HuggingFaceTB/SmolLM2-135M-Instruct", help="model id (stand-in for the 3B)")
+    p.add_argument('--idle', type=float, default=2.0, help="idle seconds before the model is unloaded")
+    p.add_argument('--weight-cache', help="weight cache directory (default: a fresh temporary one)")
+    p.set_defaults(func=run_model_lifecycle_benchmark)
+
+    p = suites.add_parser('sharded-scoring', help="prompts/sec with K scoring replica processes (small CPU model)")
+    p.add_argument('--backend', default='cpu', help="backend name (hf, cpu, fake)")
+    p.add_argument('--model', default="HuggingFaceTB/SmolLM2-135M-Instruct", help="model id (stand-in for the 3B)")
+    p.add_argument('--replicas', type=int, nargs='+', default=[1, 2, 4])
+    p.add_argument('--prompts', type=int, default=32, help="match prompts per run")
+    p.add_argument('--chunk', type=int, default=2, help="prompts per work item")
+    p.add_argument('--max-new-tokens', type=int, default=32)
+    p.add_argument('--kill', type=float, default=0.0,
+                   help="kill one replica this many seconds into the largest run (0 = off)")
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.add_argument('--jobs', help="CSV of scraped jobs (default: indeed_jobs_*.csv)")
+    p.set_defaults(func=run_sharded_scoring_benchmark)
+
+    p = suites.add_parser('prompt-tokens', help="matching prompt tokens per job, before/after preprocessing")
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.add_argument('--jobs', help="CSV of scraped jobs (default: indeed_jobs_*.csv)")
+    p.add_argument('--tokenizer', help="HF tokenizer id to count with (default: word/punctuation estimate)")
+    p.set_defaults(func=run_prompt_token_benchmark)
+
+    p = suites.add_parser('tracing', help="span() / @traced overhead with tracing off and on")
+    p.add_argument('--calls', type=int, default=200000)
+    p.set_defaults(func=run_tracing_benchmark)
+
+    p = suites.add_parser('records', help="memory per N job records: dicts vs JobRecord")
+    p.add_argument('--count', type=int, default=10000)
+    p.add_argument('--jobs', help="CSV of scraped jobs (default: indeed_jobs_*.csv)")
+    p.set_defaults(func=run_records_benchmark)
+
+    p = suites.add_parser('record', help="live scrape that records every page into a fixture archive")
+    p.add_argument('keywords', nargs='+', help="job titles to search")
+    p.add_argument('--location', required=True)
+    p.add_argument('--fixtures', default=os.path.join(REPO_DIR, 'fixtures', 'pages'))
+    p.add_argument('--max-jobs', type=int, default=20)
+    p.add_argument('--max-pages', type=int, default=2)
+    p.set_defaults(func=run_record)
+
+    p = suites.add_parser('sample-fixtures', help="rebuild the synthetic fixture archive in fixtures/pages")
+    p.add_argument('--fixtures', default=os.path.join(REPO_DIR, 'fixtures', 'pages'))
+    p.add_argument('--jobs', help="CSV of scraped jobs for the descriptions (default: indeed_jobs_*.csv)")
+    p.set_defaults(func=run_sample_fixture)
+
+    p = suites.add_parser('browser-profile', help="live per-page load time and bytes per browser profile")
+    p.add_argument('keyword', help="job title to search")
+    p.add_argument('--location', required=True)
+    p.add_argument('--profiles', nargs='+', default=['full', 'lean'])
+    p.add_argument('--pages', type=int, default=2, help="search pages per profile")
+    p.add_argument('--jobs-per-page', type=int, default=3, help="job pages loaded per search page")
+    p.add_argument('--pause', type=float, nargs=2, default=[3, 7], help="seconds between page loads (low high)")
+    p.set_defaults(func=run_browser_profile_benchmark)
+
+    p = suites.add_parser('pipeline', help="offline replay of the whole pipeline (scrape, extract, worker, GUI)")
+    p.add_argument('--fixtures', default=os.path.join(REPO_DIR, 'fixtures', 'pages'))
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.add_argument('--max-jobs', type=int, default=20)
+    p.add_argument('--max-pages', type=int, default=2)
+    p.add_argument('--repeat', type=int, default=20, help="repetitions for extractor / GUI timings")
+    p.add_argument('--history', default=os.path.join(REPO_DIR, 'bench_history.jsonl'))
+    p.set_defaults(func=run_pipeline_benchmark)
+
+    p = suites.add_parser('async-scrape', help="async scraper vs. a local HTTP fixture site at several concurrency levels")
+    p.add_argument('--fixtures', default=os.path.join(REPO_DIR, 'fixtures', 'pages'))
+    p.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    p.add_argument('--latency', type=float, default=0.3, help="seconds added to every page response")
+    p.add_argument('--max-jobs', type=int, default=20)
+    p.add_argument('--max-pages', type=int, default=2)
+    p.set_defaults(func=run_async_scrape_benchmark)
+
+    p = suites.add_parser('card-filter', help="description fetches saved / matches kept per snippet cutoff (fixture replay)")
+    p.add_argument('--fixtures', default=os.path.join(REPO_DIR, 'fixtures', 'pages'))
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.add_argument('--cutoffs', type=int, nargs='+', default=[30, 50, 70])
+    p.add_argument('--min-score', type=int, default=40, help="match threshold (the fake backend scores ~35-50)")
+    p.add_argument('--max-jobs', type=int, default=200)
+    p.add_argument('--max-pages', type=int, default=5)
+    p.set_defaults(func=run_card_filter_benchmark)
+
+    p = suites.add_parser('skill-index', help="skill features for 100k stored jobs against one resume")
+    p.add_argument('--jobs', type=int, default=100_000, help="synthetic postings to index")
+    p.add_argument('--repeat', type=int, default=20)
+    p.add_argument('--cutoffs', type=int, nargs='+', default=[30, 50, 70])
+    p.add_argument('--budget-ms', type=float, default=100.0, help="budget for one features() pass")
+    p.add_argument('--resume', help="resume .pdf or .txt (default: built-in sample)")
+    p.set_defaults(func=run_skill_index_benchmark)
+
+    p = suites.add_parser('parse-pool', help="pages/sec of HTML parsing per parser process pool size (fixture pages)")
+    p.add_argument('--fixtures', default=os.path.join(REPO_DIR, 'fixtures', 'pages'))
+    p.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4], help="pool sizes (0 = in-process)")
+    p.add_argument('--repeat', type=int, default=20, help="times every fixture page is parsed")
+    p.set_defaults(func=run_parse_pool_benchmark)
+
+    p = suites.add_parser('query-plan', help="search pages / postings with and without query planning (synthetic replay)")
+    p.add_argument('--titles', nargs='+', default=QUERY_PLAN_TITLES)
+    p.add_argument('--location', default='San Diego, CA')
+    p.add_argument('--jobs', help="CSV of scraped jobs for the descriptions (default: indeed_jobs_*.csv)")
+    p.add_argument('--max-pages', type=int, default=3)
+    p.add_argument('--per-page', type=int, default=5, help="job cards per synthetic results page")
+    p.add_argument('--max-jobs', type=int, default=500)
+    p.set_defaults(func=run_query_plan_benchmark)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# browser_profile.py
+# Chrome settings for the scraping browsers, and per-page load measurements.
+#
+# The scraper only reads DOM text, but a default Chrome session downloads and renders
+# every image, font, stylesheet and tracker on each page. Two profiles:
+#
+#   full - the previous behaviour: visible window, 'normal' page-load strategy
+#          (driver.get waits for the load event), nothing blocked
+#   lean - headless, 'eager' page-load strategy (driver.get returns at
+#          DOMContentLoaded), images / fonts / CSS / media and known trackers
+#          blocked through the DevTools protocol (Network.setBlockedURLs), and
+#          element waits that poll every 0.1 s instead of 0.5 s
+#
+# Select one with JOBMATCHER_BROWSER_PROFILE=full|lean (default full);
+# JOBMATCHER_HEADLESS=0/1 overrides the profile's headless setting. Every live page
+# load is recorded per profile (wall time of navigation + wait, and the bytes the
+# performance API reports as transferred), see page_load_summary().
+import os
+import threading
+from collections import deque, namedtuple
+
+BrowserProfile = namedtuple('BrowserProfile', 'name headless page_load_strategy blocked_urls wait_poll')
+
+# Network.setBlockedURLs patterns ('*' wildcards)
+BLOCKED_RESOURCES = (
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',     # images
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',                             # fonts
+    '*.css',                                                                    # stylesheets
+    '*.mp4', '*.webm', '*.mp3',                                                 # media
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',    # trackers / ads
+    '*googlesyndication.com*', '*facebook.net*', '*hotjar.com*', '*bat.bing.com*',
+)
+
+PROFILES = {
+    'full': BrowserProfile('full', headless=False, page_load_strategy='normal', blocked_urls=(), wait_poll=0.5),
+    'lean': BrowserProfile('lean', headless=True, page_load_strategy='eager', blocked_urls=BLOCKED_RESOURCES,
+                           wait_poll=0.1),
+}
+
+_profile = None
+
+
+def active_profile():
+    """The profile new browsers are started with ($JOBMATCHER_BROWSER_PROFILE, default 'full')."""
+    global _profile
+    if _profile is None:
+        set_profile(os.environ.get("JOBMATCHER_BROWSER_PROFILE", "full"))
+    return _profile
+
+
+def set_profile(name):
+    """Selects the profile for browsers started from now on. Returns it."""
+    global _profile
+    if name not in PROFILES:
+        raise ValueError(f"Unknown browser profile {name!r} (choose from {', '.join(PROFILES)})")
+    profile = PROFILES[name]
+    headless = os.environ.get("JOBMATCHER_HEADLESS")
+    if headless in ("0", "1"):
+        profile = profile._replace(headless=headless == "1")
+    _profile = profile
+    return profile
+
+
+def apply_to_options(options, profile):
+    """
+    Adds the profile's settings to a (undetected_)chromedriver ChromeOptions. Headless
+    mode itself is passed as uc.Chrome(headless=...), which also hides its tell-tales.
+    """
+    if profile.headless:
+        options.add_argument("--window-size=1366,900")
+    options.page_load_strategy = profile.page_load_strategy
+    if profile.blocked_urls:
+        # Belt and braces for images: also don't decode the ones that slip through
+        options.add_argument("--blink-settings=imagesEnabled=false")
+
+
+def apply_to_driver(driver, profile):
+    """Turns on request blocking in a started browser (a no-op for profiles that block nothing)."""
+    if not profile.blocked_urls:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(profile.blocked_urls)})
+    except Exception as e:
+        print(f"Could not enable request blocking for the '{profile.name}' browser profile: {e}")
+
+
+# =====================================================================
+# --- PAGE LOAD MEASUREMENTS ---
+# =====================================================================
+
+# Navigation + resource transfer sizes of the current document (0 for cached / blocked)
+_TRANSFER_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    bytes: (nav ? nav.transferSize : 0) + resources.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+    resources: resources.length,
+    dom_ready_ms: nav ? nav.domContentLoadedEventEnd : null,
+};
+"""
+
+# Per-page samples kept per profile (the totals cover every page)
+MAX_SAMPLES = 1000
+
+_stats_lock = threading.Lock()
+# profile name -> {'pages', 'seconds', 'bytes', 'samples': deque of (seconds, bytes, job_page)}
+page_load_stats = {}
+
+
+def measure_transfer(driver):
+    """{'bytes', 'resources', 'dom_ready_ms'} of the page `driver` shows, or None if unavailable."""
+    try:
+        metrics = driver.execute_script(_TRANSFER_SCRIPT)
+    except Exception:
+        return None
+    return metrics if isinstance(metrics, dict) else None
+
+
+def record_page_load(profile, seconds, transfer, is_job_page):
+    with _stats_lock:
+        stats = page_load_stats.setdefault(profile.name, {'pages': 0, 'seconds': 0.0, 'bytes': 0,
+                                                         'samples': deque(maxlen=MAX_SAMPLES)})
+        stats['pages'] += 1
+        stats['seconds'] += seconds
+        stats['bytes'] += (transfer or {}).get('bytes') or 0
+        stats['samples'].append((seconds, (transfer or {}).get('bytes'), is_job_page))
+
+
+def page_load_summary():
+    """{profile: {'pages', 'avg_seconds', 'avg_kb'}} over the page loads recorded so far."""
+    with _stats_lock:
+        return {name: {'pages': stats['pages'],
+                       'avg_seconds': stats['seconds'] / stats['pages'],
+                       'avg_kb': stats['bytes'] / stats['pages'] / 1024}
+                for name, stats in page_load_stats.items() if stats['pages']}
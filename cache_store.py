@@ -0,0 +1,79 @@
+# cache_store.py
+# Small JSON-on-disk cache shared by the title, score and search-page caches.
+# One file per entry under <CACHE_DIR>/<namespace>/, written atomically so a crash
+# mid-write never leaves a half-written entry behind.
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+CACHE_DIR = os.environ.get("JOBMATCHER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".jobmatcher_cache"))
+
+
+def content_hash(*parts):
+    """sha256 hex digest over the given strings (used for resume / description keys)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Key/value store for JSON-serializable values. `ttl` (seconds) makes entries
+    expire; None keeps them forever. Hit / miss / stale counters are kept in `stats`.
+    """
+
+    def __init__(self, namespace, ttl=None, cache_dir=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.directory = os.path.join(cache_dir or CACHE_DIR, namespace)
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'writes': 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, content_hash(key) + ".json")
+
+    def get(self, key, max_age=None):
+        """
+        Returns the cached value or None. `max_age` overrides the cache TTL for this
+        lookup (use float('inf') to accept any age, e.g. when replaying).
+        """
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+
+        limit = self.ttl if max_age is None else max_age
+        if limit is not None and time.time() - entry.get('created', 0) > limit:
+            self.stats['stale'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        return entry.get('value')
+
+    def set(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = None
+        try:
+            # A unique temp file per write: threads of one process may set the same key
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.directory,
+                                             suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump({'key': key, 'created': time.time(), 'value': value}, f)
+            os.replace(tmp_path, path)
+            self.stats['writes'] += 1
+        except OSError as e:
+            print(f"Cache write failed ({self.namespace}): {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -0,0 +1,69 @@
+# card_filter.py
+# Cheap pre-scoring of search cards, so job pages are only opened for likely matches.
+#
+# Every description fetch is a full browser navigation (page load, element wait and
+# a polite pause), but most of what decides relevance is already on the search card.
+# SnippetFilter scores a card 0-100 from its snippet fields against the resume:
+#
+#   title vs. resume + searched title   60  share of the card title's words found in either
+#   title vs. searched title            30  share of the searched title's words in the card title
+#   other snippet fields vs. resume     10  company / location / job type / salary words in the resume
+#
+# Cards below `cutoff` are skipped; the rest are fetched best first. The cutoff comes
+# from the GUI or JOBMATCHER_SNIPPET_CUTOFF (default 0 = fetch every card, as before).
+import os
+import re
+
+from query_planner import title_tokens
+
+SNIPPET_CUTOFF = int(os.environ.get("JOBMATCHER_SNIPPET_CUTOFF", "0"))
+
+TITLE_WEIGHT = 60
+KEYWORD_WEIGHT = 30
+DETAIL_WEIGHT = 10
+
+# Words that say nothing about fit (the "or" comes from planned ("a" OR "b") queries)
+STOP_WORDS = frozenset({'a', 'an', 'and', 'or', 'of', 'the', 'for', 'to', 'in', 'at', 'with', 'on', '-', '&',
+                        'i', 'ii', 'iii', 'iv', 'not', 'available', 'remote', 'hybrid', 'job', 'jobs'})
+_QUOTE_PATTERN = re.compile(r'["()]')
+
+
+def snippet_tokens(text):
+    return title_tokens(_QUOTE_PATTERN.sub(' ', text or '')) - STOP_WORDS
+
+
+class SnippetFilter:
+    """Scores search cards against one resume and splits them into fetch / skip."""
+
+    def __init__(self, resume_text, cutoff=SNIPPET_CUTOFF):
+        self.cutoff = cutoff
+        self.resume_words = snippet_tokens(resume_text)
+        self.scored = 0
+        self.skipped = 0
+
+    def score(self, card, keyword=''):
+        title = snippet_tokens(card.get('job_title'))
+        searched = snippet_tokens(keyword)
+        if not title:
+            return 0
+        title_share = len(title & (self.resume_words | searched)) / len(title)
+        keyword_share = len(title & searched) / len(searched) if searched else title_share
+        details = snippet_tokens(" ".join(str(card.get(field) or '') for field in
+                                          ('company_name', 'company_location', 'job_type', 'salary')))
+        detail_share = len(details & self.resume_words) / len(details) if details else 0.0
+        return round(TITLE_WEIGHT * title_share + KEYWORD_WEIGHT * keyword_share + DETAIL_WEIGHT * detail_share)
+
+    def select(self, cards, keyword=''):
+        """Returns (cards to fetch, best snippet score first; skipped cards). Sets card['snippet_score']."""
+        for card in cards:
+            card['snippet_score'] = self.score(card, keyword)
+        self.scored += len(cards)
+        keep = sorted((card for card in cards if card['snippet_score'] >= self.cutoff),
+                      key=lambda card: card['snippet_score'], reverse=True)
+        skipped = [card for card in cards if card['snippet_score'] < self.cutoff]
+        self.skipped += len(skipped)
+        return keep, skipped
+
+    def summary(self):
+        return (f"{self.skipped} of {self.scored} cards below snippet score {self.cutoff} "
+                f"({self.skipped} description fetches saved)")
@@ -4,7 +4,7 @@ import sys
 import webbrowser
 from PySide6.QtWidgets import (
     QWidget, QGridLayout, QScrollArea, QPushButton, QLabel, QHBoxLayout, 
-    QVBoxLayout, QFileDialog, QSizePolicy, QLineEdit, QApplication
+    QVBoxLayout, QFileDialog, QSizePolicy, QLineEdit, QApplication, QCheckBox, QSpinBox
 )
 from PySide6.QtGui import QFont, QCursor
 from PySide6 import QtCore
@@ -13,7 +13,9 @@ from PySide6 import QtCore
 from utils_constants import clear_layout
 #from llm_pdf_logic import load_job_recommender, extract_text_from_pdf, generate_job_titles
 from scraper_worker import ScraperWorker
-from scraper_logic import scrape_indeed_jobs
+from search_service import SearchService
+from card_filter import SNIPPET_CUTOFF
+from skill_index import SKILL_CUTOFF, ranking_key
 try:
     from model_loader import load_job_recommender, extract_text_from_pdf, generate_job_titles
 except ImportError:
@@ -29,7 +31,11 @@ class MainWindowWidget(QWidget):
         super(MainWindowWidget, self).__init__()
         self.resize(1200, 900)
         self.extracted_resume_text = None
-        self.scraper_thread = None
+        # One background service for every search; searches started while one runs are queued
+        self.search_service = SearchService()
+        self.search_service.queue_changed.connect(self.update_queue_status)
+        self.search_service.task_started.connect(self.search_task_started)
+        self.search_tasks = []
         
         # --- WIDGET INITIALIZATION (Importing from constants needed PySide classes) ---
         from PySide6.QtPdfWidgets import QPdfView
@@ -57,10 +63,18 @@ class MainWindowWidget(QWidget):
         self.process_button.clicked.connect(self.process_resume_llm)
         self.process_button.setEnabled(False) 
 
+        # Titles are cached per resume; tick this to rerun inference anyway
+        self.regenerate_checkbox = QCheckBox("Regenerate titles (ignore cache)")
+
         # Job Location Input
         self.location_label = QLabel("Job Location:")
         self.location_input = QLineEdit()
-        self.location_input.setPlaceholderText("e.g., San Francisco, CA or Remote")
+        self.location_input.setPlaceholderText("e.g., San Francisco, CA or Remote (several: San Diego, CA; Seattle, WA)")
+        # Search radius around each location; 0 keeps Indeed's default
+        self.radius_input = QSpinBox()
+        self.radius_input.setRange(0, 100)
+        self.radius_input.setSpecialValueText("Default radius")
+        self.radius_input.setSuffix(" mi")
 
         # Dynamic Titles Layout (LEFT)
         self.job_buttons_container = QWidget() 
@@ -80,6 +94,29 @@ class MainWindowWidget(QWidget):
         self.search_button.clicked.connect(self.start_job_search) 
         self.search_button.setEnabled(False) 
 
+        # Goal-driven search: keep scraping until this many jobs reach the minimum score
+        self.target_matches_label = QLabel("Stop after matches (0 = scrape 10 jobs):")
+        self.target_matches_input = QSpinBox()
+        self.target_matches_input.setRange(0, 50)
+        self.target_matches_input.setValue(0)
+        self.min_score_label = QLabel("Min score:")
+        self.min_score_input = QSpinBox()
+        self.min_score_input.setRange(0, 100)
+        self.min_score_input.setValue(70)
+        self.min_score_input.setSuffix(" %")
+        # Two-phase scraping: skip the job pages of cards whose snippet score is below this
+        self.snippet_cutoff_label = QLabel("Card cutoff:")
+        self.snippet_cutoff_input = QSpinBox()
+        self.snippet_cutoff_input.setRange(0, 100)
+        self.snippet_cutoff_input.setSpecialValueText("Off")
+        self.snippet_cutoff_input.setValue(SNIPPET_CUTOFF)
+        # Jobs whose skill score is below this are not sent to the LLM
+        self.skill_cutoff_label = QLabel("Skill cutoff:")
+        self.skill_cutoff_input = QSpinBox()
+        self.skill_cutoff_input.setRange(0, 100)
+        self.skill_cutoff_input.setSpecialValueText("Off")
+        self.skill_cutoff_input.setValue(SKILL_CUTOFF)
+
         self.stop_button = QPushButton("🛑 Stop Scraper")
         self.stop_button.clicked.connect(self.stop_job_search)
         self.stop_button.setEnabled(False) 
@@ -122,13 +159,26 @@ class MainWindowWidget(QWidget):
         left_layout.addWidget(self.load_button)
         left_layout.addWidget(self.status_label)
         left_layout.addWidget(self.process_button)
+        left_layout.addWidget(self.regenerate_checkbox)
 
         location_group = QHBoxLayout()
         location_group.addWidget(self.location_label)
         location_group.addWidget(self.location_input)
+        location_group.addWidget(self.radius_input)
         left_layout.addLayout(location_group)
 
         left_layout.addWidget(self.job_scroll_area) 
+
+        goal_group = QHBoxLayout()
+        goal_group.addWidget(self.target_matches_label)
+        goal_group.addWidget(self.target_matches_input)
+        goal_group.addWidget(self.min_score_label)
+        goal_group.addWidget(self.min_score_input)
+        goal_group.addWidget(self.snippet_cutoff_label)
+        goal_group.addWidget(self.snippet_cutoff_input)
+        goal_group.addWidget(self.skill_cutoff_label)
+        goal_group.addWidget(self.skill_cutoff_input)
+        left_layout.addLayout(goal_group)
         
         search_controls_layout = QHBoxLayout() 
         search_controls_layout.addWidget(self.search_button)
@@ -155,10 +205,10 @@ class MainWindowWidget(QWidget):
 
     def stop_job_search(self):
         """Signals the worker thread to stop and handles GUI state."""
-        if self.scraper_thread and self.scraper_thread.isRunning():
-            self.scraper_thread.stop() 
-            self.status_label.setText("🛑 Stop signal sent. Waiting for thread to shut down...")
-            self.stop_button.setEnabled(False) 
+        task = self.search_service.cancel_current()
+        if task is not None:
+            self.status_label.setText(f"🛑 Stop signal sent to: {task.describe()}. Waiting for it to shut down...")
+            self.stop_button.setEnabled(bool(self.search_service.pending_tasks()))
         else:
             self.status_label.setText("🛑 Scraper is not currently running.")
 
@@ -199,6 +249,13 @@ class MainWindowWidget(QWidget):
         else:
             e.ignore()
 
+    def closeEvent(self, e):
+        """Stops the search service (quitting its browsers) and frees the model when the window closes."""
+        self.search_service.shutdown()
+        if self.llm_generator is not None and hasattr(self.llm_generator, 'close'):
+            self.llm_generator.close()
+        super().closeEvent(e)
+
     def display_job_buttons(self, titles):
         """Creates and displays suggested job titles in a 2-column grid."""
         
@@ -265,7 +322,10 @@ class MainWindowWidget(QWidget):
         
         # 2. Call LLM for Inference
         try:
-            suggested_titles = generate_job_titles(self.llm_generator, resume_text)
+            suggested_titles = generate_job_titles(
+                self.llm_generator, resume_text,
+                force_refresh=self.regenerate_checkbox.isChecked()
+            )
         except Exception as e:
             suggested_titles = []
             print(f"LLM Generation Error: {e}")
@@ -317,35 +377,62 @@ class MainWindowWidget(QWidget):
             self.status_label.setText("🛑 **Error:** Please click 'Process Resume' first to get job titles.")
             return
 
-        # 3. Prepare and start the worker thread
-        self.scraper_thread = ScraperWorker(
+        # 3. Prepare the search task and queue it on the background service
+        task = ScraperWorker(
             llm_generator=self.llm_generator,
             resume_text=self.extracted_resume_text,
             job_titles=job_titles,
-            location=location
+            location=location,
+            target_matches=self.target_matches_input.value() or None,
+            min_score=self.min_score_input.value(),
+            radius=self.radius_input.value() or None,
+            snippet_cutoff=self.snippet_cutoff_input.value(),
+            skill_cutoff=self.skill_cutoff_input.value()
         )
 
-        # Connect the worker signals
-        self.scraper_thread.progress.connect(self.update_status_progress)
-        self.scraper_thread.result_ready.connect(self.display_matched_jobs)
-        self.scraper_thread.error.connect(self.handle_scraper_error)
-        self.scraper_thread.finished.connect(self.restore_gui_state) 
-
-        # Update GUI to show busy state
-        self.results_scroll_area.hide()
-        clear_layout(self.results_layout)
-        self.status_label.setText("🟡 Starting job search... (Browser window will open).")
-        self.search_button.setEnabled(False)
+        # Connect the task signals
+        task.progress.connect(self.update_status_progress)
+        # The spin box may have changed while the task was queued; show the threshold it ran with
+        task.result_ready.connect(lambda jobs: self.display_matched_jobs(jobs, task.min_score))
+        task.error.connect(self.handle_scraper_error)
+        task.finished.connect(lambda: self.search_task_finished(task))
+        self.search_tasks.append(task)
+
+        # Update GUI to show busy state (the previous results are cleared once the task starts)
+        if self.search_service.current_task is not None or self.search_service.pending_tasks():
+            self.status_label.setText(f"🟡 Search in {location} queued; it starts when the current one finishes.")
         self.process_button.setEnabled(False)
         self.stop_button.setEnabled(True) 
         QApplication.setOverrideCursor(QCursor(QtCore.Qt.WaitCursor))
         
-        self.right_label.setText("--- Scraper, CSV Save, and Matching Progress ---\n") 
-        
-        self.scraper_thread.start()
+        self.search_service.submit(task)
+
+    def search_task_started(self, task):
+        """Clears the previous results when a queued search actually starts running."""
+        if task not in self.search_tasks:
+            return
+        self.results_scroll_area.hide()
+        clear_layout(self.results_layout)
+        self.status_label.setText("🟡 Starting job search... (Browser window will open).")
+        self.right_label.setText("--- Scraper, CSV Save, and Matching Progress ---\n")
+
+    def search_task_finished(self, task):
+        """Drops the finished task and restores the GUI once nothing is left to run."""
+        if task in self.search_tasks:
+            self.search_tasks.remove(task)
+        if self.search_tasks:
+            QApplication.restoreOverrideCursor()
+            self.stop_button.setEnabled(True)
+        else:
+            self.restore_gui_state()
+
+    def update_queue_status(self, waiting):
+        """Shows how many searches wait behind the running one on the search button."""
+        text = "Start Search (Scrape 10 Jobs & Match)"
+        self.search_button.setText(f"{text} — {waiting} queued" if waiting else text)
 
-    def display_matched_jobs(self, high_match_jobs):
-        """Clears the output and displays only the high-match jobs."""
+    def display_matched_jobs(self, high_match_jobs, min_score):
+        """Clears the output and displays only the high-match jobs (those scoring >= `min_score`)."""
         
         clear_layout(self.results_layout) 
         self.results_scroll_area.show() 
@@ -353,14 +440,14 @@ class MainWindowWidget(QWidget):
         num_high_matches = len(high_match_jobs)
         
         if not high_match_jobs:
-            self.right_label.setText("⚠️ Search complete. No jobs with a match score of 70% or higher were found.")
+            self.right_label.setText(f"⚠️ Search complete. No jobs with a match score of {min_score}% or higher were found.")
             return
             
-        sorted_jobs = sorted(high_match_jobs, key=lambda x: x['match_score'], reverse=True)
+        sorted_jobs = sorted(high_match_jobs, key=ranking_key, reverse=True)
 
-        self.right_label.setText(f"✅ Search complete. Found **{num_high_matches}** jobs with a score >= 70%. Displaying results below.")
+        self.right_label.setText(f"✅ Search complete. Found **{num_high_matches}** jobs with a score >= {min_score}%. Displaying results below.")
 
-        header_label = QLabel("--- 🎯 HIGH MATCHES (Score 70%+ | Sorted by Score) ---")
+        header_label = QLabel(f"--- 🎯 HIGH MATCHES (Score {min_score}%+ | Sorted by Score) ---")
         header_label.setFont(QFont("Arial", 12, QFont.Bold))
         self.results_layout.addWidget(header_label)
 
@@ -378,6 +465,8 @@ class MainWindowWidget(QWidget):
                 f"**Match Score: {job['match_score']} %**<br>"
                 f"Company: {job['company_name']} ({job.get('company_location', 'Location N/A')})"
             )
+            if job.get('skill_score') is not None:
+                details_text += f"<br>Skill score: {job['skill_score']} % ({job.get('matched_skills') or 'no shared skills'})"
             details_label = QLabel(details_text)
             details_label.setWordWrap(True)
             details_label.setTextFormat(QtCore.Qt.RichText)
@@ -421,10 +510,10 @@ class MainWindowWidget(QWidget):
         """Handles errors from the worker thread."""
         self.status_label.setText(f"🛑 Critical Search Error: {message}")
         self.right_label.setText(f"--- CRITICAL SEARCH ERROR ---\n{message}\n\n{self.right_label.text()}")
-        self.restore_gui_state()
+        # The task's finished signal follows and restores the GUI
 
     def restore_gui_state(self):
-        """Restores the buttons and cursor after the thread finishes."""
+        """Restores the buttons and cursor after the last queued search finishes."""
         QApplication.restoreOverrideCursor()
         self.stop_button.setEnabled(False)
         
@@ -0,0 +1,394 @@
+# inference_backends.py
+# Pluggable text-generation backends used by generate_job_titles and calculate_match_score.
+#
+#   hf    - the original 4-bit quantized Llama pipeline (needs a CUDA GPU)
+#   cpu   - the same model in float32 with int8 dynamic quantization of the Linear layers
+#   fake  - deterministic, dependency-free backend for tests and benchmarks
+#
+# Pick one with the JOBMATCHER_BACKEND environment variable (default: hf).
+# hf / cpu can additionally run assisted (speculative) generation with a small
+# draft model from the same tokenizer family: JOBMATCHER_DRAFT_MODEL=<model id>.
+# Quantized weights are cached on disk after the first load (weight_cache.py).
+# Like the rest of the LLM code, torch / transformers are only imported when a
+# real backend is loaded.
+import os
+import re
+import zlib
+
+import weight_cache
+from llm_constants import ASSISTANT_HEADER
+from tracing import tracer
+
+# Set a persistent model ID (Using your working 3B model)
+MODEL_ID = "meta-llama/Llama-3.2-3B-Instruct"
+
+DEFAULT_BACKEND = os.environ.get("JOBMATCHER_BACKEND", "hf")
+
+# Number of CPU threads for the 'cpu' backend (0 = let torch decide)
+CPU_THREADS = int(os.environ.get("JOBMATCHER_CPU_THREADS", "0"))
+
+# Speculative decoding: draft model (e.g. meta-llama/Llama-3.2-1B-Instruct; unset = off)
+# and the number of tokens it proposes per main-model step
+DRAFT_MODEL_ID = os.environ.get("JOBMATCHER_DRAFT_MODEL") or None
+DRAFT_LOOKAHEAD = int(os.environ.get("JOBMATCHER_DRAFT_LOOKAHEAD", "4"))
+
+# Match prompts per forward batch when several jobs are scored together
+MATCH_BATCH_SIZE = int(os.environ.get("JOBMATCHER_MATCH_BATCH_SIZE", "4"))
+
+
+class InferenceBackend:
+    """
+    Minimal interface every backend implements. `generate` receives a fully
+    formatted prompt and returns only the assistant's reply.
+    """
+    name = "base"
+    model_id = None
+    # Where the weights came from on the last load: the model id or "weight cache"
+    weights_source = None
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        raise NotImplementedError
+
+    def count_tokens(self, text):
+        raise NotImplementedError
+
+    def generate_batch(self, prompts, max_new_tokens=256, do_sample=True, temperature=0.7):
+        """Replies for several prompts (one at a time unless the backend can batch)."""
+        return [self.generate(prompt, max_new_tokens=max_new_tokens, do_sample=do_sample, temperature=temperature)
+                for prompt in prompts]
+
+    def enable_speculative(self, draft_model_id, lookahead=DRAFT_LOOKAHEAD):
+        print(f"Backend '{self.name}' does not support speculative decoding; ignoring draft model {draft_model_id}.")
+
+
+# =====================================================================
+# --- HUGGING FACE PIPELINE BACKENDS ---
+# =====================================================================
+
+class HFPipelineBackend(InferenceBackend):
+    """Wraps a transformers text-generation pipeline (the original GPU setup)."""
+    name = "hf"
+
+    def __init__(self, generator, model_id=None):
+        self.generator = generator
+        self.tokenizer = generator.tokenizer
+        self.model_id = model_id or getattr(getattr(generator, 'model', None), 'name_or_path', None)
+        # Speculative decoding state (see enable_speculative)
+        self.draft_model = None
+        self.draft_model_id = None
+        self.lookahead = None
+        self.speculative_stats = self._empty_speculative_stats()
+        self._forward_calls = {'main': 0, 'draft': 0}
+        self._hooks = []
+
+    @classmethod
+    def load(cls, model_id=MODEL_ID):
+        """
+        Loads the quantized Llama 3.2 3B model and returns the text generation pipeline.
+        This function should only be called once when the application starts.
+        """
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline, BitsAndBytesConfig
+
+        print("Initializing Job Recommender Model...")
+
+        bnb_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=torch.float16,
+        )
+
+        # Use hf-cli login token (or replace None with your "hf_..." token if not logged in)
+        hf_token = os.environ.get("HF_TOKEN", None)
+
+        # Load Tokenizer & Model (pre-quantized from the weight cache when possible)
+        tokenizer = AutoTokenizer.from_pretrained(model_id, token=hf_token)
+        cached_checkpoint = weight_cache.nf4_checkpoint(model_id)
+        if cached_checkpoint:
+            model = AutoModelForCausalLM.from_pretrained(
+                cached_checkpoint,
+                device_map="auto",
+                torch_dtype=torch.float16
+            )
+        else:
+            model = AutoModelForCausalLM.from_pretrained(
+                model_id,
+                quantization_config=bnb_config,
+                device_map="auto",
+                torch_dtype=torch.float16,
+                token=hf_token
+            )
+            weight_cache.save_nf4_model(model, model_id)
+
+        # Create Pipeline
+        generator = pipeline(
+            "text-generation",
+            model=model,
+            tokenizer=tokenizer
+        )
+
+        print("Model loaded successfully! Ready for inference.")
+        backend = cls(generator, model_id)
+        backend.weights_source = "weight cache" if cached_checkpoint else model_id
+        return backend
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        kwargs = {'max_new_tokens': max_new_tokens, 'do_sample': do_sample,
+                  'pad_token_id': self.tokenizer.eos_token_id}
+        if do_sample:
+            kwargs['temperature'] = temperature
+        if self.draft_model is not None:
+            kwargs['assistant_model'] = self.draft_model
+            self._forward_calls = {'main': 0, 'draft': 0}
+        output = self.generator(prompt, **kwargs)
+        # Extract the assistant's response part
+        reply = output[0]["generated_text"].split(ASSISTANT_HEADER)[-1].strip()
+        if self.draft_model is not None:
+            self._record_acceptance(reply)
+        return reply
+
+    def generate_batch(self, prompts, max_new_tokens=256, do_sample=True, temperature=0.7):
+        """Runs the prompts through the pipeline as one padded batch (the caller sizes it)."""
+        # Assisted generation only handles one sequence at a time
+        if self.draft_model is not None or len(prompts) < 2:
+            return super().generate_batch(prompts, max_new_tokens, do_sample, temperature)
+        if self.tokenizer.pad_token_id is None:
+            self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
+        # Decoder-only models continue from the right end, so pad on the left
+        self.tokenizer.padding_side = "left"
+        kwargs = {'max_new_tokens': max_new_tokens, 'do_sample': do_sample,
+                  'pad_token_id': self.tokenizer.eos_token_id, 'batch_size': len(prompts)}
+        if do_sample:
+            kwargs['temperature'] = temperature
+        outputs = self.generator(prompts, **kwargs)
+        return [output[0]["generated_text"].split(ASSISTANT_HEADER)[-1].strip() for output in outputs]
+
+    def count_tokens(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    # --- Speculative decoding ---
+
+    def _load_draft_model(self, draft_model_id):
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        main_model = self.generator.model
+        draft_model = AutoModelForCausalLM.from_pretrained(
+            draft_model_id,
+            torch_dtype=torch.float16,
+            token=os.environ.get("HF_TOKEN", None)
+        )
+        return draft_model.to(main_model.device)
+
+    def enable_speculative(self, draft_model_id, lookahead=DRAFT_LOOKAHEAD):
+        """
+        Pairs the main model with a small draft model (same tokenizer) for assisted
+        generation: the draft proposes `lookahead` tokens, the main model verifies
+        them in one forward pass and keeps the agreeing prefix. Greedy output is
+        unchanged; only the number of main-model steps goes down.
+        """
+        if self.draft_model is not None and draft_model_id == self.draft_model_id:
+            # Only the lookahead changes: keep the loaded draft
+            draft_model = self.draft_model
+        else:
+            print(f"Loading draft model {draft_model_id} for speculative decoding (lookahead {lookahead})...")
+            draft_model = self._load_draft_model(draft_model_id)
+            main_vocab = self.generator.model.config.vocab_size
+            if draft_model.config.vocab_size != main_vocab:
+                raise ValueError(f"Draft model {draft_model_id} has a different vocabulary "
+                                 f"({draft_model.config.vocab_size} vs {main_vocab}); use one from the same family.")
+            draft_model.eval()
+        # transformers reads the lookahead from the assistant's generation config
+        draft_model.generation_config.num_assistant_tokens = lookahead
+        draft_model.generation_config.num_assistant_tokens_schedule = "constant"
+
+        self.disable_speculative()
+        self.draft_model = draft_model
+        self.draft_model_id = draft_model_id
+        self.lookahead = lookahead
+        self.speculative_stats = self._empty_speculative_stats()
+        # Forward-pass counters: one main pass verifies one batch of drafted tokens,
+        # one draft pass proposes one token
+        self._hooks = [
+            self.generator.model.register_forward_hook(self._count_forward('main')),
+            draft_model.register_forward_hook(self._count_forward('draft')),
+        ]
+
+    def disable_speculative(self):
+        for hook in self._hooks:
+            hook.remove()
+        self._hooks = []
+        self.draft_model = None
+        self.draft_model_id = None
+        self.lookahead = None
+
+    @staticmethod
+    def _empty_speculative_stats():
+        return {'generations': 0, 'new_tokens': 0, 'main_steps': 0, 'drafted': 0, 'accepted': 0}
+
+    def _count_forward(self, role):
+        def hook(module, args, output):
+            self._forward_calls[role] += 1
+        return hook
+
+    def _record_acceptance(self, reply):
+        """
+        Derives accepted draft tokens from the forward-pass counts of the last
+        generate(): each main step emits the accepted draft tokens plus one token of
+        its own, so accepted = new tokens - main steps.
+        """
+        new_tokens = self.count_tokens(reply) + 1   # + the end-of-turn token
+        main_steps = self._forward_calls['main']
+        drafted = self._forward_calls['draft']
+        accepted = max(0, min(drafted, new_tokens - main_steps))
+
+        stats = self.speculative_stats
+        stats['generations'] += 1
+        stats['new_tokens'] += new_tokens
+        stats['main_steps'] += main_steps
+        stats['drafted'] += drafted
+        stats['accepted'] += accepted
+        tracer.count('draft_tokens', drafted)
+        tracer.count('draft_tokens_accepted', accepted)
+
+    @property
+    def acceptance_rate(self):
+        """Share of drafted tokens the main model accepted since the draft was enabled (None if unused)."""
+        drafted = self.speculative_stats['drafted']
+        return self.speculative_stats['accepted'] / drafted if drafted else None
+
+
+class CPUQuantizedBackend(HFPipelineBackend):
+    """
+    GPU-free path: loads the model in float32 on the CPU and applies int8 dynamic
+    quantization to every nn.Linear (weights int8, activations quantized on the fly).
+    """
+    name = "cpu"
+
+    @classmethod
+    def load(cls, model_id=MODEL_ID):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+
+        print("Initializing Job Recommender Model (CPU, int8 dynamic quantization)...")
+        if CPU_THREADS > 0:
+            torch.set_num_threads(CPU_THREADS)
+
+        hf_token = os.environ.get("HF_TOKEN", None)
+        tokenizer = AutoTokenizer.from_pretrained(model_id, token=hf_token)
+        model = weight_cache.load_int8_model(model_id, token=hf_token)
+        cached = model is not None
+        if not cached:
+            model = AutoModelForCausalLM.from_pretrained(
+                model_id,
+                torch_dtype=torch.float32,
+                low_cpu_mem_usage=True,
+                token=hf_token
+            )
+            model.eval()
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            weight_cache.save_int8_model(model, model_id)
+
+        generator = pipeline(
+            "text-generation",
+            model=model,
+            tokenizer=tokenizer,
+            device=-1
+        )
+
+        print("Model loaded successfully! Ready for inference.")
+        backend = cls(generator, model_id)
+        backend.weights_source = "weight cache" if cached else model_id
+        return backend
+
+    def _load_draft_model(self, draft_model_id):
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        draft_model = AutoModelForCausalLM.from_pretrained(
+            draft_model_id,
+            torch_dtype=torch.float32,
+            low_cpu_mem_usage=True,
+            token=os.environ.get("HF_TOKEN", None)
+        )
+        draft_model.eval()
+        return torch.ao.quantization.quantize_dynamic(draft_model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+# =====================================================================
+# --- FAKE BACKEND (tests / benchmarks) ---
+# =====================================================================
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+_MATCH_SECTIONS = re.compile(r"--- RESUME ---(.*)--- JOB DESCRIPTION ---(.*)", re.S)
+
+
+class FakeBackend(InferenceBackend):
+    """
+    Deterministic stand-in for the LLM. Match prompts get a score derived from the
+    vocabulary overlap between the resume and the job description; any other prompt
+    gets a fixed list of job titles. The same prompt always yields the same output.
+    """
+    name = "fake"
+    model_id = "fake"
+    weights_source = "built-in"
+
+    def __init__(self, titles=None):
+        self.titles = titles or ["Software Engineer", "Full Stack Developer", "Backend Developer"]
+
+    @classmethod
+    def load(cls, model_id=None):
+        return cls()
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        sections = _MATCH_SECTIONS.search(prompt)
+        if sections is None:
+            return ", ".join(self.titles)
+
+        resume_words = {w.lower() for w in re.findall(r"[A-Za-z][A-Za-z+#.]+", sections.group(1))}
+        job_words = {w.lower() for w in re.findall(r"[A-Za-z][A-Za-z+#.]+", sections.group(2))}
+        overlap = len(resume_words & job_words) / max(1, len(job_words))
+        # Small prompt-dependent jitter so different jobs don't collapse onto one score
+        jitter = zlib.crc32(prompt.encode("utf-8")) % 11 - 5
+        score = max(0, min(100, int(round(40 + overlap * 100)) + jitter))
+
+        words = ("Skills overlap between the resume and the job description was "
+                 f"{overlap:.0%}, based on shared keywords.").split()
+        return f"**SCORE: {score}**\n" + " ".join(words[:max(0, max_new_tokens - 4)])
+
+    def count_tokens(self, text):
+        return len(_WORD_PATTERN.findall(text))
+
+
+# =====================================================================
+# --- SELECTION ---
+# =====================================================================
+
+BACKENDS = {
+    HFPipelineBackend.name: HFPipelineBackend,
+    CPUQuantizedBackend.name: CPUQuantizedBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def load_backend(name=None, model_id=MODEL_ID, draft_model_id=DRAFT_MODEL_ID, lookahead=DRAFT_LOOKAHEAD):
+    """
+    Loads the backend called `name` (default: $JOBMATCHER_BACKEND or 'hf'), with
+    speculative decoding when a draft model is given (default: $JOBMATCHER_DRAFT_MODEL).
+    """
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    backend = BACKENDS[name].load(model_id)
+    if draft_model_id:
+        backend.enable_speculative(draft_model_id, lookahead)
+    return backend
+
+
+def get_backend(generator):
+    """
+    Returns `generator` as an InferenceBackend. A bare transformers pipeline
+    (what load_job_recommender used to return) is wrapped in HFPipelineBackend.
+    """
+    if isinstance(generator, InferenceBackend):
+        return generator
+    return HFPipelineBackend(generator)
@@ -0,0 +1,224 @@
+# inference_log.py
+# Structured log of every LLM call, for parse-failure and wasted-token analysis.
+#
+# One JSON object per line: time, kind ('match' / 'titles'), backend and model,
+# prompt hash, prompt / output tokens, latency, the raw output, parse status
+# ('ok', 'no_score', 'empty', 'error') and whether a fallback value was used.
+# log() only appends to an in-memory buffer; a background thread writes the buffer
+# out every FLUSH_SECONDS or once FLUSH_ENTRIES entries are waiting, and whatever is
+# left is flushed at exit.
+#
+# The log holds raw outputs of resume-derived prompts, so it is off unless asked for:
+# JOBMATCHER_INFERENCE_LOG=1 writes <cache dir>/inference_log.jsonl,
+# JOBMATCHER_INFERENCE_LOG=<path> writes there. Once the file passes MAX_LOG_BYTES it
+# is rotated to <path>.1 (one old file is kept). Summarize it with:
+#   python inference_log.py [--log PATH] [--kind match]
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from cache_store import CACHE_DIR, content_hash
+
+_LOG_SETTING = os.environ.get("JOBMATCHER_INFERENCE_LOG", "")
+INFERENCE_LOG_ENABLED = _LOG_SETTING not in ("", "0")
+INFERENCE_LOG_PATH = _LOG_SETTING if _LOG_SETTING not in ("", "0", "1") else os.path.join(CACHE_DIR, "inference_log.jsonl")
+
+FLUSH_SECONDS = 2.0
+FLUSH_ENTRIES = 64
+# Size at which the log is rotated to <path>.1
+MAX_LOG_BYTES = int(os.environ.get("JOBMATCHER_INFERENCE_LOG_MAX_MB", "20")) * 1024 * 1024
+
+PARSE_OK = 'ok'
+
+
+class InferenceLog:
+    """Buffered JSONL writer; log() is cheap and thread-safe, the file I/O happens on a daemon thread."""
+
+    def __init__(self, path=INFERENCE_LOG_PATH, enabled=INFERENCE_LOG_ENABLED):
+        self.path = path
+        self.enabled = enabled
+        self.written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        # Held while writing the file, so an exit-time flush and the writer thread don't interleave
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = None
+        self._closed = False
+
+    def log(self, kind, backend, prompt, raw_output, latency_s, parse_status, fallback_used,
+            prompt_tokens=None, output_tokens=None, **fields):
+        """Queues one entry. `fields` adds extra keys (score, batch size, error, ...)."""
+        if not self.enabled:
+            return
+        entry = {
+            'ts': time.time(),
+            'kind': kind,
+            'backend': getattr(backend, 'name', None),
+            'model': getattr(backend, 'model_id', None),
+            'prompt_hash': content_hash(prompt)[:16],
+            'prompt_tokens': prompt_tokens,
+            'output_tokens': output_tokens,
+            'latency_s': round(latency_s, 4),
+            'raw_output': raw_output,
+            'parse_status': parse_status,
+            'fallback_used': fallback_used,
+        }
+        entry.update(fields)
+        with self._lock:
+            self._buffer.append(entry)
+            pending = len(self._buffer)
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(target=self._write_loop, name="inference-log", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+        if pending >= FLUSH_ENTRIES:
+            self._wake.set()
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wake.wait(FLUSH_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered entries now."""
+        with self._write_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+            if not entries:
+                return
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= MAX_LOG_BYTES:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+                self.written += len(entries)
+            except OSError as e:
+                print(f"Could not write inference log {self.path}: {e}")
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+
+# Process-wide log used by the title / matching code
+inference_log = InferenceLog()
+
+
+# =====================================================================
+# --- SUMMARY ---
+# =====================================================================
+
+def log_files(path=INFERENCE_LOG_PATH):
+    """The existing files of the log: its rotated predecessor (<path>.1) first, then the log."""
+    return [log_path for log_path in (path + ".1", path) if os.path.exists(log_path)]
+
+
+def read_entries(path=INFERENCE_LOG_PATH, kind=None, since=None):
+    """Entries of the log and its rotated predecessor (<path>.1), oldest first."""
+    entries = []
+    for log_path in log_files(path):
+        entries.extend(_read_file(log_path, kind, since))
+    return entries
+
+
+def _read_file(path, kind, since):
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if kind and entry.get('kind') != kind:
+                continue
+            if since and entry.get('ts', 0) < since:
+                continue
+            entries.append(entry)
+    return entries
+
+
+def summarize(entries):
+    """
+    Parse-failure rate, fallback rate and the tokens / seconds spent on calls whose
+    output could not be used, overall and per parse status and per backend/model.
+    """
+    def tokens(entry):
+        return (entry.get('prompt_tokens') or 0) + (entry.get('output_tokens') or 0)
+
+    failed = [e for e in entries if e.get('parse_status') != PARSE_OK]
+    latencies = sorted(e.get('latency_s') or 0.0 for e in entries)
+    by_status = {}
+    by_model = {}
+    for entry in entries:
+        by_status[entry.get('parse_status')] = by_status.get(entry.get('parse_status'), 0) + 1
+        model = by_model.setdefault(f"{entry.get('backend')}:{entry.get('model')}", {'calls': 0, 'failures': 0})
+        model['calls'] += 1
+        model['failures'] += entry.get('parse_status') != PARSE_OK
+    return {
+        'calls': len(entries),
+        'parse_failures': len(failed),
+        'parse_failure_rate': len(failed) / len(entries) if entries else 0.0,
+        'fallbacks': sum(1 for e in entries if e.get('fallback_used')),
+        'tokens': sum(tokens(e) for e in entries),
+        'wasted_tokens': sum(tokens(e) for e in failed),
+        'wasted_output_tokens': sum(e.get('output_tokens') or 0 for e in failed),
+        'wasted_seconds': sum(e.get('latency_s') or 0.0 for e in failed),
+        'latency_p50_s': latencies[int(0.50 * (len(latencies) - 1))] if latencies else 0.0,
+        'latency_p95_s': latencies[int(round(0.95 * (len(latencies) - 1)))] if latencies else 0.0,
+        'by_status': by_status,
+        'by_model': by_model,
+    }
+
+
+def format_summary(summary):
+    lines = [
+        f"calls: {summary['calls']}   latency p50 {summary['latency_p50_s']:.2f} s, p95 {summary['latency_p95_s']:.2f} s",
+        f"parse failures: {summary['parse_failures']} ({summary['parse_failure_rate']:.1%}), "
+        f"fallback values used: {summary['fallbacks']}",
+        f"wasted: {summary['wasted_tokens']} of {summary['tokens']} tokens "
+        f"({summary['wasted_tokens'] / summary['tokens'] if summary['tokens'] else 0.0:.1%}), "
+        f"{summary['wasted_output_tokens']} generated tokens, {summary['wasted_seconds']:.1f} s",
+        "parse status: " + ", ".join(f"{status}={count}" for status, count in sorted(summary['by_status'].items(),
+                                                                                   key=lambda item: -item[1])),
+    ]
+    for model, stats in sorted(summary['by_model'].items()):
+        lines.append(f"  {model}: {stats['calls']} calls, {stats['failures']} failures")
+    if summary['parse_failures']:
+        # A re-prompt costs about one more call per failure; constrained decoding only the score tokens
+        per_failure = summary['wasted_tokens'] / summary['parse_failures']
+        lines.append(f"re-prompting failures would cost ~{per_failure:.0f} tokens each "
+                     f"(~{summary['wasted_tokens']} tokens for this log)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the JobMatcher inference log")
+    parser.add_argument('--log', default=INFERENCE_LOG_PATH, help="JSONL log (default: %(default)s)")
+    parser.add_argument('--kind', choices=['match', 'titles'], help="only this kind of call")
+    parser.add_argument('--hours', type=float, help="only the last N hours")
+    parser.add_argument('--failures', type=int, default=0, help="also print the last N unparsable outputs")
+    args = parser.parse_args(argv)
+
+    if not log_files(args.log):
+        print(f"No inference log at {args.log} (or {args.log}.1)")
+        return 1
+    since = time.time() - args.hours * 3600 if args.hours else None
+    entries = read_entries(args.log, args.kind, since)
+    print(format_summary(summarize(entries)))
+    failed = [e for e in entries if e.get('parse_status') != PARSE_OK]
+    for entry in failed[-args.failures:] if args.failures else []:
+        print(f"\n--- {entry.get('parse_status')} ({entry.get('kind')}, prompt {entry.get('prompt_hash')}) ---\n"
+              f"{entry.get('raw_output')}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
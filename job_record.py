@@ -0,0 +1,175 @@
+# job_record.py
+# Compact in-memory representation of one scraped job.
+#
+# Most fields of a scrape repeat from record to record (searched keyword and
+# location, 'Not available' placeholders, job types, locations), while the
+# description is several KB of text that is only read when the job is scored or
+# written out. JobRecord keeps the fields in __slots__, interns the repeated ones
+# and can hold the description zlib-compressed (or spilled to a temporary file)
+# until it is read. It behaves like the dicts it replaces: record['job_title'],
+# record.get(...), record['match_score'] = 85, 'salary' in record, dict(record).
+#
+# JOBMATCHER_DESCRIPTION_STORAGE=plain (default) | zlib | disk selects how
+# descriptions are held. Compressed storage decompresses on every read, and the
+# scoring path reads each description several times (skill filter, prompt, CSV),
+# so it is for very large scrapes where memory matters more than those reads.
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from collections.abc import MutableMapping
+
+DESCRIPTION_STORAGE = os.environ.get("JOBMATCHER_DESCRIPTION_STORAGE", "plain").lower()
+
+# Fields in the order scrape_indeed_jobs has always produced them
+# (search_query / searched_titles: the planned query and the titles it stands for)
+FIELDS = ('job_link', 'job_title', 'company_name', 'company_location', 'salary', 'job_type', 'rating',
+          'job_description', 'searched_job', 'searched_location', 'job_key', 'search_query',
+          'searched_titles', 'match_score')
+# Low-cardinality fields that are shared through sys.intern
+INTERNED_FIELDS = frozenset(('job_title', 'company_name', 'company_location', 'salary', 'job_type',
+                             'rating', 'searched_job', 'searched_location', 'search_query'))
+# Shorter descriptions stay plain text: compression would not pay for its header
+COMPRESS_MIN_CHARS = 256
+
+_UNSET = object()
+
+
+class DescriptionStore:
+    """
+    Append-only spill file (deleted on close / exit) for descriptions kept on disk.
+    put() returns a (offset, length) reference that get() reads back.
+    """
+
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._lock = threading.Lock()
+        self._end = 0
+
+    def put(self, text):
+        data = zlib.compress(text.encode('utf-8'))
+        with self._lock:
+            offset = self._end
+            self._file.seek(offset)
+            self._file.write(data)
+            self._end += len(data)
+        return offset, len(data)
+
+    def get(self, ref):
+        offset, length = ref
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        return zlib.decompress(data).decode('utf-8')
+
+    def close(self):
+        self._file.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_description_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DescriptionStore()
+        return _default_store
+
+
+def _encode_description(text, storage):
+    """Returns what JobRecord keeps for a description: str (plain), bytes (zlib) or a disk reference."""
+    if not isinstance(text, str) or len(text) < COMPRESS_MIN_CHARS or storage == 'plain':
+        return text
+    if storage == 'disk':
+        return default_description_store().put(text)
+    return zlib.compress(text.encode('utf-8'))
+
+
+def _decode_description(stored):
+    if isinstance(stored, bytes):
+        return zlib.decompress(stored).decode('utf-8')
+    if isinstance(stored, tuple):
+        return default_description_store().get(stored)
+    return stored
+
+
+class JobRecord(MutableMapping):
+    """
+    One job with dict-style access. Keys outside FIELDS go to a small per-record
+    dict, so callers can still attach extra columns. `storage` (default
+    DESCRIPTION_STORAGE) applies to every description the record is given.
+    """
+    __slots__ = FIELDS + ('_extra', '_storage')
+
+    def __init__(self, fields=(), storage=None, **kwargs):
+        for name in FIELDS:
+            setattr(self, name, _UNSET)
+        self._extra = None
+        self._storage = storage or DESCRIPTION_STORAGE
+        for key, value in dict(fields, **kwargs).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return _decode_description(value) if key == 'job_description' else value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key == 'job_description':
+                value = _encode_description(value, self._storage)
+            elif key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            if getattr(self, key) is _UNSET:
+                raise KeyError(key)
+            setattr(self, key, _UNSET)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for name in FIELDS:
+            if getattr(self, name) is not _UNSET:
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not _UNSET
+        return self._extra is not None and key in self._extra
+
+    def __repr__(self):
+        return f"JobRecord({self.get('job_title')!r}, {self.get('company_name')!r})"
+
+    def copy(self):
+        return JobRecord(self, storage=self._storage)
+
+    def __getstate__(self):
+        return dict(self)
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+
+_FIELD_SET = frozenset(FIELDS)
@@ -0,0 +1,34 @@
+# llm_constants.py
+# Prompt text and output patterns shared by the LLM code. This module must stay
+# free of Qt / torch / selenium imports so scoring logic can be imported cheaply.
+import re
+
+# --- LLM Constants ---
+SYSTEM_PROMPT_MATCHING = (
+    "You are a professional job matching assistant. Your task is to analyze a candidate's "
+    "Resume against a Job Description. Your assessment must focus on three key areas: "
+    "1. **Skills Similarity** "
+    "2. **Work Experience Relevance** "
+    "3. **Project/Portfolio Similarity** "
+    "Your response MUST start with the FINAL MATCH SCORE on a single line, followed by your analysis. "
+    "Use the following STRICT output format for the score: **SCORE: [Integer from 0 to 100]**\n"
+    "Example of the required first line: **SCORE: 75**\n"
+    "Do NOT include the percent sign (%)."
+)
+SYSTEM_PROMPT_TITLES = (
+    "You are an expert career counselor. Analyze the following resume text and "
+    "suggest 3 to 5 highly relevant, modern job titles the person is qualified for. "
+    "The output MUST be a comma-separated list of only the job titles, with no "
+    "other text, introduction, or explanation. "
+    "Example: Senior Software Engineer, Data Scientist, Solutions Architect"
+)
+SCORE_PATTERN = re.compile(r'SCORE:\s*(\d{1,3})')
+
+# Bump these whenever a prompt (or the preprocessing feeding it) changes, so the
+# on-disk title / score caches stop serving answers to the old prompt.
+TITLE_PROMPT_VERSION = 1
+MATCH_PROMPT_VERSION = 2    # 2: token budgets + boilerplate stripping
+
+# Llama-3 chat template markers used to build prompts and to cut the assistant
+# reply out of a pipeline's `generated_text`.
+ASSISTANT_HEADER = "<|start_header_id|>assistant<|end_header_id|>\n"
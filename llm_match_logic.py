@@ -1,54 +1,163 @@
 # llm_match_logic.py
-import random
-from utils_constants import SYSTEM_PROMPT_MATCHING, SCORE_PATTERN
+import time
+from llm_constants import SYSTEM_PROMPT_MATCHING, SCORE_PATTERN, MATCH_PROMPT_VERSION
+from inference_backends import get_backend, MATCH_BATCH_SIZE
+from text_preprocessing import prepare_match_inputs, approx_token_count
+from cache_store import DiskCache, content_hash
+from tracing import span, tracer
+from inference_log import inference_log
 
-def calculate_match_score(llm_generator, resume_text, job_desc):
+# Parsed match scores, keyed by backend/model, prompt version, resume hash and description hash.
+# Together with the title cache this lets a repeat session for the same resume skip inference.
+score_cache = DiskCache("scores")
+
+# Score used when the LLM call fails or its answer has no SCORE line. A fixed, middling
+# value keeps such jobs below the usual match thresholds (a random 50-99 used to let
+# them pass as good matches); every use is recorded in the inference log.
+FALLBACK_SCORE = 50
+
+def build_match_prompt(resume_text, job_desc, count_tokens=approx_token_count):
     """
-    Implements the real LLM matching logic. Instructs the LLM to focus on 
-    skills, experience, and project similarity to return a match score (0-100).
+    Builds the Llama-3 chat prompt that asks for a SCORE line plus analysis.
+    Both inputs are cut to token budgets and the job description is stripped of
+    boilerplate (see text_preprocessing) before they are inserted.
     """
-    
+    resume_text, job_desc = prepare_match_inputs(resume_text, job_desc, count_tokens)
     user_input = f"""
     --- RESUME ---
-    {resume_text[:4000]} 
+    {resume_text} 
 
     --- JOB DESCRIPTION ---
-    {job_desc[:4000]}
+    {job_desc}
     """
     
     # FULL PROMPT STRING (Matching your working Llama-like format)
-    full_prompt = (
+    return (
         f"<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n{SYSTEM_PROMPT_MATCHING}<|eot_id|>"
         f"<|start_header_id|>user<|end_header_id|>\n{user_input}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n"
     )
 
-    final_score = random.randint(50, 99) # Default to a random score if LLM fails
-    
+def score_cache_key(backend, resume_text, job_desc):
+    return (f"{backend.name}:{backend.model_id}:v{MATCH_PROMPT_VERSION}:"
+            f"{content_hash(resume_text)}:{content_hash(job_desc)}")
+
+def calculate_match_score(llm_generator, resume_text, job_desc, use_cache=True):
+    """
+    Implements the real LLM matching logic. Instructs the LLM to focus on 
+    skills, experience, and project similarity to return a match score (0-100).
+    Scores that were parsed from a real LLM answer are cached on disk.
+    """
+    with span('calculate_match_score') as trace_span:
+        return _calculate_match_score(llm_generator, resume_text, job_desc, use_cache, trace_span)
+
+def _calculate_match_score(llm_generator, resume_text, job_desc, use_cache, trace_span):
+    backend = get_backend(llm_generator)
+    key = score_cache_key(backend, resume_text, job_desc)
+    if use_cache:
+        cached_score = score_cache.get(key)
+        if cached_score is not None:
+            trace_span.set(cache_hit=True)
+            return cached_score
+
+    full_prompt = build_match_prompt(resume_text, job_desc, backend.count_tokens)
+    start = time.perf_counter()
     try:
-        # Call the generator object directly
-        llm_output = llm_generator(
+        # Any InferenceBackend (hf / cpu / fake) or a bare transformers pipeline
+        generated_text = backend.generate(
             full_prompt,
             max_new_tokens=256,
             do_sample=True,
-            temperature=0.7,
-            pad_token_id=llm_generator.tokenizer.eos_token_id 
+            temperature=0.7
         )
-        
-        # Extract the assistant's response part
-        generated_text = llm_output[0]["generated_text"].split("<|start_header_id|>assistant<|end_header_id|>\n")[-1].strip()
-        
-        print(f"\n--- LLM Response for Job Match ---\n{generated_text}\n---------------------------------\n")
-
-        # PARSE THE SCORE
-        match = SCORE_PATTERN.search(generated_text)
-        
-        if match:
-            parsed_score = int(match.group(1))
-            final_score = max(0, min(100, parsed_score)) # Clamp 0-100
-        else:
-            print("WARNING: Could not parse SCORE from LLM response. Using random fallback score.")
-            
     except Exception as e:
-        print(f"CRITICAL LLM INFERENCE ERROR during matching: {e}. Using random fallback score.")
-        
-    return final_score
\ No newline at end of file
+        print(f"CRITICAL LLM INFERENCE ERROR during matching: {e}. Using fallback score {FALLBACK_SCORE}.")
+        log_match(backend, full_prompt, None, time.perf_counter() - start, 'error', FALLBACK_SCORE, error=str(e))
+        return FALLBACK_SCORE
+
+    prefill_tokens, decode_tokens = count_match_tokens(backend, full_prompt, generated_text)
+    if tracer.enabled:
+        trace_span.set(prefill_tokens=prefill_tokens, decode_tokens=decode_tokens)
+    return parse_match_score(backend, full_prompt, generated_text, key, use_cache,
+                             time.perf_counter() - start, prefill_tokens, decode_tokens)
+
+def count_match_tokens(backend, prompt, generated_text):
+    """(prompt, output) token counts, only computed when the trace or the inference log wants them."""
+    if not (tracer.enabled or inference_log.enabled):
+        return None, None
+    return backend.count_tokens(prompt), backend.count_tokens(generated_text)
+
+def log_match(backend, prompt, generated_text, latency_s, parse_status, score,
+              prompt_tokens=None, output_tokens=None, **fields):
+    inference_log.log('match', backend, prompt, generated_text, latency_s, parse_status,
+                      fallback_used=parse_status != 'ok', prompt_tokens=prompt_tokens,
+                      output_tokens=output_tokens, score=score, prompt_version=MATCH_PROMPT_VERSION, **fields)
+
+def parse_match_score(backend, prompt, generated_text, key, use_cache, latency_s,
+                      prompt_tokens=None, output_tokens=None, **log_fields):
+    """
+    Parses the SCORE line of an LLM answer (caching it), or returns FALLBACK_SCORE.
+    Either way the call goes to the inference log with its raw output.
+    """
+    match = SCORE_PATTERN.search(generated_text)
+    if match:
+        final_score = max(0, min(100, int(match.group(1)))) # Clamp 0-100
+        if use_cache:
+            score_cache.set(key, final_score)
+        log_match(backend, prompt, generated_text, latency_s, 'ok', final_score,
+                  prompt_tokens, output_tokens, **log_fields)
+        return final_score
+
+    tracer.count('score_parse_failures')
+    print(f"WARNING: Could not parse SCORE from LLM response. Using fallback score {FALLBACK_SCORE}.")
+    log_match(backend, prompt, generated_text, latency_s, 'no_score', FALLBACK_SCORE,
+              prompt_tokens, output_tokens, **log_fields)
+    return FALLBACK_SCORE
+
+def calculate_match_scores(llm_generator, resume_text, job_descs, use_cache=True, batch_size=None):
+    """
+    Scores many job descriptions in one pass: cached scores are used as is, identical
+    descriptions are scored once, and the rest go to the backend's generate_batch()
+    in groups of `batch_size` (default MATCH_BATCH_SIZE). Returns the scores in order.
+    """
+    backend = get_backend(llm_generator)
+    batch_size = max(1, batch_size or MATCH_BATCH_SIZE)
+    scores = {}
+    to_score = {}   # description -> cache key
+    for job_desc in job_descs:
+        if job_desc in scores or job_desc in to_score:
+            continue
+        key = score_cache_key(backend, resume_text, job_desc)
+        cached_score = score_cache.get(key) if use_cache else None
+        if cached_score is not None:
+            scores[job_desc] = cached_score
+        else:
+            to_score[job_desc] = key
+
+    pending = list(to_score)
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        prompts = [build_match_prompt(resume_text, job_desc, backend.count_tokens) for job_desc in batch]
+        t0 = time.perf_counter()
+        with span('calculate_match_score', batch=len(batch)) as trace_span:
+            try:
+                replies = backend.generate_batch(prompts, max_new_tokens=256, do_sample=True, temperature=0.7)
+                error = None
+            except Exception as e:
+                print(f"CRITICAL LLM INFERENCE ERROR during batch matching: {e}. Using fallback score {FALLBACK_SCORE}.")
+                replies = [None] * len(batch)
+                error = str(e)
+            token_counts = [count_match_tokens(backend, prompt, reply) if reply is not None else (None, None)
+                            for prompt, reply in zip(prompts, replies)]
+            if tracer.enabled:
+                trace_span.set(prefill_tokens=sum(p or 0 for p, _ in token_counts),
+                               decode_tokens=sum(d or 0 for _, d in token_counts))
+        # The batch ran as one call: each entry is charged an equal share of its latency
+        latency_s = (time.perf_counter() - t0) / len(batch)
+        for job_desc, prompt, reply, (prompt_tokens, output_tokens) in zip(batch, prompts, replies, token_counts):
+            if reply is None:
+                scores[job_desc] = FALLBACK_SCORE
+                log_match(backend, prompt, None, latency_s, 'error', FALLBACK_SCORE, batch_size=len(batch), error=error)
+            else:
+                scores[job_desc] = parse_match_score(backend, prompt, reply, to_score[job_desc], use_cache, latency_s,
+                                                     prompt_tokens, output_tokens, batch_size=len(batch))
+    return [scores[job_desc] for job_desc in job_descs]
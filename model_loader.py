@@ -1,78 +1,107 @@
 # model_logic.py (Revised to use pdfplumber)
 
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline, BitsAndBytesConfig
-import pdfplumber  # <-- Using the library you provided
 import os
+import time
 
-# Set a persistent model ID (Using your working 3B model)
-MODEL_ID = "meta-llama/Llama-3.2-3B-Instruct" 
+from inference_backends import MODEL_ID, get_backend
+from model_manager import ManagedBackend, MODEL_IDLE_SECONDS
+from llm_constants import SYSTEM_PROMPT_TITLES, TITLE_PROMPT_VERSION
+from cache_store import DiskCache, content_hash
+from tracing import span, tracer
+from inference_log import inference_log
+from text_preprocessing import budget_text, approx_token_count, TITLE_RESUME_TOKENS
 
-# --- 1. Model Initialization (No Change Needed) ---
+# torch / transformers / pdfplumber are imported inside the functions that need
+# them, so importing this module (e.g. from the GUI) stays cheap until first use.
 
-def load_job_recommender():
+# Model replica processes for scoring (sharded_scoring.ShardedScorer, imported only when > 1)
+SCORING_REPLICAS = int(os.environ.get("JOBMATCHER_SCORING_REPLICAS", "1"))
+
+# Greedy decoding for titles by default, so the same resume always yields the same
+# search keywords (set JOBMATCHER_SAMPLE_TITLES=1 for the old sampled behaviour).
+DETERMINISTIC_TITLES = os.environ.get("JOBMATCHER_SAMPLE_TITLES", "0") != "1"
+
+# Generated titles, keyed by backend/model, prompt version and resume content hash
+title_cache = DiskCache("titles")
+
+# --- 1. Model Initialization ---
+
+def load_job_recommender(backend_name=None, idle_seconds=None):
     """
-    Loads the quantized Llama 3.2 3B model and returns the text generation pipeline.
+    Loads the inference backend selected by JOBMATCHER_BACKEND ('hf' = quantized
+    Llama 3.2 3B on GPU, 'cpu' = int8 CPU path, 'fake' = deterministic test backend).
     This function should only be called once when the application starts.
+
+    The backend is wrapped in a ManagedBackend: it is loaded now (so load errors
+    surface at startup), unloaded after `idle_seconds` without use (default
+    $JOBMATCHER_MODEL_IDLE_SECONDS) and reloaded on the next request.
+
+    With JOBMATCHER_SCORING_REPLICAS > 1 the model runs in that many replica
+    processes instead (sharded_scoring.ShardedScorer); they stay loaded until close().
     """
-    print("Initializing Job Recommender Model...")
-    
-    bnb_config = BitsAndBytesConfig(
-        load_in_4bit=True,
-        bnb_4bit_compute_dtype=torch.float16,
-    )
-    
-    # Use hf-cli login token (or replace None with your "hf_..." token if not logged in)
-    hf_token = os.environ.get("HF_TOKEN", None) 
-    
-    # Load Tokenizer & Model
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_ID, token=hf_token)
-    model = AutoModelForCausalLM.from_pretrained(
-        MODEL_ID,
-        quantization_config=bnb_config,
-        device_map="auto",
-        torch_dtype=torch.float16,
-        token=hf_token
-    )
-
-    # Create Pipeline
-    generator = pipeline(
-        "text-generation",
-        model=model,
-        tokenizer=tokenizer
-    )
-
-    print("Model loaded successfully! Ready for inference.")
-    return generator
-
-# --- 2. Inference Function (No Change Needed) ---
-
-def generate_job_titles(generator, resume_text):
+    if SCORING_REPLICAS > 1:
+        from sharded_scoring import ShardedScorer
+
+        scorer = ShardedScorer(backend_name, replicas=SCORING_REPLICAS)
+        scorer.start()
+        return scorer
+    manager = ManagedBackend(backend_name, idle_seconds=MODEL_IDLE_SECONDS if idle_seconds is None else idle_seconds)
+    manager.load()
+    return manager
+
+# --- 2. Inference Function ---
+
+def build_title_prompt(resume_text, count_tokens=approx_token_count):
+    """Builds the Llama-3 chat prompt that asks for job titles (resume cut to TITLE_RESUME_TOKENS)."""
+    resume_text = budget_text(resume_text, TITLE_RESUME_TOKENS, count_tokens)
+    return f"<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n{SYSTEM_PROMPT_TITLES}<|eot_id|><|start_header_id|>user<|end_header_id|>\n{resume_text}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n"
+
+def title_cache_key(backend, resume_text):
+    """Cache key for a resume's titles: backend + model + prompt version + resume hash."""
+    return f"{backend.name}:{backend.model_id}:v{TITLE_PROMPT_VERSION}:{content_hash(resume_text)}"
+
+def generate_job_titles(generator, resume_text, deterministic=None, use_cache=True, force_refresh=False):
     """
-    Uses the loaded pipeline to generate job recommendations from resume text.
-    Returns a list of job titles.
+    Uses the loaded backend (or a bare pipeline) to generate job recommendations
+    from resume text. Returns a list of job titles.
+
+    Results are memoized on disk per resume content hash; `force_refresh=True`
+    reruns inference and overwrites the cached titles.
     """
-    system_prompt = (
-        "You are an expert career counselor. Analyze the following resume text and "
-        "suggest 3 to 5 highly relevant, modern job titles the person is qualified for. "
-        "The output MUST be a comma-separated list of only the job titles, with no "
-        "other text, introduction, or explanation. "
-        "Example: Senior Software Engineer, Data Scientist, Solutions Architect"
-    )
-    
-    prompt = f"<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n{system_prompt}<|eot_id|><|start_header_id|>user<|end_header_id|>\n{resume_text}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n"
-
-    output = generator(
-        prompt,
-        max_new_tokens=100,
-        do_sample=True,
-        temperature=0.7,
-        pad_token_id=generator.tokenizer.eos_token_id 
-    )
-    
-    generated_text = output[0]["generated_text"].split("<|start_header_id|>assistant<|end_header_id|>\n")[-1].strip()
+    backend = get_backend(generator)
+    if deterministic is None:
+        deterministic = DETERMINISTIC_TITLES
+
+    key = title_cache_key(backend, resume_text)
+    if use_cache and not force_refresh:
+        cached_titles = title_cache.get(key)
+        if cached_titles:
+            print(f"Using cached job titles for this resume: {cached_titles}")
+            return cached_titles
+
+    prompt = build_title_prompt(resume_text, backend.count_tokens)
+    start = time.perf_counter()
+    with span('generate_job_titles') as trace_span:
+        generated_text = backend.generate(
+            prompt,
+            max_new_tokens=100,
+            do_sample=not deterministic,
+            temperature=0.7
+        )
+        latency_s = time.perf_counter() - start
+        prefill_tokens = decode_tokens = None
+        if tracer.enabled or inference_log.enabled:
+            prefill_tokens, decode_tokens = backend.count_tokens(prompt), backend.count_tokens(generated_text)
+        if tracer.enabled:
+            trace_span.set(prefill_tokens=prefill_tokens, decode_tokens=decode_tokens)
     
-    return [title.strip() for title in generated_text.split(',') if title.strip()]
+    titles = [title.strip() for title in generated_text.split(',') if title.strip()]
+    inference_log.log('titles', backend, prompt, generated_text, latency_s, 'ok' if titles else 'empty',
+                      fallback_used=False, prompt_tokens=prefill_tokens, output_tokens=decode_tokens,
+                      titles=len(titles), deterministic=deterministic)
+    if use_cache and titles:
+        title_cache.set(key, titles)
+    return titles
 
 # --- 3. PDF Extraction Utility (REVISED) ---
 
@@ -82,7 +111,9 @@ def extract_text_from_pdf(file_path):
     """
     if not file_path or not os.path.exists(file_path):
         return ""
-        
+
+    import pdfplumber  # <-- Using the library you provided
+
     text = ""
     try:
         with pdfplumber.open(file_path) as pdf:
@@ -96,39 +127,6 @@ def extract_text_from_pdf(file_path):
         print(f"Error extracting text from PDF with pdfplumber: {e}")
         return ""
 
-def calculate_match_score(llm_generator, resume_text, job_description):
-    """
-    Uses the LLM to calculate a compatibility score (0-100) between a resume and a job description.
-    """
-    
-    # Construct the prompt for the LLM
-    prompt = (
-        f"Analyze the following RESUME and JOB DESCRIPTION. Based ONLY on the skills, experience, and requirements mentioned, "
-        f"provide a numerical match score from 0 to 100 indicating compatibility. "
-        f"Output ONLY the score as a plain integer, nothing else.\n\n"
-        f"RESUME: {resume_text}\n\n"
-        f"JOB DESCRIPTION: {job_description}"
-    )
-    
-    try:
-        # Assume llm_generator.generate_text is your function to call the model
-        response = llm_generator.generate_text(prompt)
-        
-        # Clean the response to ensure we get a pure integer
-        score_str = "".join(filter(str.isdigit, response.strip()))
-        
-        if score_str:
-            score = int(score_str)
-            return min(100, max(0, score)) # Ensure score is between 0 and 100
-        else:
-            print(f"LLM returned non-score response: {response}")
-            return 0 # Default to 0 if the LLM fails to provide a clear score
-            
-    except Exception as e:
-        print(f"Error during match score generation: {e}")
-        return 0
-    
-    
 # If you run this file directly, it will test the model logic
 if __name__ == '__main__':
     # This block allows you to test the model loader directly
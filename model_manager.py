@@ -0,0 +1,201 @@
+# model_manager.py
+# Keeps the LLM loaded only while it is being used.
+#
+# load_job_recommender() used to return a backend that stayed resident for the
+# whole GUI session. ManagedBackend wraps the backend instead: it loads it on first
+# use, unloads it after JOBMATCHER_MODEL_IDLE_SECONDS without a generate() call
+# (default 600, 0 = never) and transparently reloads it on the next call. Reloads
+# are quick because the quantized weights come from the weight cache (weight_cache.py).
+#
+# Every load / unload is printed with its duration and the process' resident memory,
+# and kept in ManagedBackend.events for the benchmarks.
+import contextlib
+import gc
+import os
+import sys
+import threading
+import time
+
+from inference_backends import (InferenceBackend, MODEL_ID, DEFAULT_BACKEND, DRAFT_MODEL_ID, DRAFT_LOOKAHEAD,
+                                load_backend)
+from tracing import span, tracer
+
+MODEL_IDLE_SECONDS = float(os.environ.get("JOBMATCHER_MODEL_IDLE_SECONDS", "600"))
+
+
+def resident_memory_mb():
+    """Resident set size of this process in MB (None where it can't be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+
+
+def _format_mb(value):
+    return f"{value:.0f} MB" if value is not None else "n/a"
+
+
+def release_accelerator_memory():
+    """Returns freed CUDA blocks to the driver (only if torch is already loaded)."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ManagedBackend(InferenceBackend):
+    """
+    InferenceBackend that loads the real backend on demand and unloads it when idle.
+    Safe to use from several threads: an unload never happens during a generate().
+    """
+
+    def __init__(self, backend_name=None, model_id=MODEL_ID, draft_model_id=DRAFT_MODEL_ID,
+                 lookahead=DRAFT_LOOKAHEAD, idle_seconds=MODEL_IDLE_SECONDS):
+        self.backend_name = (backend_name or DEFAULT_BACKEND).lower()
+        # name / model_id are what the title and score caches key on; they must not need a load
+        self.name = self.backend_name
+        self.model_id = "fake" if self.backend_name == "fake" else model_id
+        self.draft_model_id = draft_model_id
+        self.lookahead = lookahead
+        self.idle_seconds = idle_seconds
+        # Each entry: {'event': 'load' | 'unload', 'seconds', 'rss_mb', 'source' / 'idle_s'}
+        self.events = []
+        self._backend = None
+        self._tokenizer = None
+        self._lock = threading.Condition()
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._watcher = None
+        self._closed = threading.Event()
+
+    @property
+    def loaded(self):
+        return self._backend is not None
+
+    @property
+    def backend(self):
+        """The underlying backend, loaded if necessary."""
+        with self._lock:
+            return self._load_locked()
+
+    def load(self):
+        """Loads the model now unless it is loaded. Returns the backend."""
+        return self.backend
+
+    def _load_locked(self):
+        if self._backend is not None:
+            return self._backend
+        start = time.perf_counter()
+        with span('model_load', backend=self.backend_name) as trace_span:
+            backend = load_backend(self.backend_name, self.model_id, self.draft_model_id, self.lookahead)
+            trace_span.set(source=backend.weights_source)
+        seconds = time.perf_counter() - start
+        rss = resident_memory_mb()
+        load_count = sum(1 for event in self.events if event['event'] == 'load')
+        self.events.append({'event': 'load', 'seconds': seconds, 'rss_mb': rss,
+                            'source': backend.weights_source, 'reload': load_count > 0})
+        tracer.count('model_loads')
+        print(f"Model {'re' if load_count else ''}loaded in {seconds:.1f}s "
+              f"(weights: {backend.weights_source or self.backend_name}); resident memory {_format_mb(rss)}")
+
+        self._backend = backend
+        self._tokenizer = getattr(backend, 'tokenizer', None)
+        self._last_used = time.monotonic()
+        if self.idle_seconds and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch_idle, name="model-idle-watcher", daemon=True)
+            self._watcher.start()
+        return backend
+
+    # --- InferenceBackend interface ---
+
+    @contextlib.contextmanager
+    def _in_use(self):
+        """Yields the loaded backend and keeps it from being unloaded until the block ends."""
+        with self._lock:
+            backend = self._load_locked()
+            self._active += 1
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.monotonic()
+                self._lock.notify_all()
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        with self._in_use() as backend:
+            return backend.generate(prompt, max_new_tokens=max_new_tokens, do_sample=do_sample,
+                                    temperature=temperature)
+
+    def generate_batch(self, prompts, max_new_tokens=256, do_sample=True, temperature=0.7):
+        with self._in_use() as backend:
+            return backend.generate_batch(prompts, max_new_tokens=max_new_tokens, do_sample=do_sample,
+                                          temperature=temperature)
+
+    def count_tokens(self, text):
+        # The tokenizer is small and survives unloads, so prompt budgeting never reloads the model
+        backend = self._backend
+        if backend is not None:
+            return backend.count_tokens(text)
+        if self._tokenizer is not None:
+            return len(self._tokenizer.encode(text, add_special_tokens=False))
+        return self.backend.count_tokens(text)
+
+    def enable_speculative(self, draft_model_id, lookahead=DRAFT_LOOKAHEAD):
+        with self._lock:
+            self.draft_model_id = draft_model_id
+            self.lookahead = lookahead
+            if self._backend is not None:
+                self._backend.enable_speculative(draft_model_id, lookahead)
+
+    # --- Unloading ---
+
+    def unload(self, reason="requested"):
+        """Drops the model (waits for running generate() calls). Returns True if one was loaded."""
+        with self._lock:
+            while self._active:
+                self._lock.wait()
+            return self._unload_locked(reason)
+
+    def _unload_locked(self, reason):
+        if self._backend is None:
+            return False
+        rss_before = resident_memory_mb()
+        start = time.perf_counter()
+        backend, self._backend = self._backend, None
+        if hasattr(backend, 'disable_speculative'):
+            backend.disable_speculative()
+        del backend
+        gc.collect()
+        release_accelerator_memory()
+        rss = resident_memory_mb()
+        self.events.append({'event': 'unload', 'seconds': time.perf_counter() - start, 'rss_mb': rss,
+                            'idle_s': time.monotonic() - self._last_used})
+        tracer.count('model_unloads')
+        print(f"Model unloaded ({reason}); resident memory {_format_mb(rss_before)} -> {_format_mb(rss)}")
+        return True
+
+    def _watch_idle(self):
+        poll = max(0.05, min(self.idle_seconds / 4, 30.0))
+        while not self._closed.wait(poll):
+            with self._lock:
+                idle = time.monotonic() - self._last_used
+                if self._backend is not None and not self._active and idle >= self.idle_seconds:
+                    self._unload_locked(f"idle for {idle:.0f}s")
+
+    def close(self):
+        """Unloads the model and stops the idle watcher."""
+        self._closed.set()
+        self.unload("closed")
+
+    def status(self):
+        """One-line state for the progress panel."""
+        state = "loaded" if self.loaded else "unloaded"
+        loads = [event for event in self.events if event['event'] == 'load']
+        last = f", last load {loads[-1]['seconds']:.1f}s" if loads else ""
+        return f"Model {state}{last}; resident memory {_format_mb(resident_memory_mb())}"
@@ -0,0 +1,124 @@
+# page_archive.py
+# Record / replay support for offline runs and benchmarks.
+#
+#   record: get_dom() stores every page_source it reads in a PageArchive
+#   replay: setup_driver() returns a ReplayDriver that serves the archived pages
+#           through the same driver interface (get / page_source / find_element / quit),
+#           so scrape_indeed_jobs runs unchanged with no network and no browser.
+#
+# Select the mode with JOBMATCHER_FIXTURE_MODE=record|replay and the archive
+# directory with JOBMATCHER_FIXTURE_DIR (default: ./fixtures/pages).
+import gzip
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE_MODE = os.environ.get("JOBMATCHER_FIXTURE_MODE", "").lower() or None
+FIXTURE_DIR = os.environ.get("JOBMATCHER_FIXTURE_DIR", os.path.join("fixtures", "pages"))
+
+
+class PageNotRecorded(Exception):
+    """Raised by ReplayDriver.get for a URL that is not in the archive."""
+
+
+class PageArchive:
+    """
+    Directory of gzipped page sources plus an index.json mapping URL -> file.
+    Safe to record from several threads at once.
+    """
+
+    def __init__(self, directory=FIXTURE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, "index.json")
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def record(self, url, page_source):
+        filename = hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".html.gz"
+        os.makedirs(self.directory, exist_ok=True)
+        with gzip.open(os.path.join(self.directory, filename), "wt", encoding="utf-8") as f:
+            f.write(page_source)
+        with self._lock:
+            self.index[url] = filename
+            tmp_path = self._index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=1)
+            os.replace(tmp_path, self._index_path)
+
+    def lookup(self, url):
+        """Returns the recorded page source for `url`, or None."""
+        filename = self.index.get(url)
+        if filename is None:
+            return None
+        with gzip.open(os.path.join(self.directory, filename), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def urls(self):
+        return list(self.index)
+
+    def searches(self):
+        """(keyword, location) pairs of the search result pages in the archive, in recording order."""
+        found = []
+        for url in self.index:
+            parsed = urlparse(url)
+            if parsed.path != "/jobs":
+                continue
+            query = parse_qs(parsed.query)
+            pair = (query.get("q", [""])[0], query.get("l", [""])[0])
+            if pair not in found:
+                found.append(pair)
+        return found
+
+
+class ReplayDriver:
+    """Minimal stand-in for the selenium driver that serves pages from a PageArchive."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.current_url = None
+        self.page_source = ""
+        self._dom = None
+
+    def get(self, url):
+        page_source = self.archive.lookup(url)
+        if page_source is None:
+            raise PageNotRecorded(url)
+        self.current_url = url
+        self.page_source = page_source
+        self._dom = None
+
+    def find_elements(self, by, value):
+        """Supports the By.ID / By.XPATH lookups that get_dom waits on."""
+        from lxml import etree as et
+
+        if self._dom is None:
+            self._dom = et.HTML(self.page_source or "<html></html>")
+        if by == "id":
+            return self._dom.xpath(f'//*[@id="{value}"]')
+        if by == "xpath":
+            return self._dom.xpath(value)
+        return []
+
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+
+        matches = self.find_elements(by, value)
+        if not matches:
+            raise NoSuchElementException(f"{by}={value}")
+        return matches[0]
+
+    def execute_script(self, script, *args):
+        return None
+
+    def quit(self):
+        self._dom = None
+
+
+def open_archive(directory=None):
+    return PageArchive(directory or FIXTURE_DIR)
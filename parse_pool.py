@@ -0,0 +1,110 @@
+# parse_pool.py
+# Worker processes for HTML parsing and extraction.
+#
+# BeautifulSoup + lxml + the XPath extractors take tens of milliseconds per real
+# Indeed page and hold the GIL while they run, so parsing on the scraping event loop
+# stalls the other fetches. ParsePool hands the raw page_source string to a process
+# pool instead; the worker runs scraper_logic.parse_search_page / parse_job_page and
+# sends back plain card dicts / description text (lxml trees can't be pickled).
+#
+# JOBMATCHER_PARSE_WORKERS sets the pool size. The default 0 parses in the calling
+# thread as before: on the committed fixture pages (`benchmarks.py parse-pool`) the
+# pool shortens event-loop stalls but parses fewer pages per second, so it stays
+# opt-in until it wins there. Workers are spawned on first use, import bs4 / lxml
+# once, and are shared by every scrape in the process.
+# With tracing on, the worker records the parser / extractor spans and sends them
+# back with the result, so the per-stage summary matches in-process parsing. If the
+# pool breaks (a worker crashed) the page is parsed in-process and the pool is
+# rebuilt next time.
+import atexit
+import os
+import threading
+import time
+
+from tracing import span, tracer
+
+PARSE_WORKERS = int(os.environ.get("JOBMATCHER_PARSE_WORKERS", "0"))
+
+
+def _warm_worker():
+    # Pay for the parser imports when the worker starts, not on its first page
+    import bs4, lxml.etree  # noqa: F401
+
+
+def _parse_traced(parser, page_source):
+    """Worker side with tracing on: returns (result, worker pid, spans relative to the call start)."""
+    tracer.enabled = True
+    tracer.reset()
+    start = time.perf_counter()
+    result = parser(page_source)
+    spans = [(s.name, s.start - start, s.duration, s.attrs) for s in tracer.spans]
+    tracer.reset()
+    return result, os.getpid(), spans
+
+
+class ParsePool:
+    """Runs page parsers in `workers` processes (0 = inline). Shared, thread-safe, lazily started."""
+
+    def __init__(self, workers=PARSE_WORKERS):
+        self.workers = max(0, workers)
+        self.pages = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _ensure_executor(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs browser / Qt threads is not safe
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_warm_worker)
+            return self._executor
+
+    def start(self):
+        """Starts the workers now (otherwise the first parse pays for it)."""
+        if self.workers:
+            executor = self._ensure_executor()
+            for future in [executor.submit(_warm_worker) for _ in range(self.workers)]:
+                future.result()
+
+    async def parse(self, parser, page_source):
+        """Returns parser(page_source), computed in a worker process when the pool has any."""
+        # Imported here so that importing parse_pool stays cheap (asyncio alone is ~50 ms)
+        import asyncio
+        from concurrent.futures.process import BrokenProcessPool
+
+        self.pages += 1
+        with span('parse_page', parser=parser.__name__, pooled=bool(self.workers)):
+            if not self.workers:
+                return parser(page_source)
+            executor = self._ensure_executor()
+            try:
+                loop = asyncio.get_running_loop()
+                if not tracer.enabled:
+                    return await loop.run_in_executor(executor, parser, page_source)
+                origin = time.perf_counter()
+                result, worker_pid, spans = await loop.run_in_executor(executor, _parse_traced, parser, page_source)
+                tracer.add_spans(spans, origin, thread_id=worker_pid)
+                return result
+            except BrokenProcessPool:
+                tracer.count('parse_pool_failures')
+                print("Parser worker process died; parsing this page in-process.")
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+                return parser(page_source)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Process-wide pool used by async_scraper
+parse_pool = ParsePool()
+atexit.register(parse_pool.close)
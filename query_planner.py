@@ -0,0 +1,133 @@
+# query_planner.py
+# Collapses the generated job titles into fewer search queries.
+#
+# Titles from generate_job_titles overlap heavily ("Senior Software Engineer",
+# "Software Engineer", "Software Developer"), and so do their search results.
+# plan_queries() groups titles whose results overlap and gives each group one query:
+#   - a title whose words contain another title's words is a narrower search, so it
+#     rides along with the broader title's query ("Senior Software Engineer" ->
+#     "Software Engineer");
+#   - other overlapping titles are merged into one boolean query:
+#     ("software engineer" OR "software developer").
+# Overlap is estimated from the job keys of cached search pages when both titles
+# have been searched before, and from the title words otherwise. Each query gets
+# max_pages plus, per merged title, the share of its postings the others don't cover.
+#
+# Planning is opt-in (JOBMATCHER_QUERY_PLANNING=1): titles folded into a broader one
+# are never searched themselves, and that only loses no postings when the broader
+# search really returns them, which has been checked on fixtures, not live results.
+# Records of a planned query keep the generated titles behind it (searched_job is
+# the query's first title, searched_titles all of them, search_query the query).
+import math
+import os
+import re
+from collections import namedtuple
+
+import scraper_logic
+from search_plan import SearchPlan
+
+QUERY_PLANNING = os.environ.get("JOBMATCHER_QUERY_PLANNING", "0") == "1"
+# Titles whose estimated result overlap reaches this are searched together
+MIN_MERGE_OVERLAP = 0.5
+# Longer OR queries get unreliable results
+MAX_TITLES_PER_QUERY = 3
+
+PlannedQuery = namedtuple('PlannedQuery', 'query titles pages')
+
+_WORD_PATTERN = re.compile(r"[a-z0-9+#.]+")
+
+
+def title_tokens(title):
+    return frozenset(_WORD_PATTERN.findall(title.lower()))
+
+
+def cached_job_keys(title, location, max_pages):
+    """Job keys on the cached search pages of a title (any age), or None if none are cached."""
+    keys = None
+    for page_no in range(0, max_pages * 10, 10):
+        key = scraper_logic.search_page_key(title, location, page_no)
+        cards = scraper_logic.search_page_cache.get(key, max_age=float('inf'))
+        if cards is None:
+            break
+        keys = (keys or set()) | {scraper_logic.job_desc_key(card) for card in cards}
+    return keys
+
+
+def estimate_overlap(title_a, title_b, location, max_pages=5):
+    """
+    Share of the smaller title's search results that the other title's search also
+    returns, measured on cached pages when both titles have some. Without cached
+    pages it falls back to the (more conservative) Jaccard overlap of the title words.
+    Returns (overlap, 'cache' | 'tokens').
+    """
+    keys_a = cached_job_keys(title_a, location, max_pages)
+    keys_b = cached_job_keys(title_b, location, max_pages) if keys_a else None
+    if keys_a and keys_b:
+        return len(keys_a & keys_b) / min(len(keys_a), len(keys_b)), 'cache'
+    tokens_a, tokens_b = title_tokens(title_a), title_tokens(title_b)
+    if not tokens_a or not tokens_b:
+        return 0.0, 'tokens'
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b), 'tokens'
+
+
+def plan_queries(titles, location, max_pages=5, min_overlap=MIN_MERGE_OVERLAP, max_titles=MAX_TITLES_PER_QUERY):
+    """
+    Groups `titles` into PlannedQuery(query, titles, pages) entries, in the order the
+    titles were given. Every title ends up in exactly one query.
+    """
+    unique = {}
+    for title in titles:
+        if title.strip():
+            unique.setdefault(title.strip().lower(), title.strip())
+    titles = list(unique.values())
+    tokens = {title: title_tokens(title) for title in titles}
+
+    # Broadest titles (fewest words) anchor the groups, so narrower variants fold into them
+    groups = []     # [anchor, [(title, overlap, subsumed), ...]]
+    for title in sorted(titles, key=lambda t: (len(tokens[t]), titles.index(t))):
+        best = None
+        for group in groups:
+            anchor, members = group
+            if len(members) + 1 >= max_titles:
+                continue
+            overlap, _ = estimate_overlap(anchor, title, location, max_pages)
+            subsumed = bool(tokens[anchor]) and tokens[anchor] <= tokens[title]
+            if (subsumed or overlap >= min_overlap) and (best is None or overlap > best[1]):
+                best = (group, overlap, subsumed)
+        if best is None:
+            groups.append([title, []])
+        else:
+            group, overlap, subsumed = best
+            group[1].append((title, overlap, subsumed))
+
+    queries = []
+    for anchor, members in sorted(groups, key=lambda g: titles.index(g[0])):
+        searched = [anchor] + [title for title, _, subsumed in members if not subsumed]
+        if len(searched) == 1:
+            query = anchor
+        else:
+            query = "(" + " OR ".join(f'"{title.lower()}"' for title in searched) + ")"
+        # Each merged title adds the share of its results the anchor's don't cover
+        extra = sum(1.0 - overlap for _, overlap, _ in members)
+        pages = min(max_pages * (1 + len(members)), math.ceil(max_pages * (1 + extra)))
+        queries.append(PlannedQuery(query, [anchor] + [title for title, _, _ in members], pages))
+    return queries
+
+
+def build_search_plan(titles, location, max_pages=5, adaptive=False, threshold=70, planning=None):
+    """
+    SearchPlan over the planned queries (or over the titles themselves when planning
+    is off: `planning` defaults to $JOBMATCHER_QUERY_PLANNING).
+    """
+    if planning is None:
+        planning = QUERY_PLANNING
+    if not planning:
+        return SearchPlan(titles, max_pages, adaptive=adaptive, threshold=threshold)
+
+    queries = plan_queries(titles, location, max_pages)
+    print(f"Query plan: {len(titles)} titles -> {len(queries)} searches")
+    for planned in queries:
+        print(f"   {planned.query}  [{', '.join(planned.titles)}]  up to {planned.pages} pages")
+    return SearchPlan([planned.query for planned in queries], max_pages, adaptive=adaptive, threshold=threshold,
+                      page_budget={planned.query: planned.pages for planned in queries},
+                      query_titles={planned.query: planned.titles for planned in queries})
@@ -1,17 +1,20 @@
 # scraper_logic.py (Save this as a new file)
 # scraper_logic.py (Revised and Complete)
 
-from bs4 import BeautifulSoup
-from lxml import etree as et
 import random
-import csv
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchWindowException, InvalidSessionIdException, TimeoutException
 import time
-import undetected_chromedriver as uc
 import os
+import threading
+
+from cache_store import DiskCache
+from tracing import span, traced, tracer
+import page_archive
+import browser_profile
+from page_archive import PageNotRecorded, ReplayDriver
+
+# selenium / undetected_chromedriver / bs4 / lxml are imported inside the functions
+# that use them: importing this module must not pay for a browser stack until a
+# scrape actually starts.
 
 # --- 1. CONFIGURATION: UPDATE THIS PATH ---
 CHROME_EXECUTABLE_PATH = "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe" 
@@ -24,10 +27,44 @@ paginaton_url = "https://www.indeed.com/jobs?q={}&l={}&start={}"
 # Global driver variable is now initialized to None
 driver = None 
 
+# --- SEARCH RESULT CACHE ---
+# Parsed job cards per (keyword, location, start) and full descriptions per job are
+# reused for SEARCH_CACHE_TTL seconds, so repeated / overlapping searches load no pages.
+SEARCH_CACHE_TTL = float(os.environ.get("JOBMATCHER_SEARCH_CACHE_TTL", 6 * 3600))
+search_page_cache = DiskCache("search_pages", ttl=SEARCH_CACHE_TTL)
+job_desc_cache = DiskCache("job_descriptions", ttl=SEARCH_CACHE_TTL)
+# Cache-only mode: serve searches only from these caches (any age) and never open a
+# browser. Not the same as fixture replay (JOBMATCHER_FIXTURE_MODE=replay, page_archive.py),
+# which serves recorded raw pages through a ReplayDriver and still parses them.
+CACHE_ONLY = os.environ.get("JOBMATCHER_CACHE_ONLY", "0") == "1"
+
+# Live browser navigations done by this process (cache hits don't count)
+page_loads = 0
+
+# Page fixture archive used in record / replay mode (see page_archive.py)
+fixture_archive = None
+
+def fixture_mode():
+    return page_archive.FIXTURE_MODE
+
+def get_fixture_archive():
+    global fixture_archive
+    if fixture_archive is None:
+        fixture_archive = page_archive.open_archive()
+    return fixture_archive
+
 # =====================================================================
 # --- DRIVER SETUP & RESTART FUNCTIONS ---
 # =====================================================================
 
+def polite_sleep(low, high):
+    """Random pause between browser actions (traced, so waits show up per run)."""
+    if fixture_mode() == 'replay':
+        return
+    with span('sleep'):
+        time.sleep(random.uniform(low, high))
+
+@traced('setup_driver')
 def setup_driver():
     global driver
     if driver:
@@ -36,31 +73,51 @@ def setup_driver():
             driver.quit()
         except:
             pass
+
+    driver = create_driver()
+    return driver
+
+@traced('create_driver')
+def create_driver():
+    """
+    Starts and warms up a new browser (or a ReplayDriver in fixture replay mode).
+    Returns None when Chrome cannot be started. Does not touch the global driver, so
+    the async scraper can run several of these side by side.
+    """
+    if fixture_mode() == 'replay':
+        # Offline: serve recorded pages, no browser and no warm-up wait
+        return ReplayDriver(get_fixture_archive())
         
-    print("Initializing Chrome Driver...")
+    import undetected_chromedriver as uc
+
+    profile = browser_profile.active_profile()
+    print(f"Initializing Chrome Driver ('{profile.name}' browser profile)...")
     
     options = uc.ChromeOptions()
     options.add_argument("--disable-blink-features=AutomationControlled")
-    # options.add_argument("--headless")
+    browser_profile.apply_to_options(options, profile)
     
     options.binary_location = CHROME_EXECUTABLE_PATH
 
     try:
-        driver = uc.Chrome(options=options) 
+        new_driver = uc.Chrome(options=options, headless=profile.headless) 
     except Exception as e:
         print(f"FATAL SETUP ERROR: Could not start the driver. Check your CHROME_EXECUTABLE_PATH. Error: {e}")
         return None
+    browser_profile.apply_to_driver(new_driver, profile)
 
-    driver.get("https://www.indeed.com/q-USA-jobs.html?vjk=823cd7ee3c203ac3")
+    new_driver.get("https://www.indeed.com/q-USA-jobs.html?vjk=823cd7ee3c203ac3")
     
     print("Waiting 15-25 seconds before starting search...")
-    time.sleep(random.uniform(15, 25))
+    polite_sleep(15, 25)
     
     print("Driver started successfully.")
-    return driver
+    return new_driver
 
+@traced('restart_driver')
 def restart_driver():
     global driver
+    tracer.count('driver_restarts')
     print("\nAttempting to restart driver session...")
     try:
         driver.quit()
@@ -68,71 +125,134 @@ def restart_driver():
         print(f"Error during driver quit: {e}")
     
     driver = None
-    time.sleep(random.uniform(5, 10))
+    polite_sleep(5, 10)
     driver = setup_driver()
     return driver 
 
-# --- GET DOM FUNCTION ---
-def get_dom(url, is_job_page=False):
-    global driver
-    
-    if driver is None:
-        print("Driver is None. Cannot load page.")
-        return None
-        
+# --- PAGE LOADING ---
+# load_page_source() outcomes after which the driver should be restarted
+RESTART_STATUSES = ('session_lost', 'load_error', 'timeout', 'wait_error')
+
+_page_loads_lock = threading.Lock()
+
+def count_page_load():
+    """Counts one live page load (called from the browser and HTTP fetcher threads)."""
+    global page_loads
+    with _page_loads_lock:
+        page_loads += 1
+
+def load_page_source(drv, url, is_job_page=False):
+    """
+    Navigates `drv` to `url` and waits for the job cards (search page) or the
+    description (job page). Returns (page_source, status): status is 'ok' or one of
+    'not_recorded', 'empty' and RESTART_STATUSES, in which case page_source is None.
+    Works on any driver, so it is safe to call from worker threads. Live loads are
+    recorded per browser profile (time to the awaited element, bytes transferred).
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import NoSuchWindowException, InvalidSessionIdException, TimeoutException
+
+    profile = browser_profile.active_profile()
+    start = time.perf_counter()
     # Try to navigate and handle fatal session errors
     try:
-        driver.get(url)
+        with span('get_dom.navigate', job_page=is_job_page):
+            drv.get(url)
+    except PageNotRecorded:
+        print(f"REPLAY: {url} is not in the fixture archive.")
+        return None, 'not_recorded'
     except (NoSuchWindowException, InvalidSessionIdException) as e:
-        print(f"FATAL ERROR: Driver session lost while loading {url}. Restarting driver...")
-        driver = restart_driver()
-        if driver is None:
-            print("Restart failed. Giving up on this page.")
-            return None
-            
-        # Retry the get operation after restart
-        try:
-            driver.get(url)
-        except Exception as restart_e:
-            print(f"Restart failed for {url}. Giving up on this page. Error: {restart_e}")
-            return None
+        print(f"FATAL ERROR: Driver session lost while loading {url}.")
+        return None, 'session_lost'
     except Exception as e:
         print(f"Error during driver.get: {e}")
-        # Force a restart on a general error
-        print("ACTION: Forcing driver restart due to general load error.") 
-        driver = restart_driver()
-        return None
+        return None, 'load_error'
+
+    count_page_load()
 
     # Element waiting based on page type
     try:
-        if is_job_page:
-            WebDriverWait(driver, 15).until( 
-                EC.presence_of_element_located((By.ID, 'jobDescriptionText'))
-            )
-        else:
-            WebDriverWait(driver, 20).until( 
-                EC.presence_of_element_located((By.XPATH, '//a[starts-with(@id, "sj_")]'))
-            )
+        with span('get_dom.wait', job_page=is_job_page):
+            if is_job_page:
+                WebDriverWait(drv, 15, poll_frequency=profile.wait_poll).until( 
+                    EC.presence_of_element_located((By.ID, 'jobDescriptionText'))
+                )
+            else:
+                WebDriverWait(drv, 20, poll_frequency=profile.wait_poll).until( 
+                    EC.presence_of_element_located((By.XPATH, '//a[starts-with(@id, "sj_")]'))
+                )
     except TimeoutException:
+        tracer.count('wait_timeouts')
         print(f"FAILURE: Element not found on page {url} within timeout (20s).") 
-        print("ACTION: Forcing driver restart due to suspected block.") 
-        driver = restart_driver() 
-        return None
+        return None, 'timeout'
     except Exception as e:
         print(f"FAILURE: Page {url} failed to load properly. Error: {e}")
-        print("ACTION: Forcing driver restart due to general wait error.") 
-        driver = restart_driver() 
-        return None
+        return None, 'wait_error'
+    
+    seconds = time.perf_counter() - start
     
-    page_content = driver.page_source
+    page_content = drv.page_source
     if not page_content:
+        return None, 'empty'
+
+    if fixture_mode() != 'replay':
+        transfer = browser_profile.measure_transfer(drv)
+        browser_profile.record_page_load(profile, seconds, transfer, is_job_page)
+        if transfer:
+            tracer.count('page_bytes', transfer.get('bytes') or 0)
+
+    if fixture_mode() == 'record':
+        get_fixture_archive().record(url, page_content)
+    return page_content, 'ok'
+
+# --- GET DOM FUNCTION ---
+@traced('get_dom')
+def get_dom(url, is_job_page=False):
+    global driver
+    
+    if driver is None:
+        print("Driver is None. Cannot load page.")
+        return None
+
+    page_content, status = load_page_source(driver, url, is_job_page)
+
+    if status == 'session_lost':
+        print("Restarting driver...")
+        driver = restart_driver()
+        if driver is None:
+            print("Restart failed. Giving up on this page.")
+            return None
+        # Retry once after restart
+        page_content, status = load_page_source(driver, url, is_job_page)
+
+    if status in RESTART_STATUSES:
+        # A failed load or a missing element usually means a block: start a fresh session
+        print("ACTION: Forcing driver restart due to suspected block or load error.") 
+        driver = restart_driver() 
+        return None
+    if page_content is None:
         return None
     
+    return parse_html(page_content)
+
+@traced('get_dom.parse')
+def parse_html(page_content):
+    """Normalizes the page with BeautifulSoup and returns an lxml DOM for the XPath extractors."""
+    from bs4 import BeautifulSoup
+    from lxml import etree as et
+
     product_soup = BeautifulSoup(page_content, 'html.parser')
-    dom = et.HTML(str(product_soup))
-    return dom
+    return et.HTML(str(product_soup))
 
 # --- NEW FUNCTION FOR FULL DESCRIPTION (WITH ERROR HANDLING) ---
+# Descriptions that mean the page could not be read (or a job has none); these are
+# never cached and never scored
+FAILED_DESCRIPTIONS = ("Full Description Failed to Load (Blocked)", "Full Description Error",
+                       "CRITICAL FETCH ERROR", "NO DESCRIPTION")
+
+@traced('get_full_job_desc')
 def get_full_job_desc(full_url):
     print(f"   -> Navigating to job page: {full_url}")
     
@@ -140,7 +260,10 @@ def get_full_job_desc(full_url):
     
     if job_dom is None:
         return "Full Description Failed to Load (Blocked)"
-        
+    return extract_job_description(job_dom)
+
+def extract_job_description(job_dom):
+    """Description text of a parsed job page."""
     try:
         # Extract all inner HTML/text content from the stable ID
         description_elements = job_dom.xpath('//div[@id="jobDescriptionText"]//text()')
@@ -158,6 +281,15 @@ def get_full_job_desc(full_url):
 
 
 # --- DATA EXTRACTION FUNCTIONS ---
+@traced('extract.get_job_key')
+def get_job_key(job):
+    """Stable id of a job card (the anchor id), used as cache / dedupe key."""
+    try:
+        return job.xpath('.//a[starts-with(@id, "sj_")]/@id')[0]
+    except:
+        return 'Not available'
+
+@traced('extract.get_job_link')
 def get_job_link(job):
     try:
         job_link = job.xpath('.//a[starts-with(@id, "sj_")]/@href')[0]
@@ -165,6 +297,7 @@ def get_job_link(job):
         job_link = 'Not available'
     return job_link
 
+@traced('extract.get_job_title')
 def get_job_title(job):
     try:
         job_title = job.xpath('.//a[starts-with(@id, "sj_")]/span/@title')[0]
@@ -172,6 +305,7 @@ def get_job_title(job):
         job_title = 'Not available'
     return job_title
 
+@traced('extract.get_company_name')
 def get_company_name(job):
     try:
         company_name = job.xpath('.//span[contains(@class, "companyName")]/text()')[0]
@@ -179,6 +313,7 @@ def get_company_name(job):
         company_name = 'Not available'
     return company_name
 
+@traced('extract.get_company_location')
 def get_company_location(job):
     try:
         # XPath to find the location span
@@ -188,6 +323,7 @@ def get_company_location(job):
     except:
         return 'Not available'
 
+@traced('extract.get_salary')
 def get_salary(job):
     try:
         salary_elements = job.xpath('.//div[contains(@class, "salary-snippet")]//text()')
@@ -199,6 +335,7 @@ def get_salary(job):
         salary = 'Not available'
     return salary
 
+@traced('extract.get_job_type')
 def get_job_type(job):
     try:
         job_type = job.xpath('.//div[contains(@class, "metadata") and not(contains(@class, "salary"))]/div/text()')[0]
@@ -206,6 +343,7 @@ def get_job_type(job):
         job_type = 'Not available'
     return job_type
 
+@traced('extract.get_rating')
 def get_rating(job):
     try:
         # XPath to find the rating span
@@ -214,131 +352,97 @@ def get_rating(job):
     except:
         return 'Not available'
 
+# =====================================================================
+# --- CACHED PAGE LOADING ---
+# =====================================================================
+
+class DriverUnavailable(Exception):
+    """Raised when a page has to be loaded live but Chrome could not be started."""
+
+@traced('parse_job_cards')
+def parse_job_cards(search_dom):
+    """Extracts the search-card fields of every job card on a results page."""
+    cards = []
+    for job in search_dom.xpath('//a[starts-with(@id, "sj_")]/ancestor::li'):
+        job_link_partial = get_job_link(job)
+        if job_link_partial == 'Not available':
+            continue
+        cards.append({
+            'job_link': base_url + job_link_partial,
+            'job_title': get_job_title(job),
+            'company_name': get_company_name(job),
+            'company_location': get_company_location(job),
+            'salary': get_salary(job),
+            'job_type': get_job_type(job),
+            'rating': get_rating(job),
+            'job_key': get_job_key(job),
+        })
+    return cards
+
+# Top-level (picklable) page parsers: page_source in, plain data out. parse_pool runs
+# them in worker processes, so they must not touch the driver or the caches.
+def parse_search_page(page_source):
+    """Card dicts of a search results page."""
+    return parse_job_cards(parse_html(page_source))
+
+def parse_job_page(page_source):
+    """Description text of a job page."""
+    return extract_job_description(parse_html(page_source))
+
+def search_page_key(job_keyword, location_keyword, page_no, radius=None):
+    key = f"{job_keyword.strip().lower()}|{location_keyword.strip().lower()}|{page_no}"
+    return f"{key}|r{radius}" if radius else key
+
+def parse_locations(location_text):
+    """Splits the location field ("San Diego, CA; Seattle, WA; Remote") into a de-duplicated list."""
+    locations = {}
+    for location in location_text.split(';'):
+        location = " ".join(location.split())
+        if location:
+            locations.setdefault(location.lower(), location)
+    return list(locations.values())
+
+def job_desc_key(card):
+    return card['job_key'] if card.get('job_key', 'Not available') != 'Not available' else card['job_link']
+
+def cache_stats():
+    """Search / description cache counters plus live page loads, for progress reports."""
+    return {
+        'search_pages': dict(search_page_cache.stats),
+        'job_descriptions': dict(job_desc_cache.stats),
+        'page_loads': page_loads,
+        'page_load_profiles': browser_profile.page_load_summary(),
+    }
+
 # =====================================================================
 # --- MAIN SCRAPER FUNCTION (Callable) ---
 # =====================================================================
-def scrape_indeed_jobs(job_keywords, location_keyword, max_jobs=10, max_pages=5, stop_checker=None):
+def scrape_indeed_jobs(job_keywords, location_keyword, max_jobs=10, max_pages=5, stop_checker=None,
+                       max_age=None, cache_only=None, concurrency=None, plan=None, on_record=None, radius=None,
+                       location_stats=None, card_filter=None):
     """
-    Initializes the driver, scrapes Indeed for the given job titles and location, 
-    and then quits the driver. Stops when max_jobs is reached.
+    Scrapes Indeed for the given job titles and location and quits the browsers when
+    done. Stops when max_jobs is reached. Search pages and descriptions come from the
+    cache when they are younger than `max_age` seconds (default SEARCH_CACHE_TTL); a
+    browser is only started for the first cache miss. `cache_only=True` serves entirely
+    from the cache and never opens a browser (default: $JOBMATCHER_CACHE_ONLY).
+
+    Blocking wrapper around async_scraper.scrape_indeed_jobs_async, which fetches the
+    job pages of each search page concurrently (`concurrency` browsers, default
+    $JOBMATCHER_SCRAPE_CONCURRENCY). `plan`, `on_record`, `radius`, `location_stats` and
+    `card_filter` are passed through (see scrape_indeed_jobs_async). `location_keyword` may also be a
+    list of locations, searched side by side on the same browsers.
     """
-    global driver
-    
-    # --- DRIVER INITIALIZATION MOVED HERE ---
-    driver = setup_driver()
-    if driver is None:
-        return [] # Return empty list if setup fails
-    
-    job_records = []
-    
-    print(f"Starting Scrape for Titles: {job_keywords} in Location: {location_keyword}")
+    import asyncio
+    from async_scraper import scrape_indeed_jobs_async
 
+    job_records = []
     try:
-        for job_keyword in job_keywords:
-            if (stop_checker and stop_checker()) or len(job_records) >= max_jobs: # CHECK 1
-                print("Stop signal received before loading new job type.")
-                break
-                
-            # Use max_pages * 10 for the start index in the loop (start at page 0, then 10, 20, ...)
-            # Max pages is a safety limit now, max_jobs is the primary limit
-            for page_no in range(0, max_pages * 10, 10): 
-                
-                if (stop_checker and stop_checker()) or len(job_records) >= max_jobs: # CHECK 2
-                    print("Stop signal received before loading new page.")
-                    break
-                    
-                # Format keywords for URL (replacing space with +)
-                formatted_job = job_keyword.replace(' ', '+')
-                formatted_location = location_keyword.replace(' ', '+')
-                
-                url = paginaton_url.format(formatted_job, formatted_location, page_no)
-                
-                print(f"\n--- Loading Search Page {page_no//10 + 1} for {job_keyword} in {location_keyword} ---")
-                
-                # get_dom is a blocking operation
-                search_dom = get_dom(url)
-                
-                if search_dom is None:
-                    print(f"Skipping search URL {url} due to block or load failure. Moving to next search combination.")
-                    break 
-                
-                jobs = search_dom.xpath('//a[starts-with(@id, "sj_")]/ancestor::li')
-                
-                if not jobs:
-                    print("Warning: No job cards found. Assuming end of results.")
-                    time.sleep(random.uniform(10, 20)) 
-                    break 
-                
-                jobs_scraped_on_page = 0
-                
-                for job in jobs:
-                    
-                    if (stop_checker and stop_checker()) or len(job_records) >= max_jobs: # CHECK 3
-                        print("Stop signal received while processing job cards on page.")
-                        break
-
-                    job_link_partial = get_job_link(job)
-                    if job_link_partial == 'Not available':
-                        continue 
-                    
-                    full_job_url = base_url + job_link_partial
-                    
-                    try:
-                        # get_full_job_desc is a blocking operation
-                        full_description = get_full_job_desc(full_job_url)
-                    except Exception as e:
-                        print(f"   -> CRITICAL ERROR fetching description for {full_job_url}: {e}. Skipping this job.")
-                        full_description = "CRITICAL FETCH ERROR"
-
-                    record = {
-                        'job_link': full_job_url, 
-                        'job_title': get_job_title(job), 
-                        'company_name': get_company_name(job), 
-                        'company_location': get_company_location(job), 
-                        'salary': get_salary(job), 
-                        'job_type': get_job_type(job), 
-                        'rating': get_rating(job), 
-                        'job_description': full_description, 
-                        'searched_job': job_keyword, 
-                        'searched_location': location_keyword
-                    }
-                    job_records.append(record)
-                    jobs_scraped_on_page += 1
-                    
-                    time.sleep(random.uniform(3, 7)) 
-
-                    # --- NEW CODE: Check the job limit after adding a job ---
-                    if len(job_records) >= max_jobs:
-                        print(f"Goal reached! Scraped {len(job_records)} jobs. Stopping search immediately.")
-                        break # Exits the 'for job in jobs:' loop
-                    # --------------------------------------------------------
-
-                # If we broke out of the inner job loop due to stop or limit, break the page loop too
-                if (stop_checker and stop_checker()) or len(job_records) >= max_jobs:
-                    break
-                    
-                print(f"Processed {jobs_scraped_on_page} jobs from page {page_no//10 + 1}. Total scraped: {len(job_records)}")
-                
-                time.sleep(random.uniform(10, 20)) 
-
-            # If we broke out of the page loop due to stop or limit, break the keyword loop too
-            if (stop_checker and stop_checker()) or len(job_records) >= max_jobs:
-                break
-
-        print(f"Finished search for {job_keywords} in {location_keyword}. Total Jobs: {len(job_records)}")
-        return job_records
-
+        asyncio.run(scrape_indeed_jobs_async(
+            job_keywords, location_keyword, max_jobs=max_jobs, max_pages=max_pages,
+            stop_checker=stop_checker, max_age=max_age, cache_only=cache_only, concurrency=concurrency,
+            job_records=job_records, plan=plan, on_record=on_record, radius=radius,
+            location_stats=location_stats, card_filter=card_filter))
     except KeyboardInterrupt:
         print("\n\n*** Scraping manually interrupted by user (Ctrl+C). ***")
-        return job_records
-    
-    finally:
-        # Crucial: Close the browser when the scraping thread finishes
-        if driver:
-              print("\nShutting down WebDriver after scraping completion...")
-              try:
-                  driver.quit()
-              except Exception as e:
-                  print(f"Error during final driver quit: {e}")
-              time.sleep(2) 
-              driver = None
\ No newline at end of file
+    return job_records
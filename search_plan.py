@@ -0,0 +1,129 @@
+# search_plan.py
+# Which search page to load next, and when a goal-driven search should stop.
+#
+#   SearchPlan   - hands out (keyword, page_no) queries. Sequential by default
+#                  (every page of the first keyword, then the next keyword: the
+#                  original scrape order). Adaptive plans give every keyword its
+#                  first page, then keep going with the keyword whose jobs have
+#                  scored best so far.
+#   ScrapeBudget - live page loads / wall-clock seconds a search may spend.
+#
+# Scores arrive from the scoring thread while the scraper is still running, so
+# both classes are thread-safe.
+import os
+import threading
+import time
+
+# Default budget of a goal-driven search ("find N matches >= threshold")
+GOAL_MAX_FETCHES = int(os.environ.get("JOBMATCHER_GOAL_MAX_FETCHES", "60"))
+GOAL_MAX_SECONDS = float(os.environ.get("JOBMATCHER_GOAL_MAX_SECONDS", "900"))
+# Hard cap on the jobs one goal-driven search scrapes (cached jobs cost no page loads)
+GOAL_MAX_JOBS = 200
+
+
+class SearchPlan:
+    """
+    Query order for one search. `threshold` is the score that counts as a match
+    when ranking keywords in adaptive mode; `page_budget` overrides max_pages per
+    keyword and `query_titles` lists the generated titles a keyword searches for
+    (see query_planner; default: each keyword is its own title).
+    """
+
+    def __init__(self, keywords, max_pages=5, adaptive=False, threshold=70, page_budget=None, query_titles=None):
+        self.keywords = list(dict.fromkeys(keywords))
+        self.max_pages = max_pages
+        self.adaptive = adaptive
+        self.threshold = threshold
+        self.page_budget = {keyword: (page_budget or {}).get(keyword, max_pages) for keyword in self.keywords}
+        self.query_titles = {keyword: tuple((query_titles or {}).get(keyword, (keyword,))) for keyword in self.keywords}
+        self.stats = {keyword: {'pages': 0, 'scored': 0, 'matches': 0, 'done': False}
+                      for keyword in self.keywords}
+        # Per generated title, for the summary (a merged query's jobs count for each of its titles)
+        self.title_stats = {title: {'scored': 0, 'matches': 0}
+                            for titles in self.query_titles.values() for title in titles}
+        self._lock = threading.Lock()
+
+    def titles_for(self, keyword):
+        """The generated titles `keyword` searches for."""
+        return self.query_titles.get(keyword, (keyword,))
+
+    def next_query(self):
+        """Returns the next (keyword, page_no) to load, or None when every keyword is done."""
+        with self._lock:
+            open_keywords = [k for k in self.keywords
+                             if not self.stats[k]['done'] and self.stats[k]['pages'] < self.page_budget[k]]
+            if not open_keywords:
+                return None
+            keyword = open_keywords[0]
+            if self.adaptive:
+                unexplored = [k for k in open_keywords if self.stats[k]['pages'] == 0]
+                if unexplored:
+                    keyword = unexplored[0]
+                else:
+                    # Highest match rate wins; earlier keywords win ties
+                    keyword = max(open_keywords, key=lambda k: (self._priority(k), -self.keywords.index(k)))
+            self.stats[keyword]['pages'] += 1
+            return keyword, (self.stats[keyword]['pages'] - 1) * 10
+
+    def _priority(self, keyword):
+        """Posterior mean match rate under a uniform prior: (matches + 1) / (scored + 2)."""
+        stats = self.stats[keyword]
+        return (stats['matches'] + 1) / (stats['scored'] + 2)
+
+    def finish_keyword(self, keyword):
+        """No more pages for this keyword (end of results or a failed load)."""
+        with self._lock:
+            if keyword in self.stats:
+                self.stats[keyword]['done'] = True
+
+    def record_score(self, keyword, score, titles=None):
+        """Counts a scored job of `keyword` (the query) for it and for its `titles` (default: the query's)."""
+        with self._lock:
+            if keyword in self.stats:
+                self.stats[keyword]['scored'] += 1
+                self.stats[keyword]['matches'] += score >= self.threshold
+            for title in titles or self.titles_for(keyword):
+                if title in self.title_stats:
+                    self.title_stats[title]['scored'] += 1
+                    self.title_stats[title]['matches'] += score >= self.threshold
+
+    def summary(self):
+        """One line per keyword: pages loaded, jobs scored and matches (per title for merged queries)."""
+        with self._lock:
+            lines = []
+            for keyword, stats in self.stats.items():
+                lines.append(f"{keyword}: {stats['pages']} pages, {stats['matches']}/{stats['scored']} matches")
+                titles = self.query_titles[keyword]
+                if titles != (keyword,):
+                    lines.extend(f"   {title}: {self.title_stats[title]['matches']}/"
+                                 f"{self.title_stats[title]['scored']} matches" for title in titles)
+            return "\n".join(lines)
+
+
+class ScrapeBudget:
+    """Live page loads and seconds a search may spend; None means unlimited."""
+
+    def __init__(self, max_fetches=GOAL_MAX_FETCHES, max_seconds=GOAL_MAX_SECONDS):
+        import scraper_logic
+
+        self.max_fetches = max_fetches
+        self.max_seconds = max_seconds
+        self._scraper_logic = scraper_logic
+        self._start_loads = scraper_logic.page_loads
+        self._start_time = time.monotonic()
+
+    @property
+    def fetches(self):
+        return self._scraper_logic.page_loads - self._start_loads
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._start_time
+
+    def exhausted(self):
+        """Returns why the budget ran out ('fetches' / 'time'), or None."""
+        if self.max_fetches is not None and self.fetches >= self.max_fetches:
+            return 'fetches'
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return 'time'
+        return None
@@ -0,0 +1,132 @@
+# search_service.py
+# Long-lived background service that runs search and scoring tasks one after another.
+#
+# The GUI used to start a new ScraperWorker thread per search, which also started
+# (and quit) a fresh set of browsers every time. SearchService is one QThread for
+# the whole session: tasks (scraper_worker.ScraperWorker / ScoringTask) are queued
+# by priority (lower first, FIFO within a priority) and run back to back on a
+# shared ScraperSession, so the browsers, the scraping event loop and the loaded
+# model stay warm between tasks. Each task keeps its own progress / result / error
+# / finished signals and can be cancelled on its own, queued or running.
+import itertools
+import queue
+import threading
+
+from PySide6.QtCore import QThread, Signal
+
+from async_scraper import ScraperSession
+
+HIGH_PRIORITY = 0
+NORMAL_PRIORITY = 10
+LOW_PRIORITY = 20
+
+
+class SearchService(QThread):
+    """Priority queue of WorkerTasks served by one persistent thread."""
+
+    task_started = Signal(object)       # the WorkerTask
+    task_finished = Signal(object)      # the WorkerTask (done or cancelled)
+    queue_changed = Signal(int)         # tasks waiting (not counting the running one)
+
+    def __init__(self, concurrency=None, parent=None):
+        super().__init__(parent)
+        self.session = ScraperSession(concurrency)
+        self.current_task = None
+        self.completed = 0
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._shutting_down = False
+
+    def submit(self, task, priority=NORMAL_PRIORITY):
+        """Queues `task` and returns it; the service thread is started on the first submit."""
+        if self._shutting_down:
+            raise RuntimeError("SearchService is shut down")
+        task.priority = priority
+        task.state = 'queued'
+        task.scrape = self.session.scrape
+        with self._lock:
+            self._pending.append(task)
+            waiting = len(self._pending)
+        self._queue.put((priority, next(self._order), task))
+        self.queue_changed.emit(waiting)
+        if not self.isRunning():
+            self.start()
+        return task
+
+    def pending_tasks(self):
+        """Queued tasks in the order they will run."""
+        with self._lock:
+            return sorted(self._pending, key=lambda task: task.priority)
+
+    def cancel(self, task):
+        """Stops a running task, or makes a queued one finish without running."""
+        task.stop()
+
+    def cancel_current(self):
+        task = self.current_task
+        if task is not None:
+            self.cancel(task)
+        return task
+
+    def cancel_all(self):
+        for task in self.pending_tasks():
+            self.cancel(task)
+        self.cancel_current()
+
+    def run(self):
+        while True:
+            _, _, task = self._queue.get()
+            if task is None:
+                break
+            with self._lock:
+                if task in self._pending:
+                    self._pending.remove(task)
+                waiting = len(self._pending)
+            self.queue_changed.emit(waiting)
+            if task.cancelled:
+                task.state = 'cancelled'
+            else:
+                self._run_task(task)
+            task.finished.emit()
+            self.task_finished.emit(task)
+        # Only reached on shutdown: the thread that used the browsers quits them
+        self.session.close()
+
+    def _run_task(self, task):
+        self.current_task = task
+        task.state = 'running'
+        self.task_started.emit(task)
+        try:
+            task.run()
+        except Exception as e:
+            task.error.emit(f"Unexpected error in {task.describe()}: {e}")
+            print(f"TERMINAL DEBUG: Unexpected error in {task.describe()}: {e}")
+        finally:
+            task.state = 'cancelled' if task.cancelled else 'done'
+            self.completed += 1
+            self.current_task = None
+
+    def shutdown(self, wait_ms=30000):
+        """
+        Cancels every task and stops the thread, which quits the browsers on its way
+        out. Queued tasks still emit finished. A task that does not stop within
+        `wait_ms` keeps its session; the thread closes it once the task returns.
+        """
+        self._shutting_down = True
+        self.cancel_all()
+        # Sorts before every task, so the thread exits right after the running one
+        self._queue.put((float('-inf'), next(self._order), None))
+        if not self.isRunning():
+            self.session.close()
+        elif not self.wait(wait_ms):
+            task = self.current_task
+            print(f"TERMINAL DEBUG: {task.describe() if task else 'A task'} is still running after "
+                  f"{wait_ms / 1000:g}s; its browsers close when it returns.")
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for task in pending:
+            task.state = 'cancelled'
+            task.finished.emit()
+            self.task_finished.emit(task)
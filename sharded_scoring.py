@@ -0,0 +1,319 @@
+# sharded_scoring.py
+# Data-parallel scoring: K model replicas in separate processes.
+#
+# One backend scores prompts one batch at a time, however many cores or GPUs the
+# machine has. ShardedScorer is an InferenceBackend that starts K replica processes
+# instead, each loading its own copy of the model pinned to one GPU (hf backend) or
+# to its own slice of the CPU cores with a matching torch thread count (cpu backend).
+#
+# The parent is a central dispatcher: generate_batch() cuts the prompts into chunks
+# of `chunk_size` and keeps them on a backlog. Each replica is sent at most PREFETCH
+# chunks and the dispatcher sends it the next one from the backlog as soon as it
+# returns one (replicas never take work from each other), so a fast replica is
+# simply sent more chunks. Replies are put back in prompt order. Every replica talks to the parent over its own pipe, so a replica
+# that crashes (or is killed) mid-message can't wedge the others: its chunks go back
+# on the backlog. A chunk whose replica raised is retried (up to MAX_ATTEMPTS);
+# prompts that can't be scored come back as None, which calculate_match_scores turns
+# into a logged fallback.
+#
+# JOBMATCHER_SCORING_REPLICAS=K turns it on for the app (default 1 = one in-process
+# backend); JOBMATCHER_SCORING_DEVICES=0,1 picks the GPUs for the hf backend.
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from inference_backends import InferenceBackend, MODEL_ID, DEFAULT_BACKEND, MATCH_BATCH_SIZE, FakeBackend
+
+SCORING_REPLICAS = int(os.environ.get("JOBMATCHER_SCORING_REPLICAS", "1"))
+SCORING_DEVICES = os.environ.get("JOBMATCHER_SCORING_DEVICES", "")
+
+MAX_ATTEMPTS = 2
+# Chunks queued per replica: one running, one ready so the replica never waits on the parent
+PREFETCH = 2
+# Seconds without any reply after which the outstanding chunks are given up
+TASK_TIMEOUT = 900
+_POLL_SECONDS = 0.5
+
+
+def _accelerator_ids(backend_name):
+    if SCORING_DEVICES:
+        return [int(device) for device in SCORING_DEVICES.split(',') if device.strip()]
+    if backend_name != 'hf':
+        return []
+    import torch
+    return list(range(torch.cuda.device_count()))
+
+
+def replica_placements(replicas, backend_name):
+    """
+    Where each replica runs: {'device': GPU index or None, 'cpus': [core ids], 'threads': n}.
+    GPUs are shared round-robin when there are fewer than replicas; CPU cores are
+    split into disjoint slices.
+    """
+    devices = _accelerator_ids(backend_name)
+    try:
+        cores = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = list(range(os.cpu_count() or 1))
+    per_replica = max(1, len(cores) // replicas)
+    placements = []
+    for index in range(replicas):
+        cpus = cores[index * per_replica:(index + 1) * per_replica] or cores
+        placements.append({'device': devices[index % len(devices)] if devices else None,
+                           'cpus': cpus, 'threads': len(cpus)})
+    return placements
+
+
+def _replica_main(replica_id, backend_name, model_id, placement, conn):
+    """Replica process: pin, load the backend, then serve chunks from `conn` until the None sentinel."""
+    if placement['device'] is not None:
+        os.environ['CUDA_VISIBLE_DEVICES'] = str(placement['device'])
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, placement['cpus'])
+    os.environ['OMP_NUM_THREADS'] = str(placement['threads'])
+
+    import inference_backends
+    inference_backends.CPU_THREADS = placement['threads']
+    try:
+        backend = inference_backends.load_backend(backend_name, model_id)
+    except Exception as e:
+        conn.send(('load_failed', repr(e)))
+        return
+    conn.send(('ready', backend.weights_source))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, prompts, kwargs = task
+        start = time.perf_counter()
+        try:
+            replies = backend.generate_batch(prompts, **kwargs)
+        except Exception as e:
+            conn.send(('failed', task_id, repr(e)))
+            continue
+        conn.send(('done', task_id, replies, time.perf_counter() - start))
+
+
+class ShardedScorer(InferenceBackend):
+    """InferenceBackend backed by `replicas` model processes, fed chunk by chunk."""
+
+    def __init__(self, backend_name=None, model_id=MODEL_ID, replicas=SCORING_REPLICAS, chunk_size=None,
+                 load_timeout=TASK_TIMEOUT):
+        self.backend_name = (backend_name or DEFAULT_BACKEND).lower()
+        # Same cache keys as the single backend, so cached titles / scores carry over
+        self.name = self.backend_name
+        self.model_id = "fake" if self.backend_name == "fake" else model_id
+        self.replicas = max(1, replicas)
+        self.chunk_size = max(1, chunk_size or MATCH_BATCH_SIZE)
+        self.load_timeout = load_timeout
+        self.weights_source = None
+        self.placements = []
+        self.processes = {}
+        # Per replica: {'state': 'loading' | 'ready' | 'failed' | 'dead' | 'stopped', 'prompts', 'busy_s', 'errors'}
+        self.replica_stats = {}
+        self._conns = {}
+        # Task ids keep increasing across calls, so a late reply to an abandoned call is recognizable
+        self._task_ids = itertools.count()
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    # --- Lifecycle ---
+
+    @property
+    def loaded(self):
+        return any(stats['state'] == 'ready' for stats in self.replica_stats.values())
+
+    def start(self):
+        """Starts the replicas and waits until each is loaded or has failed. Returns the number ready."""
+        if self.processes:
+            return self._count('ready')
+        context = multiprocessing.get_context('spawn')
+        self.placements = replica_placements(self.replicas, self.backend_name)
+        print(f"Starting {self.replicas} '{self.backend_name}' scoring replicas: "
+              + "; ".join(f"#{index} " + (f"GPU {p['device']}" if p['device'] is not None else
+                                          f"CPUs {p['cpus'][0]}-{p['cpus'][-1]}")
+                          for index, p in enumerate(self.placements)))
+        start = time.perf_counter()
+        for replica_id, placement in enumerate(self.placements):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_replica_main, name=f"scoring-replica-{replica_id}", daemon=True,
+                                      args=(replica_id, self.backend_name, self.model_id, placement, child_conn))
+            process.start()
+            # Only the child keeps its end open, so the parent sees EOF when the replica dies
+            child_conn.close()
+            self.processes[replica_id] = process
+            self._conns[replica_id] = parent_conn
+            self.replica_stats[replica_id] = {'state': 'loading', 'prompts': 0, 'busy_s': 0.0, 'errors': 0}
+
+        deadline = time.monotonic() + self.load_timeout
+        while self._count('loading') and time.monotonic() < deadline:
+            loading = [self._conns[r] for r, stats in self.replica_stats.items() if stats['state'] == 'loading']
+            for conn in wait(loading, timeout=_POLL_SECONDS):
+                replica_id = self._replica_of(conn)
+                message = self._receive(replica_id)
+                if message is None:
+                    continue
+                if message[0] == 'ready':
+                    self.replica_stats[replica_id]['state'] = 'ready'
+                    self.weights_source = message[1]
+                else:
+                    self.replica_stats[replica_id]['state'] = 'failed'
+                    print(f"Scoring replica #{replica_id} could not load the model: {message[1]}")
+        ready = self._count('ready')
+        print(f"{ready}/{self.replicas} scoring replicas ready in {time.perf_counter() - start:.1f}s")
+        if not ready:
+            self.close()
+            raise RuntimeError(f"No scoring replica of the '{self.backend_name}' backend could be started.")
+        return ready
+
+    def close(self):
+        """Stops the replica processes."""
+        for replica_id, conn in self._conns.items():
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for replica_id, process in self.processes.items():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+            self._conns[replica_id].close()
+            if self.replica_stats[replica_id]['state'] in ('loading', 'ready'):
+                self.replica_stats[replica_id]['state'] = 'stopped'
+        self.processes = {}
+        self._conns = {}
+
+    def status(self):
+        """One-line state for the progress panel."""
+        done = ", ".join(f"#{replica_id}: {stats['prompts']}" for replica_id, stats in self.replica_stats.items())
+        return (f"{self._count('ready')}/{self.replicas} '{self.backend_name}' scoring replicas ready "
+                f"(prompts scored {done})")
+
+    # --- InferenceBackend interface ---
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        [reply] = self.generate_batch([prompt], max_new_tokens=max_new_tokens, do_sample=do_sample,
+                                      temperature=temperature)
+        if reply is None:
+            raise RuntimeError("Every scoring replica failed on this prompt.")
+        return reply
+
+    def generate_batch(self, prompts, max_new_tokens=256, do_sample=True, temperature=0.7):
+        """Replies in prompt order; None for prompts no replica could score."""
+        kwargs = {'max_new_tokens': max_new_tokens, 'do_sample': do_sample, 'temperature': temperature}
+        replies = [None] * len(prompts)
+        with self._lock:
+            self.start()
+            # task_id -> [offset, prompts, attempts]
+            chunks = {next(self._task_ids): [offset, prompts[offset:offset + self.chunk_size], 1]
+                      for offset in range(0, len(prompts), self.chunk_size)}
+            backlog = deque(chunks)
+            assigned = {replica_id: deque() for replica_id, stats in self.replica_stats.items()
+                        if stats['state'] == 'ready'}
+
+            last_progress = time.monotonic()
+            while chunks:
+                self._dispatch(backlog, assigned, chunks, kwargs)
+                if not assigned:
+                    print(f"No scoring replica left; {sum(len(c[1]) for c in chunks.values())} prompts unscored.")
+                    break
+                if time.monotonic() - last_progress > TASK_TIMEOUT:
+                    print(f"Scoring replicas gave up on {sum(len(c[1]) for c in chunks.values())} prompts; "
+                          f"restarting them.")
+                    # The stuck replicas would still answer this call's chunks: replace them
+                    self.close()
+                    break
+                for conn in wait([self._conns[replica_id] for replica_id in assigned], timeout=_POLL_SECONDS):
+                    replica_id = self._replica_of(conn)
+                    message = self._receive(replica_id)
+                    if message is None:
+                        self._requeue(assigned.pop(replica_id), backlog, chunks)
+                        continue
+                    task_id = message[1]
+                    if task_id not in assigned[replica_id]:
+                        continue    # a reply to an earlier, abandoned call
+                    assigned[replica_id].remove(task_id)
+                    stats = self.replica_stats[replica_id]
+                    if message[0] == 'done':
+                        _, _, chunk_replies, seconds = message
+                        offset, chunk, _ = chunks.pop(task_id)
+                        replies[offset:offset + len(chunk)] = chunk_replies
+                        stats['prompts'] += len(chunk)
+                        stats['busy_s'] += seconds
+                        last_progress = time.monotonic()
+                    else:
+                        stats['errors'] += 1
+                        print(f"Scoring replica #{replica_id} failed on a chunk: {message[2]}")
+                        self._requeue([task_id], backlog, chunks)
+        return replies
+
+    def count_tokens(self, text):
+        # Prompt budgeting happens in this process: only the tokenizer is loaded here
+        if self._tokenizer is None:
+            if self.backend_name == 'fake':
+                self._tokenizer = FakeBackend()
+            else:
+                from transformers import AutoTokenizer
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_id, token=os.environ.get("HF_TOKEN"))
+        if isinstance(self._tokenizer, FakeBackend):
+            return self._tokenizer.count_tokens(text)
+        return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+    # --- Replica bookkeeping ---
+
+    def _count(self, state):
+        return sum(1 for stats in self.replica_stats.values() if stats['state'] == state)
+
+    def _replica_of(self, conn):
+        return next(replica_id for replica_id, c in self._conns.items() if c is conn)
+
+    def _receive(self, replica_id):
+        """Next message from a replica, or None (and the replica marked dead) if its process is gone."""
+        try:
+            return self._conns[replica_id].recv()
+        except (EOFError, OSError):
+            self._mark_dead(replica_id)
+            return None
+
+    def _mark_dead(self, replica_id):
+        process = self.processes[replica_id]
+        process.join(timeout=1)
+        self.replica_stats[replica_id]['state'] = 'dead'
+        print(f"Scoring replica #{replica_id} exited (code {process.exitcode}); "
+              f"{self._count('ready')} replicas left.")
+
+    def _dispatch(self, backlog, assigned, chunks, kwargs):
+        """Tops the live replicas up to PREFETCH chunks each from the backlog, one chunk per replica per round."""
+        for _ in range(PREFETCH):
+            for replica_id in list(assigned):
+                if not backlog or len(assigned[replica_id]) >= PREFETCH:
+                    continue
+                task_id = backlog.popleft()
+                try:
+                    self._conns[replica_id].send((task_id, chunks[task_id][1], kwargs))
+                except OSError:
+                    backlog.appendleft(task_id)
+                    self._mark_dead(replica_id)
+                    self._requeue(assigned.pop(replica_id), backlog, chunks)
+                    continue
+                assigned[replica_id].append(task_id)
+
+    def _requeue(self, task_ids, backlog, chunks):
+        """Puts chunks back at the front of the backlog, dropping those out of attempts."""
+        for task_id in reversed(task_ids):
+            offset, chunk, attempts = chunks[task_id]
+            if attempts >= MAX_ATTEMPTS:
+                del chunks[task_id]
+                print(f"Giving up on prompts {offset + 1}-{offset + len(chunk)} after {MAX_ATTEMPTS} attempts.")
+                continue
+            chunks[task_id][2] += 1
+            backlog.appendleft(task_id)
@@ -0,0 +1,276 @@
+# skill_index.py
+# Skill vocabulary, and an inverted index of the skills in stored job descriptions.
+#
+# The LLM score is the only fit signal, and it costs seconds per job. The skill index
+# is a cheap, explainable one. extract_skills() maps a text onto a fixed vocabulary
+# of normalized skills (aliases such as "k8s", "nodejs" or "amazon web services"
+# collapse onto one skill) and extract_years() reads the years of experience it asks
+# for or states. SkillIndex stores every job as a row of a sparse job x skill matrix;
+# its columns are the per-skill posting lists. features() scores all stored jobs
+# against a resume at once, by summing the posting lists of the resume's skills:
+#
+#   overlap          skills the job and the resume share
+#   job_coverage     share of the job's skills the resume has
+#   resume_coverage  share of the resume's skills the job asks for
+#   years_gap        years of experience the job asks for beyond the resume's
+#   skill_score      0-100: job_coverage, minus YEARS_PENALTY per missing year
+#
+# ScraperWorker scores jobs best skill_score first, ranks equal LLM scores by it and,
+# with JOBMATCHER_SKILL_CUTOFF (or Skill cutoff in the GUI; default 0 = off), skips
+# the LLM for jobs below it. Jobs without any known skill are never skipped.
+# numpy / scipy are imported on first use.
+import os
+import re
+
+SKILL_CUTOFF = int(os.environ.get("JOBMATCHER_SKILL_CUTOFF", "0"))
+
+# skill_score points lost per year of experience the resume is short
+YEARS_PENALTY = 10
+# Larger numbers are company ages ("over 40 years of experience"), not requirements
+MAX_YEARS = 20
+
+# Normalized skill -> lowercase aliases (single tokens or space-separated phrases).
+# Words that are mostly prose are only matched in unambiguous forms ("rest api", not
+# "rest"; "spring boot", not "spring"); product names that are also ordinary English
+# words only count when capitalized, see CAPITALIZED_ALIASES.
+SKILLS = {
+    # Languages
+    'Python': ('python', 'python3'),
+    'Java': ('java',),
+    'JavaScript': ('javascript', 'js', 'es6', 'ecmascript'),
+    'TypeScript': ('typescript',),
+    'C++': ('c++', 'cpp'),
+    'C#': ('c#', 'csharp'),
+    'Go': ('golang',),
+    'Rust': ('rust',),
+    'Ruby': ('ruby',),
+    'PHP': ('php',),
+    'Kotlin': ('kotlin',),
+    'Swift': ('swift',),
+    'Scala': ('scala',),
+    'SQL': ('sql', 't-sql', 'pl/sql'),
+    'Bash': ('bash', 'shell scripting'),
+    # Front end
+    'Angular': ('angular', 'angularjs', 'angular.js'),
+    'React': ('react', 'reactjs', 'react.js', 'react native'),
+    'Vue': ('vue', 'vuejs', 'vue.js'),
+    'Redux': ('redux',),
+    'HTML': ('html', 'html5'),
+    'CSS': ('css', 'css3', 'sass', 'scss'),
+    'jQuery': ('jquery',),
+    # Back end
+    'Node.js': ('node', 'nodejs', 'node.js'),
+    'Express': ('express.js', 'expressjs'),
+    'Django': ('django',),
+    'Flask': ('flask',),
+    'FastAPI': ('fastapi',),
+    'Spring': ('spring boot', 'spring framework', 'spring mvc'),
+    '.NET': ('.net', 'asp.net', 'dotnet', '.net core'),
+    'Ruby on Rails': ('rails', 'ruby on rails'),
+    'GraphQL': ('graphql',),
+    'REST APIs': ('rest api', 'rest apis', 'restful', 'rest services'),
+    'Microservices': ('microservices', 'microservice'),
+    # Data stores and pipelines
+    'PostgreSQL': ('postgresql', 'postgres'),
+    'MySQL': ('mysql',),
+    'MongoDB': ('mongodb', 'mongo'),
+    'Redis': ('redis',),
+    'Elasticsearch': ('elasticsearch',),
+    'DynamoDB': ('dynamodb',),
+    'Snowflake': ('snowflake',),
+    'Kafka': ('kafka',),
+    'Spark': ('spark', 'pyspark'),
+    # Cloud and DevOps
+    'AWS': ('aws', 'amazon web services'),
+    'Azure': ('azure',),
+    'GCP': ('gcp', 'google cloud'),
+    'Docker': ('docker',),
+    'Kubernetes': ('kubernetes', 'k8s'),
+    'Terraform': ('terraform',),
+    'CI/CD': ('ci/cd', 'cicd', 'continuous integration', 'continuous delivery'),
+    'Jenkins': ('jenkins',),
+    'Git': ('git', 'github', 'gitlab'),
+    'Linux': ('linux',),
+    # Machine learning
+    'Machine Learning': ('machine learning', 'ml'),
+    'PyTorch': ('pytorch',),
+    'TensorFlow': ('tensorflow',),
+    'Pandas': ('pandas',),
+    # Practices and testing
+    'Agile': ('agile', 'scrum'),
+    'Jest': ('jest',),
+    'Selenium': ('selenium',),
+}
+
+# "React", "Swift", "Spark", "Rails", "ML": the skill; "react quickly", "swift
+# response", "spark ideas", "guard rails", "500 ml": prose
+CAPITALIZED_ALIASES = frozenset({'react', 'swift', 'rust', 'spark', 'node', 'rails', 'ml', 'agile'})
+
+ALIASES = {alias: skill for skill, aliases in SKILLS.items() for alias in aliases}
+# First words of the multi-word aliases, and the longest phrase length
+_PHRASE_STARTS = frozenset(alias.split()[0] for alias in ALIASES if ' ' in alias)
+_MAX_PHRASE_WORDS = max(len(alias.split()) for alias in ALIASES)
+
+# Keeps "node.js", "c++", "c#", "ci/cd", "t-sql" and ".net" as one token
+_TOKEN_PATTERN = re.compile(r"\.net\b|[a-z0-9+#]+(?:[./-][a-z0-9+#]+)*", re.IGNORECASE)
+_COMPOUND_SPLIT = re.compile(r"[./-]")
+# "5+ years of experience", "3-5 yrs professional software experience", "2 to 4 years' experience"
+_YEARS_PATTERN = re.compile(
+    r"\b(\d{1,2})\s*\+?\s*(?:(?:-|–|to)\s*\d{1,2}\s*\+?\s*)?(?:years?|yrs?)\b'?"
+    r"(?:\s+of)?(?:\s+[\w/+#.-]+){0,3}?\s+(?:experience|exp)\b", re.IGNORECASE)
+
+
+def _alias_skill(word):
+    """The skill `word` (as written) names, or None."""
+    alias = word.lower()
+    if alias in CAPITALIZED_ALIASES and not word[:1].isupper():
+        return None
+    return ALIASES.get(alias)
+
+
+def extract_skills(text):
+    """Normalized skills (keys of SKILLS) mentioned in `text`."""
+    words = _TOKEN_PATTERN.findall(text or '')
+    tokens = [word.lower() for word in words]
+    found = set()
+    for i, token in enumerate(tokens):
+        if token in _PHRASE_STARTS:
+            for length in range(_MAX_PHRASE_WORDS, 1, -1):
+                skill = ALIASES.get(' '.join(tokens[i:i + length]))
+                if skill:
+                    found.add(skill)
+                    break
+        if token in ALIASES:
+            skill = _alias_skill(words[i])
+            if skill:
+                found.add(skill)
+        elif not token.isalnum():
+            # "python/django", "full-stack", "react.js." split into their parts
+            for part in _COMPOUND_SPLIT.split(words[i]):
+                skill = _alias_skill(part)
+                if skill:
+                    found.add(skill)
+    return found
+
+
+def extract_years(text):
+    """Most years of experience `text` mentions (a job's requirement, a resume's claim), or 0."""
+    years = [int(match.group(1)) for match in _YEARS_PATTERN.finditer(text or '')]
+    return max((value for value in years if value <= MAX_YEARS), default=0)
+
+
+def ranking_key(job):
+    """Sort key for result lists: LLM score, then skill score for ties."""
+    return job.get('match_score') or 0, job.get('skill_score') or 0
+
+
+def _numeric():
+    import numpy
+    from scipy import sparse
+    return numpy, sparse
+
+
+class SkillIndex:
+    """Sparse job x skill matrix over stored jobs, scored against a resume in one pass."""
+
+    def __init__(self, vocabulary=SKILLS):
+        self.skills = list(vocabulary)      # column order
+        self._column = {skill: column for column, skill in enumerate(self.skills)}
+        self.jobs = []
+        # CSR parts, appended to as jobs are added
+        self._indices = []
+        self._indptr = [0]
+        self._years = []
+        self._matrix = None
+        self._postings = None
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def add(self, job):
+        """Indexes one job (a JobRecord or dict with a job_description). Returns its row."""
+        description = job.get('job_description') or ''
+        self._indices.extend(sorted(self._column[skill] for skill in extract_skills(description)
+                                   if skill in self._column))
+        self._indptr.append(len(self._indices))
+        self._years.append(extract_years(description))
+        self.jobs.append(job)
+        self._matrix = self._postings = None
+        return len(self.jobs) - 1
+
+    def add_jobs(self, jobs):
+        for job in jobs:
+            self.add(job)
+
+    @property
+    def matrix(self):
+        """The job x skill matrix (CSR, float32 ones), rebuilt after jobs were added."""
+        if self._matrix is None:
+            numpy, sparse = _numeric()
+            indices = numpy.asarray(self._indices, dtype=numpy.int32)
+            self._matrix = sparse.csr_matrix(
+                (numpy.ones(len(indices), dtype=numpy.float32), indices, numpy.asarray(self._indptr, dtype=numpy.int64)),
+                shape=(len(self.jobs), len(self.skills)))
+            self._postings = None
+        return self._matrix
+
+    @property
+    def postings(self):
+        """The same matrix in CSC form: column j lists the rows of the jobs asking for skill j."""
+        if self._postings is None:
+            self._postings = self.matrix.tocsc()
+        return self._postings
+
+    def jobs_with(self, skill):
+        """Rows of the stored jobs that mention `skill`."""
+        postings = self.postings
+        column = self._column[skill]
+        return postings.indices[postings.indptr[column]:postings.indptr[column + 1]]
+
+    def job_skills(self, row):
+        return [self.skills[column] for column in self._indices[self._indptr[row]:self._indptr[row + 1]]]
+
+    def features(self, resume_text, rows=None):
+        """
+        Feature arrays, one entry per stored job (see the module header), or per row in
+        `rows` (e.g. the jobs just added), plus 'skill_count' (known skills per job),
+        'resume_skills' and 'resume_years'.
+        """
+        numpy, sparse = _numeric()
+        resume_skills = extract_skills(resume_text) & self._column.keys()
+        resume_years = extract_years(resume_text)
+        columns = sorted(self._column[skill] for skill in resume_skills)
+
+        if rows is None:
+            # Sum of the resume skills' posting lists = skills each job shares with the resume
+            overlap = numpy.asarray(self.postings[:, columns].sum(axis=1), dtype=numpy.float32).ravel()
+            skill_count = numpy.diff(self.matrix.indptr).astype(numpy.float32)
+            years = numpy.asarray(self._years, dtype=numpy.float32)
+        else:
+            # Only these rows: a small CSR built from their slices, no rebuild of the whole index
+            subset = self._rows_matrix(rows)
+            resume_vector = numpy.zeros(len(self.skills), dtype=numpy.float32)
+            resume_vector[columns] = 1
+            overlap = subset @ resume_vector
+            skill_count = numpy.diff(subset.indptr).astype(numpy.float32)
+            years = numpy.asarray([self._years[row] for row in rows], dtype=numpy.float32)
+        job_coverage = numpy.divide(overlap, skill_count, out=numpy.zeros_like(overlap), where=skill_count > 0)
+        resume_coverage = overlap / max(1, len(columns))
+        if resume_years:
+            years_gap = numpy.maximum(years - resume_years, 0)
+        else:
+            years_gap = numpy.zeros_like(years)   # can't tell: no penalty
+        skill_score = numpy.clip(numpy.rint(100 * job_coverage) - YEARS_PENALTY * years_gap, 0, 100).astype(numpy.int32)
+        return {'overlap': overlap, 'job_coverage': job_coverage, 'resume_coverage': resume_coverage,
+                'years_gap': years_gap, 'skill_score': skill_score, 'skill_count': skill_count,
+                'resume_skills': resume_skills, 'resume_years': resume_years}
+
+    def _rows_matrix(self, rows):
+        numpy, sparse = _numeric()
+        indices = []
+        indptr = [0]
+        for row in rows:
+            indices.extend(self._indices[self._indptr[row]:self._indptr[row + 1]])
+            indptr.append(len(indices))
+        return sparse.csr_matrix((numpy.ones(len(indices), dtype=numpy.float32), numpy.asarray(indices, dtype=numpy.int32),
+                                  numpy.asarray(indptr, dtype=numpy.int64)), shape=(len(rows), len(self.skills)))
@@ -0,0 +1,21 @@
+# The app modules live at the repository root, next to main_app.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def scraper_state(monkeypatch):
+    """Restores the scraper's caches, fixture mode and driver after benchmarks' use_* helpers swap them."""
+    import llm_match_logic
+    import page_archive
+    import scraper_logic
+
+    for module, names in ((scraper_logic, ('search_page_cache', 'job_desc_cache', 'fixture_archive', 'driver')),
+                          (llm_match_logic, ('score_cache',)),
+                          (page_archive, ('FIXTURE_MODE',))):
+        for name in names:
+            monkeypatch.setattr(module, name, getattr(module, name))
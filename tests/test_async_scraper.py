@@ -0,0 +1,93 @@
+# The async scraping core against a local http.server copy of a small fixture site.
+import asyncio
+
+import pytest
+
+pytest.importorskip('lxml')
+
+import async_scraper
+import scraper_logic
+from async_scraper import HttpFetcher, RateLimiter, scrape_locations_async, search_url
+from benchmarks import serve_fixture_site, use_scratch_caches
+from page_archive import PageArchive
+
+KEYWORD = 'Software Engineer'
+# The remote posting shows up in both locations
+RESULTS = {'San Diego, CA': ['sd1', 'sd2', 'remote1'], 'Remote': ['remote1', 'rm2']}
+
+
+def search_page(keys, location):
+    items = ''.join(
+        f'<li><div class="job"><a id="sj_{key}" href="/rc/clk?jk={key}">'
+        f'<span title="{KEYWORD} {key}">{KEYWORD} {key}</span></a>'
+        f'<span class="companyName">Company {key}</span>'
+        f'<div class="companyLocation">{location}</div></div></li>'
+        for key in keys)
+    return f"<html><body><ul>{items}</ul></body></html>"
+
+
+@pytest.fixture
+def fixture_site(tmp_path, scraper_state, monkeypatch):
+    archive = PageArchive(str(tmp_path / 'pages'))
+    for location, keys in RESULTS.items():
+        archive.record(search_url(KEYWORD, location, 0), search_page(keys, location))
+        # The page after the last result has no job cards
+        archive.record(search_url(KEYWORD, location, 10), search_page([], location))
+        for key in keys:
+            archive.record(f"{scraper_logic.base_url}/rc/clk?jk={key}",
+                           f'<html><body><div id="jobDescriptionText"><p>About {key}</p></div></body></html>')
+    use_scratch_caches(str(tmp_path / 'cache'))
+    monkeypatch.setattr(async_scraper, 'PAGE_PAUSE', (0, 0))
+    server, site_url = serve_fixture_site(archive, latency=0)
+    yield site_url
+    server.shutdown()
+
+
+def scrape(site_url, location_stats):
+    return asyncio.run(scrape_locations_async(
+        [KEYWORD], list(RESULTS), max_jobs=10, max_pages=2, concurrency=3,
+        fetcher=HttpFetcher(site_url), rate_limiter=RateLimiter(0, 0), location_stats=location_stats))
+
+
+def test_fan_out_scrape_returns_each_posting_once(fixture_site):
+    location_stats = {}
+    records = scrape(fixture_site, location_stats)
+
+    by_key = {record['job_key']: record for record in records}
+    assert len(records) == len(by_key) == 4
+    assert set(by_key) == {'sj_sd1', 'sj_sd2', 'sj_remote1', 'sj_rm2'}
+    assert sum(stats['duplicates'] for stats in location_stats.values()) == 1
+    assert sum(stats['jobs'] for stats in location_stats.values()) == 4
+
+    record = by_key['sj_sd1']
+    # Fetched from the local site, but the record keeps the real job link
+    assert record['job_link'] == f"{scraper_logic.base_url}/rc/clk?jk=sd1"
+    assert record['job_title'] == f"{KEYWORD} sd1"
+    assert record['company_name'] == 'Company sd1'
+    assert record['job_description'] == 'About sd1'
+    assert record['searched_job'] == KEYWORD
+    assert record['searched_location'] == 'San Diego, CA'
+    assert by_key['sj_rm2']['searched_location'] == 'Remote'
+    assert by_key['sj_remote1']['searched_location'] in RESULTS
+
+
+def test_second_scrape_is_served_from_the_cache(fixture_site):
+    first = scrape(fixture_site, {})
+    loads_before = scraper_logic.page_loads
+    location_stats = {}
+    second = scrape(fixture_site, location_stats)
+
+    # Only the empty end-of-results pages, which are never cached, are loaded again
+    assert scraper_logic.page_loads - loads_before == len(RESULTS)
+    assert sorted(r['job_key'] for r in second) == sorted(r['job_key'] for r in first)
+    assert all(stats['cached_pages'] == 1 for stats in location_stats.values())
+
+
+def test_search_url_escapes_both_fields():
+    from urllib.parse import parse_qs, urlparse
+
+    url = search_url('C# Developer', 'Fish & Chips #2, UK', 10)
+    query = parse_qs(urlparse(url).query)
+    assert query == {'q': ['C# Developer'], 'l': ['Fish & Chips #2, UK'], 'start': ['10']}
+    # Plain locations keep the URLs recorded archives are keyed by
+    assert search_url(KEYWORD, 'San Diego, CA', 0).endswith("q=Software+Engineer&l=San+Diego,+CA&start=0")
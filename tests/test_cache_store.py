@@ -0,0 +1,111 @@
+# DiskCache against a scratch cache directory: TTL, stale entries, stats and cache-only loads.
+import asyncio
+import os
+
+import pytest
+
+import async_scraper
+import cache_store
+import scraper_logic
+from cache_store import DiskCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls time.time() as seen by cache_store; advance with clock['now'] += seconds."""
+    now = {'now': 1_000_000.0}
+    monkeypatch.setattr(cache_store.time, 'time', lambda: now['now'])
+    return now
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = DiskCache('titles', cache_dir=str(tmp_path))
+    assert cache.get('resume') is None
+    cache.set('resume', ['Data Engineer', 'ETL Developer'])
+
+    assert cache.get('resume') == ['Data Engineer', 'ETL Developer']
+    # Another instance on the same directory sees the entry
+    assert DiskCache('titles', cache_dir=str(tmp_path)).get('resume') == ['Data Engineer', 'ETL Developer']
+    assert DiskCache('scores', cache_dir=str(tmp_path)).get('resume') is None
+    assert cache.stats == {'hits': 1, 'misses': 1, 'stale': 0, 'writes': 1}
+    # One file per entry, no temp files left behind
+    assert os.listdir(cache.directory) == [cache_store.content_hash('resume') + '.json']
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = DiskCache('search_pages', ttl=3600, cache_dir=str(tmp_path))
+    cache.set('page', [{'job_key': 'sj_1'}])
+
+    clock['now'] += 3600
+    assert cache.get('page') == [{'job_key': 'sj_1'}]
+    clock['now'] += 1
+    assert cache.get('page') is None
+    assert cache.stats == {'hits': 1, 'misses': 0, 'stale': 1, 'writes': 1}
+
+    # A fresh write replaces the stale entry
+    cache.set('page', [{'job_key': 'sj_2'}])
+    assert cache.get('page') == [{'job_key': 'sj_2'}]
+
+
+@pytest.mark.parametrize('ttl, max_age, age, fresh', [
+    (None, None, 10 ** 9, True),            # no TTL: kept forever
+    (3600, 60, 120, False),                 # max_age tightens the TTL
+    (60, 3600, 120, True),                  # ... or loosens it
+    (60, float('inf'), 10 ** 9, True),      # replay: any age
+])
+def test_max_age_overrides_the_ttl(tmp_path, clock, ttl, max_age, age, fresh):
+    cache = DiskCache('job_descriptions', ttl=ttl, cache_dir=str(tmp_path))
+    cache.set('job', 'About the role')
+    clock['now'] += age
+
+    assert (cache.get('job', max_age=max_age) == 'About the role') is fresh
+    assert cache.stats['stale'] == (0 if fresh else 1)
+
+
+def test_unreadable_entries_count_as_misses(tmp_path):
+    cache = DiskCache('scores', cache_dir=str(tmp_path))
+    cache.set('job', 72)
+    with open(cache._path('job'), 'w', encoding='utf-8') as f:
+        f.write('{"key": "job", "val')
+
+    assert cache.get('job') is None
+    assert cache.stats['misses'] == 1
+    cache.delete('job')
+    cache.delete('job')
+    assert not os.path.exists(cache._path('job'))
+
+
+def test_failed_write_leaves_no_entry(tmp_path, monkeypatch):
+    cache = DiskCache('scores', cache_dir=str(tmp_path))
+
+    def fail(*args):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(cache_store.os, 'replace', fail)
+    cache.set('job', 72)
+    assert cache.stats['writes'] == 0
+    assert os.listdir(cache.directory) == []
+
+
+class NoNetwork:
+    async def fetch(self, url, is_job_page=False):
+        raise AssertionError(f"cache-only mode fetched {url}")
+
+
+def test_cache_only_uses_stale_entries_and_never_fetches(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(scraper_logic, 'search_page_cache', DiskCache('search_pages', ttl=60, cache_dir=str(tmp_path)))
+    monkeypatch.setattr(scraper_logic, 'job_desc_cache', DiskCache('job_descriptions', ttl=60, cache_dir=str(tmp_path)))
+    card = {'job_key': 'sj_1', 'job_link': f"{scraper_logic.base_url}/rc/clk?jk=1"}
+    scraper_logic.search_page_cache.set(scraper_logic.search_page_key('Data Engineer', 'Remote', 0), [card])
+    scraper_logic.job_desc_cache.set(scraper_logic.job_desc_key(card), 'About the role')
+    clock['now'] += 10 ** 6
+
+    async def load(page_no):
+        cards = await async_scraper.load_search_cards(NoNetwork(), 'Data Engineer', 'Remote', page_no, cache_only=True)
+        description = await async_scraper.load_job_description(NoNetwork(), card, cache_only=True)
+        return cards, description
+
+    assert asyncio.run(load(0)) == (([card], True), ('About the role', True))
+    # A page that was never cached is the end of the results
+    assert asyncio.run(load(10))[0] == ([], True)
+    assert scraper_logic.search_page_cache.stats == {'hits': 1, 'misses': 1, 'stale': 0, 'writes': 1}
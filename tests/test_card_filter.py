@@ -0,0 +1,68 @@
+# SnippetFilter: the 60/30/10 weighting, the cutoff and the best-first fetch order.
+import pytest
+
+from card_filter import SnippetFilter
+
+RESUME = "Senior Python developer, Django and SQL, based in San Diego"
+KEYWORD = "Python Developer"
+
+# (card, keyword, expected score); resume words: senior python developer django sql based san diego
+CASES = [
+    # title 2/2 in resume -> 60, keyword 2/2 -> 30, details {acme, san, diego, ca} 2/4 -> 5
+    ({'job_title': 'Python Developer', 'company_name': 'Acme', 'company_location': 'San Diego, CA'},
+     KEYWORD, 95),
+    # "II" and "(Remote)" are not words that say anything about fit
+    ({'job_title': 'Python Developer II (Remote)'}, KEYWORD, 90),
+    # title 1/2 -> 30, keyword 1/2 -> 15
+    ({'job_title': 'Java Developer'}, KEYWORD, 45),
+    # a searched word counts for the title share even when the resume lacks it
+    ({'job_title': 'Backend Engineer'}, 'Backend Engineer', 90),
+    # no keyword: the keyword share falls back to the title share (1/2 -> 30 + 15)
+    ({'job_title': 'Django Engineer'}, '', 45),
+    # details alone are worth at most 10; "Not available" salaries are ignored
+    ({'job_title': 'Registered Nurse', 'company_location': 'San Diego', 'salary': 'Not available'}, KEYWORD, 10),
+    ({'job_title': 'Registered Nurse'}, KEYWORD, 0),
+    ({'job_title': '', 'company_location': 'San Diego'}, KEYWORD, 0),
+    ({}, KEYWORD, 0),
+]
+
+
+@pytest.mark.parametrize('card, keyword, expected', CASES)
+def test_score_weights_title_keyword_and_details(card, keyword, expected):
+    assert SnippetFilter(RESUME).score(card, keyword) == expected
+
+
+@pytest.mark.parametrize('cutoff, kept, skipped', [
+    (0, ['python', 'python-ii', 'java', 'nurse-sd', 'nurse'], []),
+    (45, ['python', 'python-ii', 'java'], ['nurse-sd', 'nurse']),
+    (91, ['python'], ['python-ii', 'java', 'nurse-sd', 'nurse']),
+    (101, [], ['java', 'nurse', 'python', 'nurse-sd', 'python-ii']),
+])
+def test_select_applies_the_cutoff_and_orders_best_first(cutoff, kept, skipped):
+    cards = {key: dict(CASES[case][0], job_key=key)
+             for key, case in {'python': 0, 'python-ii': 1, 'java': 2, 'nurse-sd': 5, 'nurse': 6}.items()}
+    # Scrape order differs from score order
+    order = ['java', 'nurse', 'python', 'nurse-sd', 'python-ii']
+    snippet_filter = SnippetFilter(RESUME, cutoff=cutoff)
+
+    keep, skip = snippet_filter.select([cards[key] for key in order], KEYWORD)
+
+    assert [card['job_key'] for card in keep] == kept
+    # Skipped cards keep their scrape order
+    assert [card['job_key'] for card in skip] == [key for key in order if key in skipped]
+    assert {card['job_key']: card['snippet_score'] for card in keep + skip} == {
+        'python': 95, 'python-ii': 90, 'java': 45, 'nurse-sd': 10, 'nurse': 0}
+    assert (snippet_filter.scored, snippet_filter.skipped) == (5, len(skipped))
+
+
+def test_ties_keep_the_scrape_order():
+    cards = [{'job_key': key, 'job_title': 'Java Developer'} for key in 'abc']
+    keep, _ = SnippetFilter(RESUME, cutoff=0).select(cards, KEYWORD)
+    assert [card['job_key'] for card in keep] == ['a', 'b', 'c']
+
+
+def test_summary_counts_across_pages():
+    snippet_filter = SnippetFilter(RESUME, cutoff=50)
+    snippet_filter.select([dict(CASES[0][0]), dict(CASES[2][0])], KEYWORD)
+    snippet_filter.select([dict(CASES[6][0])], KEYWORD)
+    assert snippet_filter.summary() == "2 of 3 cards below snippet score 50 (2 description fetches saved)"
@@ -0,0 +1,39 @@
+# Every entry point imports within its budget and without the heavy stacks it must not load.
+import importlib.util
+
+import pytest
+
+from benchmarks import IMPORT_BUDGETS, compile_entry_points, measure_import
+
+# Fresh interpreters per module. The fastest run is the module's own cost; the runs
+# go round-robin over the modules so a slow spell on the machine can't hit all of one.
+REPEAT = 5
+HAVE_QT = importlib.util.find_spec('PySide6') is not None
+
+
+def needs_qt(module_name):
+    return 'PySide6' not in IMPORT_BUDGETS[module_name][1]
+
+
+@pytest.fixture(scope='module')
+def import_samples():
+    compile_entry_points()
+    modules = [name for name in IMPORT_BUDGETS if HAVE_QT or not needs_qt(name)]
+    samples = {name: [] for name in modules}
+    for _ in range(REPEAT):
+        for name in modules:
+            samples[name].append(measure_import(name))
+    return samples
+
+
+@pytest.mark.parametrize('module_name', sorted(IMPORT_BUDGETS))
+def test_import_budget(module_name, import_samples):
+    if needs_qt(module_name) and not HAVE_QT:
+        pytest.skip("PySide6 is not installed")
+    budget_ms, forbidden = IMPORT_BUDGETS[module_name]
+    runs = import_samples[module_name]
+
+    leaked = sorted(set(forbidden) & set().union(*(imported for _, imported in runs)))
+    assert not leaked, f"importing {module_name} loads {', '.join(leaked)}"
+    best_ms = min(ms for ms, _ in runs)
+    assert best_ms <= budget_ms, f"{module_name} imports in {best_ms:.1f} ms (budget {budget_ms} ms)"
@@ -0,0 +1,79 @@
+# Backend selection by name, and the deterministic fake backend the other tests score with.
+import pytest
+
+import inference_backends
+from inference_backends import (BACKENDS, CPUQuantizedBackend, FakeBackend, HFPipelineBackend, InferenceBackend,
+                                get_backend, load_backend)
+from llm_constants import SCORE_PATTERN
+from llm_match_logic import build_match_prompt
+from model_manager import ManagedBackend
+
+
+def test_backends_by_name():
+    assert BACKENDS == {'hf': HFPipelineBackend, 'cpu': CPUQuantizedBackend, 'fake': FakeBackend}
+
+
+@pytest.mark.parametrize('name', ['fake', 'FAKE', 'Fake'])
+def test_load_backend_by_name(name):
+    backend = load_backend(name, draft_model_id=None)
+    assert type(backend) is FakeBackend
+    assert (backend.name, backend.model_id, backend.weights_source) == ('fake', 'fake', 'built-in')
+
+
+def test_load_backend_defaults_to_the_configured_backend(monkeypatch):
+    monkeypatch.setattr(inference_backends, 'DEFAULT_BACKEND', 'fake')
+    assert type(load_backend(draft_model_id=None)) is FakeBackend
+
+
+def test_unknown_backend_names_the_choices():
+    with pytest.raises(ValueError, match="Unknown inference backend 'tpu'. Choose one of: hf, cpu, fake"):
+        load_backend('tpu')
+
+
+def test_fake_backend_ignores_a_draft_model(capsys):
+    backend = load_backend('fake', draft_model_id='meta-llama/Llama-3.2-1B-Instruct')
+    assert type(backend) is FakeBackend
+    assert "does not support speculative decoding" in capsys.readouterr().out
+
+
+class Pipeline:
+    """Just what HFPipelineBackend reads from a transformers pipeline."""
+
+    class model:
+        name_or_path = 'meta-llama/Llama-3.2-3B-Instruct'
+
+    tokenizer = object()
+
+
+def test_get_backend_passes_backends_through_and_wraps_pipelines():
+    fake = FakeBackend()
+    managed = ManagedBackend('fake', idle_seconds=0)
+    assert get_backend(fake) is fake
+    assert get_backend(managed) is managed
+
+    pipeline = Pipeline()
+    wrapped = get_backend(pipeline)
+    assert isinstance(wrapped, HFPipelineBackend) and isinstance(wrapped, InferenceBackend)
+    assert wrapped.generator is pipeline
+    assert (wrapped.name, wrapped.model_id) == ('hf', 'meta-llama/Llama-3.2-3B-Instruct')
+
+
+def test_managed_backend_loads_the_selected_backend_on_first_use():
+    managed = ManagedBackend('FAKE', idle_seconds=0)
+    # Cache keys are known before the model loads
+    assert (managed.name, managed.model_id, managed.loaded) == ('fake', 'fake', False)
+    assert managed.generate("Suggest job titles") == "Software Engineer, Full Stack Developer, Backend Developer"
+    assert type(managed.backend) is FakeBackend
+    managed.close()
+
+
+def test_fake_backend_is_deterministic():
+    backend = FakeBackend(titles=["Data Engineer", "ETL Developer"])
+    assert backend.generate("Suggest job titles for this resume") == "Data Engineer, ETL Developer"
+
+    prompt = build_match_prompt("Python, Django and AWS developer", "We need Python and Django on AWS.")
+    reply = backend.generate(prompt, do_sample=True)
+    assert reply == backend.generate(prompt, do_sample=False) == FakeBackend().generate(prompt)
+    assert 0 <= int(SCORE_PATTERN.search(reply).group(1)) <= 100
+    assert backend.generate_batch([prompt, prompt]) == [reply, reply]
+    assert backend.count_tokens("three short words") == 3
@@ -0,0 +1,31 @@
+# The inference log summary reads the rotated file too.
+import json
+
+import inference_log
+
+
+def write_entries(path, statuses):
+    with open(path, 'w', encoding='utf-8') as f:
+        for status in statuses:
+            f.write(json.dumps({'ts': 0, 'kind': 'match', 'parse_status': status, 'latency_s': 0.1}) + "\n")
+
+
+def test_summary_of_a_rotated_log_only(tmp_path, capsys):
+    path = str(tmp_path / 'inference_log.jsonl')
+    write_entries(path + '.1', ['ok', 'no_score'])
+
+    assert inference_log.main(['--log', path]) == 0
+    assert "calls: 2" in capsys.readouterr().out
+
+
+def test_rotated_entries_come_first(tmp_path):
+    path = str(tmp_path / 'inference_log.jsonl')
+    write_entries(path + '.1', ['no_score'])
+    write_entries(path, ['ok'])
+
+    assert [e['parse_status'] for e in inference_log.read_entries(path)] == ['no_score', 'ok']
+
+
+def test_missing_log(tmp_path, capsys):
+    assert inference_log.main(['--log', str(tmp_path / 'missing.jsonl')]) == 1
+    assert "No inference log" in capsys.readouterr().out
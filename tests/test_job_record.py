@@ -0,0 +1,44 @@
+# JobRecord keeps the scraper's fields in slots, not in a per-record dict.
+import pytest
+
+from async_scraper import make_job_record
+from job_record import JobRecord
+
+CARD = {'job_link': 'https://www.indeed.com/rc/clk?jk=1', 'job_title': 'Software Engineer',
+        'company_name': 'Acme', 'company_location': 'San Diego, CA', 'salary': 'Not available',
+        'job_type': 'Full-time', 'rating': 'Not available', 'job_key': 'sj_1'}
+
+
+def test_scraped_record_has_no_extra_dict():
+    titles = ('Software Engineer', 'Software Developer')
+    record = make_job_record(CARD, 'x' * 1000, '"Software Engineer" OR "Software Developer"', 'San Diego, CA', titles)
+    record['match_score'] = 85
+
+    assert record._extra is None
+    assert record['searched_job'] == 'Software Engineer'
+    assert record['searched_titles'] is titles
+    assert record['job_description'] == 'x' * 1000
+    assert list(record)[-3:] == ['search_query', 'searched_titles', 'match_score']
+
+
+def test_extra_keys_still_work():
+    record = make_job_record(CARD, 'short', 'Software Engineer', 'San Diego, CA')
+    record['note'] = 'remote'
+
+    assert record['note'] == 'remote'
+    assert dict(record)['note'] == 'remote'
+
+
+def test_descriptions_are_plain_text_by_default():
+    record = make_job_record(CARD, 'x' * 1000, 'Software Engineer', 'San Diego, CA')
+    assert record.job_description == 'x' * 1000
+
+
+@pytest.mark.parametrize('storage', ['plain', 'zlib', 'disk'])
+def test_description_storage_round_trip(storage):
+    description = "Build REST APIs in Django. " * 40
+    record = JobRecord(CARD, storage=storage, job_description=description)
+
+    assert record['job_description'] == description
+    assert dict(record.copy())['job_description'] == description
+    assert (type(record.job_description) is str) == (storage == 'plain')
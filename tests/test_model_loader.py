@@ -0,0 +1,71 @@
+# generate_job_titles with the fake backend: cached per resume, regenerated on force_refresh.
+import pytest
+
+import model_loader
+from cache_store import DiskCache
+from inference_backends import FakeBackend
+from model_loader import generate_job_titles, title_cache_key
+
+RESUME = "Data engineer with five years of Python, Spark and Airflow pipelines."
+
+
+class CountingBackend(FakeBackend):
+    def __init__(self, titles=None):
+        super().__init__(titles)
+        self.calls = []
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        self.calls.append(do_sample)
+        return super().generate(prompt, max_new_tokens, do_sample, temperature)
+
+
+@pytest.fixture
+def title_cache(tmp_path, monkeypatch):
+    cache = DiskCache("titles", cache_dir=str(tmp_path))
+    monkeypatch.setattr(model_loader, 'title_cache', cache)
+    return cache
+
+
+def test_titles_are_generated_once_per_resume(title_cache):
+    backend = CountingBackend(["Data Engineer", "ETL Developer"])
+
+    assert generate_job_titles(backend, RESUME) == ["Data Engineer", "ETL Developer"]
+    assert generate_job_titles(backend, RESUME) == ["Data Engineer", "ETL Developer"]
+    assert backend.calls == [False]     # greedy by default
+    assert title_cache.get(title_cache_key(backend, RESUME)) == ["Data Engineer", "ETL Developer"]
+
+    # Another resume is a miss
+    generate_job_titles(backend, RESUME + " Also Kafka.")
+    assert len(backend.calls) == 2
+
+
+def test_force_refresh_regenerates_and_overwrites(title_cache):
+    generate_job_titles(CountingBackend(["Data Engineer"]), RESUME)
+
+    backend = CountingBackend(["Analytics Engineer", "Data Engineer"])
+    assert generate_job_titles(backend, RESUME) == ["Data Engineer"]
+    assert backend.calls == []
+    assert generate_job_titles(backend, RESUME, force_refresh=True) == ["Analytics Engineer", "Data Engineer"]
+    assert backend.calls == [False]
+    # The refreshed titles replace the cached ones
+    assert generate_job_titles(backend, RESUME) == ["Analytics Engineer", "Data Engineer"]
+    assert len(backend.calls) == 1
+
+
+def test_use_cache_false_neither_reads_nor_writes(title_cache):
+    backend = CountingBackend()
+    generate_job_titles(backend, RESUME, use_cache=False, deterministic=False)
+    generate_job_titles(backend, RESUME, use_cache=False)
+
+    assert backend.calls == [True, False]
+    assert title_cache.stats == {'hits': 0, 'misses': 0, 'stale': 0, 'writes': 0}
+
+
+def test_cache_key_depends_on_backend_model_and_resume():
+    fake = FakeBackend()
+    other_model = FakeBackend()
+    other_model.model_id = "fake-2"
+
+    assert title_cache_key(fake, RESUME) == title_cache_key(FakeBackend(), RESUME)
+    assert title_cache_key(fake, RESUME) != title_cache_key(other_model, RESUME)
+    assert title_cache_key(fake, RESUME) != title_cache_key(fake, RESUME + " ")
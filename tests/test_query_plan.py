@@ -0,0 +1,20 @@
+# Query planning on a replayed synthetic search site: fewer search pages, same postings.
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('lxml')
+
+from benchmarks import QUERY_PLAN_TITLES, compare_query_plans, load_fixture_jobs
+
+
+def test_plan_loads_fewer_search_pages_for_the_same_postings(scraper_state):
+    plan, results = compare_query_plans(QUERY_PLAN_TITLES, 'San Diego, CA', max_pages=3, per_page=5,
+                                        max_jobs=500, jobs=load_fixture_jobs() or [{}])
+    separate_loads, separate_keys, separate_records = results['separate']
+    planned_loads, planned_keys, planned_records = results['planned']
+
+    assert len(plan.keywords) < len(QUERY_PLAN_TITLES)
+    assert (separate_loads, planned_loads) == (13, 7)
+    assert planned_keys == separate_keys
+    assert len(planned_keys) == planned_records == separate_records == 22
+
@@ -0,0 +1,75 @@
+# Offline replay of the committed sample archive (fixtures/pages) through the scraper.
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('lxml')
+
+import scraper_logic
+from async_scraper import ScraperSession
+from benchmarks import (REPO_DIR, SAMPLE_FIXTURE_LOCATION, SAMPLE_FIXTURE_TITLES, build_sample_fixture,
+                        load_fixture_jobs, use_fixture_replay, use_scratch_caches)
+from page_archive import PageArchive
+from parse_pool import ParsePool
+
+FIXTURE_DIR = os.path.join(REPO_DIR, 'fixtures', 'pages')
+
+
+@pytest.fixture
+def archive(tmp_path, scraper_state):
+    archive = use_fixture_replay(FIXTURE_DIR)
+    use_scratch_caches(str(tmp_path))
+    return archive
+
+
+def search_pages(archive):
+    return [url for url in archive.urls() if '/jobs?' in url]
+
+
+def test_committed_archive_matches_its_builder(tmp_path):
+    rebuilt = build_sample_fixture(str(tmp_path / 'pages'), load_fixture_jobs() or [{}])
+    assert sorted(rebuilt.urls()) == sorted(PageArchive(FIXTURE_DIR).urls())
+
+
+def test_session_replays_the_archive(archive):
+    expected = {}
+    for url in search_pages(archive):
+        for card in scraper_logic.parse_search_page(archive.lookup(url)):
+            expected.setdefault(card['job_key'], card)
+
+    session = ScraperSession(concurrency=2)
+    try:
+        records = session.scrape(SAMPLE_FIXTURE_TITLES, SAMPLE_FIXTURE_LOCATION, max_jobs=100, max_pages=2)
+        loads = scraper_logic.page_loads
+        again = session.scrape(SAMPLE_FIXTURE_TITLES, SAMPLE_FIXTURE_LOCATION, max_jobs=100, max_pages=2)
+    finally:
+        session.close()
+
+    # Two postings are listed under both titles; each is scraped once
+    assert len(records) == len(expected) == 18
+    for record in records:
+        card = expected[record['job_key']]
+        assert {key: record[key] for key in card} == card
+        assert record['searched_location'] == SAMPLE_FIXTURE_LOCATION
+        assert record['job_description'] not in scraper_logic.FAILED_DESCRIPTIONS
+    assert {r['searched_job'] for r in records} == set(SAMPLE_FIXTURE_TITLES)
+    # The second scrape on the same session comes from the page caches
+    assert scraper_logic.page_loads == loads
+    assert [r['job_key'] for r in again] == [r['job_key'] for r in records]
+
+
+def test_parse_pool_matches_in_process_parsing(archive):
+    pages = [(scraper_logic.parse_search_page if '/jobs?' in url else scraper_logic.parse_job_page,
+              archive.lookup(url)) for url in archive.urls()]
+    pool = ParsePool(1)
+
+    async def parse_all():
+        return await asyncio.gather(*(pool.parse(parser, source) for parser, source in pages))
+
+    try:
+        pooled = asyncio.run(parse_all())
+    finally:
+        pool.close()
+    assert pooled == [parser(source) for parser, source in pages]
@@ -0,0 +1,93 @@
+# SearchPlan ordering and ScrapeBudget stop point, fed with recorded page outcomes.
+import pytest
+
+import scraper_logic
+import search_plan
+from search_plan import ScrapeBudget, SearchPlan
+
+# Recorded match scores per (keyword, page start): "Data Engineer" pages score
+# well, "Web Developer" pages mostly don't, "QA Engineer" sits in between.
+OUTCOMES = {
+    'Data Engineer': [[82, 75, 40, 71], [90, 30, 77, 72], [74, 20, 71, 35]],
+    'Web Developer': [[30, 45, 72, 10], [25, 15, 40, 20], [35, 30, 20, 10]],
+    'QA Engineer': [[70, 60, 20, 50], [71, 40, 30, 10], [20, 25, 30, 75]],
+}
+
+
+def replay(plan, budget=None):
+    """Runs `plan` against OUTCOMES, one live page load per query, until it or `budget` runs out."""
+    queries = []
+    while budget is None or budget.exhausted() is None:
+        query = plan.next_query()
+        if query is None:
+            break
+        keyword, start = query
+        scraper_logic.count_page_load()
+        queries.append(query)
+        pages = OUTCOMES[keyword]
+        for score in pages[start // 10]:
+            plan.record_score(keyword, score)
+        if start // 10 + 1 == len(pages):
+            plan.finish_keyword(keyword)
+    return queries
+
+
+def test_sequential_plan_keeps_the_original_scrape_order():
+    queries = replay(SearchPlan(list(OUTCOMES), max_pages=2))
+    assert queries == [('Data Engineer', 0), ('Data Engineer', 10), ('Web Developer', 0),
+                       ('Web Developer', 10), ('QA Engineer', 0), ('QA Engineer', 10)]
+
+
+def test_adaptive_plan_explores_each_keyword_then_follows_the_match_rate():
+    plan = SearchPlan(list(OUTCOMES), max_pages=3, adaptive=True, threshold=70)
+    queries = replay(plan)
+
+    # Every keyword gets its first page before any keyword gets a second one
+    assert [keyword for keyword, _ in queries[:3]] == list(OUTCOMES)
+    # After page 1: Data Engineer (3+1)/(4+2), QA Engineer (1+1)/(4+2), Web Developer (1+1)/(4+2);
+    # Data Engineer keeps winning and the QA/Web tie goes to the earlier keyword
+    assert queries[3:] == [('Data Engineer', 10), ('Data Engineer', 20), ('Web Developer', 10),
+                           ('QA Engineer', 10), ('QA Engineer', 20), ('Web Developer', 20)]
+    assert plan.stats['Data Engineer'] == {'pages': 3, 'scored': 12, 'matches': 8, 'done': True}
+
+
+@pytest.mark.parametrize('matches, scored, expected', [(0, 0, 0.5), (3, 4, 4 / 6), (0, 8, 0.1), (10, 10, 11 / 12)])
+def test_priority_is_the_posterior_mean_match_rate(matches, scored, expected):
+    plan = SearchPlan(['Data Engineer'])
+    plan.stats['Data Engineer'].update(matches=matches, scored=scored)
+    assert plan._priority('Data Engineer') == pytest.approx(expected)
+
+
+def test_merged_query_scores_count_for_each_title():
+    plan = SearchPlan(['Data Engineer'], query_titles={'Data Engineer': ('Data Engineer', 'ETL Developer')})
+    plan.record_score('Data Engineer', 80)
+    plan.record_score('Data Engineer', 30, titles=('ETL Developer',))
+
+    assert plan.title_stats == {'Data Engineer': {'scored': 1, 'matches': 1},
+                                'ETL Developer': {'scored': 2, 'matches': 1}}
+
+
+def test_budget_stops_after_max_fetches_page_loads(monkeypatch):
+    monkeypatch.setattr(scraper_logic, 'page_loads', 100)
+    budget = ScrapeBudget(max_fetches=4, max_seconds=None)
+    queries = replay(SearchPlan(list(OUTCOMES), max_pages=3, adaptive=True), budget)
+
+    assert len(queries) == budget.fetches == 4
+    assert budget.exhausted() == 'fetches'
+
+
+def test_budget_stops_when_the_time_runs_out(monkeypatch):
+    clock = iter(range(0, 1000, 30))
+    monkeypatch.setattr(search_plan.time, 'monotonic', lambda: next(clock))
+    budget = ScrapeBudget(max_fetches=None, max_seconds=100)
+    queries = replay(SearchPlan(list(OUTCOMES), max_pages=3), budget)
+
+    # Started at t=0; checked at 30, 60, 90 (go) and 120 (stop)
+    assert len(queries) == 3
+    assert budget.exhausted() == 'time'
+
+
+def test_unlimited_budget_never_stops():
+    budget = ScrapeBudget(max_fetches=None, max_seconds=None)
+    assert len(replay(SearchPlan(list(OUTCOMES), max_pages=3), budget)) == 9
+    assert budget.exhausted() is None
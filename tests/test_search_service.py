@@ -0,0 +1,128 @@
+# SearchService running fake tasks on its QThread: priority order, cancelling and shutdown.
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+pytest.importorskip('PySide6')
+
+from PySide6.QtCore import QCoreApplication, Qt
+
+from scraper_worker import WorkerTask
+from search_service import HIGH_PRIORITY, LOW_PRIORITY, NORMAL_PRIORITY, SearchService
+
+
+class FakeTask(WorkerTask):
+    """Records its run in `log`; with `gate`, blocks until the gate opens or the task is stopped."""
+
+    def __init__(self, name, log, gate=None):
+        super().__init__(llm_generator=None, resume_text='')
+        self.name = name
+        self.log = log
+        self.gate = gate
+        self.finished_count = 0
+        self.started = threading.Event()
+        # Direct: the service thread calls it, no event loop needed
+        self.finished.connect(self._count_finished, Qt.DirectConnection)
+
+    def _count_finished(self):
+        self.finished_count += 1
+
+    def describe(self):
+        return f"FakeTask {self.name}"
+
+    def _run(self):
+        self.started.set()
+        self.log.append(self.name)
+        while self.gate is not None and not self.gate.wait(0.01):
+            if self.cancelled:
+                return
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def service():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    service = SearchService()
+    yield service
+    service.shutdown(wait_ms=5000)
+    assert service.wait(5000)
+
+
+def test_tasks_run_by_priority_then_submit_order(service):
+    log, gate = [], threading.Event()
+    blocker = service.submit(FakeTask('blocker', log, gate))
+    assert blocker.started.wait(5)
+
+    tasks = [service.submit(FakeTask('low', log), LOW_PRIORITY),
+             service.submit(FakeTask('normal-1', log), NORMAL_PRIORITY),
+             service.submit(FakeTask('high', log), HIGH_PRIORITY),
+             service.submit(FakeTask('normal-2', log), NORMAL_PRIORITY)]
+    assert [task.name for task in service.pending_tasks()] == ['high', 'normal-1', 'normal-2', 'low']
+    gate.set()
+
+    wait_until(lambda: all(task.state == 'done' for task in tasks))
+    assert log == ['blocker', 'high', 'normal-1', 'normal-2', 'low']
+    assert service.completed == 5
+    assert [task.finished_count for task in tasks] == [1, 1, 1, 1]
+
+
+def test_cancelled_queued_task_finishes_without_running(service):
+    log, gate = [], threading.Event()
+    blocker = service.submit(FakeTask('blocker', log, gate))
+    assert blocker.started.wait(5)
+    skipped = service.submit(FakeTask('skipped', log))
+    after = service.submit(FakeTask('after', log))
+
+    service.cancel(skipped)
+    gate.set()
+
+    wait_until(lambda: after.state == 'done')
+    assert log == ['blocker', 'after']
+    assert skipped.state == 'cancelled'
+    assert skipped.finished_count == 1
+
+
+def test_cancel_current_stops_the_running_task(service):
+    log = []
+    running = service.submit(FakeTask('running', log, threading.Event()))
+    assert running.started.wait(5)
+
+    assert service.cancel_current() is running
+    wait_until(lambda: running.state == 'cancelled')
+    assert running.finished_count == 1
+
+
+def test_shutdown_while_a_task_runs(service, monkeypatch):
+    closed_on = []
+    monkeypatch.setattr(service.session, 'close', lambda: closed_on.append(threading.current_thread()))
+    log = []
+    running = service.submit(FakeTask('running', log, threading.Event()))
+    assert running.started.wait(5)
+    queued = service.submit(FakeTask('queued', log))
+
+    service.shutdown(wait_ms=5000)
+
+    assert service.isFinished()
+    assert log == ['running']
+    assert (running.state, queued.state) == ('cancelled', 'cancelled')
+    assert (running.finished_count, queued.finished_count) == (1, 1)
+    # The service thread quit the browsers, once
+    assert len(closed_on) == 1 and closed_on[0] is not threading.main_thread()
+    with pytest.raises(RuntimeError):
+        service.submit(FakeTask('late', log))
+
+
+def test_shutdown_before_any_task_closes_the_session(service, monkeypatch):
+    closed = []
+    monkeypatch.setattr(service.session, 'close', lambda: closed.append(True))
+    service.shutdown()
+    assert closed == [True]
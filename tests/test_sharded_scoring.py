@@ -0,0 +1,184 @@
+# ShardedScorer's dispatcher with two fake-backend replicas: prompt order, requeue on a
+# crash, MAX_ATTEMPTS retries. Most tests serve the replica protocol from threads so a
+# crash or failure lands on an exact chunk; the last one kills a real replica process.
+import multiprocessing
+import threading
+
+import sharded_scoring
+from inference_backends import FakeBackend
+from llm_match_logic import build_match_prompt
+from sharded_scoring import MAX_ATTEMPTS, ShardedScorer
+
+RESUME = "Python developer: Django, PostgreSQL, Docker, AWS and REST APIs."
+SKILLS = ["Python", "Django", "Java", "React", "Docker", "Kubernetes", "SQL", "AWS", "Go", "Rust"]
+
+
+def match_prompts(count):
+    return [build_match_prompt(RESUME, f"Job {i}: {SKILLS[i % 10]} and {SKILLS[i * 3 % 10]} engineer.")
+            for i in range(count)]
+
+
+def reference_replies(prompts):
+    return FakeBackend().generate_batch(prompts, max_new_tokens=32, do_sample=False)
+
+
+class FakeReplica(FakeBackend):
+    """
+    FakeBackend serving one replica pipe from a thread. `crash_on` (chunk number) makes it
+    close the pipe instead of replying, like a killed process; `fail_on` raises for
+    prompts containing that text, `fail_times` times.
+    """
+
+    def __init__(self, conn, crash_on=None, fail_on=None, fail_times=MAX_ATTEMPTS):
+        super().__init__()
+        self.conn = conn
+        self.crash_on = crash_on
+        self.fail_on = fail_on
+        self.fail_times = fail_times
+        self.chunks = []
+        self.exitcode = None
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                task = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            if task is None:
+                break
+            task_id, prompts, kwargs = task
+            self.chunks.append(task_id)
+            if len(self.chunks) == self.crash_on:
+                self.exitcode = -9
+                self.conn.close()
+                return
+            try:
+                self.conn.send(('done', task_id, self.generate_batch(prompts, **kwargs), 0.0))
+            except ValueError as e:
+                self.conn.send(('failed', task_id, repr(e)))
+        self.exitcode = 0
+
+    def generate(self, prompt, max_new_tokens=256, do_sample=True, temperature=0.7):
+        if self.fail_on and self.fail_on in prompt and self.fail_times:
+            self.fail_times -= 1
+            raise ValueError("CUDA out of memory")
+        return super().generate(prompt, max_new_tokens, do_sample, temperature)
+
+    # The process interface ShardedScorer uses
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+
+def fake_scorer(options=({}, {}), chunk_size=2):
+    """A ShardedScorer whose two replicas are FakeReplica threads (`options`: keyword arguments per replica)."""
+    scorer = ShardedScorer('fake', replicas=2, chunk_size=chunk_size)
+    for replica_id in range(2):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        scorer.processes[replica_id] = FakeReplica(child_conn, **options[replica_id])
+        scorer._conns[replica_id] = parent_conn
+        scorer.replica_stats[replica_id] = {'state': 'ready', 'prompts': 0, 'busy_s': 0.0, 'errors': 0}
+    return scorer
+
+
+def score(scorer, prompts):
+    try:
+        return scorer.generate_batch(prompts, max_new_tokens=32, do_sample=False)
+    finally:
+        scorer.close()
+
+
+def test_replies_come_back_in_prompt_order():
+    prompts = match_prompts(11)
+    scorer = fake_scorer()
+    replies = score(scorer, prompts)
+
+    assert replies == reference_replies(prompts)
+    # Both replicas took chunks; every prompt was scored once
+    assert all(stats['prompts'] for stats in scorer.replica_stats.values())
+    assert sum(stats['prompts'] for stats in scorer.replica_stats.values()) == 11
+    assert [stats['state'] for stats in scorer.replica_stats.values()] == ['stopped', 'stopped']
+
+
+def test_chunks_of_a_crashed_replica_are_requeued():
+    prompts = match_prompts(12)
+    # Replica 0 dies on its second chunk, with that chunk and its prefetched one outstanding
+    scorer = fake_scorer(({'crash_on': 2}, {}))
+    replies = score(scorer, prompts)
+
+    assert replies == reference_replies(prompts)
+    assert scorer.replica_stats[0]['state'] == 'dead'
+    assert scorer.replica_stats[0]['prompts'] == 2
+    assert scorer.replica_stats[1]['prompts'] == 10
+
+
+def test_failed_chunk_is_retried_on_the_next_attempt():
+    prompts = match_prompts(6)
+    # Replica 1 gets the chunk with "Job 3" first and fails on it once; the retry succeeds
+    scorer = fake_scorer(({}, {'fail_on': 'Job 3', 'fail_times': 1}))
+    replies = score(scorer, prompts)
+
+    assert replies == reference_replies(prompts)
+    assert sum(stats['errors'] for stats in scorer.replica_stats.values()) == 1
+
+
+def test_chunk_is_given_up_after_max_attempts():
+    prompts = match_prompts(6)
+    scorer = fake_scorer(({'fail_on': 'Job 3'}, {'fail_on': 'Job 3'}))
+    replies = score(scorer, prompts)
+
+    expected = reference_replies(prompts)
+    # Prompts 3-4 share the failing chunk
+    expected[2:4] = [None, None]
+    assert replies == expected
+    assert sum(stats['errors'] for stats in scorer.replica_stats.values()) == MAX_ATTEMPTS
+
+
+def test_a_crash_counts_as_an_attempt():
+    prompts = match_prompts(4)
+    # Replica 0 dies with the only chunk; it fails again on replica 1 and is given up
+    scorer = fake_scorer(({'crash_on': 1}, {'fail_on': 'Job 0'}), chunk_size=4)
+    replies = score(scorer, prompts)
+
+    assert replies == [None] * 4
+    assert scorer.replica_stats[0]['state'] == 'dead'
+    assert scorer.replica_stats[1]['errors'] == 1
+
+
+def test_no_replica_left_returns_none_for_the_rest():
+    prompts = match_prompts(4)
+    scorer = fake_scorer(({'crash_on': 1}, {'crash_on': 1}))
+    replies = score(scorer, prompts)
+
+    assert replies == [None] * 4
+    assert [stats['state'] for stats in scorer.replica_stats.values()] == ['dead', 'dead']
+
+
+def test_replica_process_killed_mid_run(monkeypatch):
+    prompts = match_prompts(40)
+    scorer = ShardedScorer('fake', replicas=2, chunk_size=2)
+    assert scorer.start() == 2
+    dispatch = scorer._dispatch
+    killed = []
+
+    def dispatch_then_kill(*args):
+        dispatch(*args)
+        # Once replica 0 holds its first chunks, kill its process
+        if not killed:
+            victim = scorer.processes[0]
+            victim.kill()
+            victim.join()
+            killed.append(victim.exitcode)
+
+    monkeypatch.setattr(scorer, '_dispatch', dispatch_then_kill)
+    replies = score(scorer, prompts)
+
+    assert killed and killed[0] < 0
+    assert replies == reference_replies(prompts)
+    assert scorer.replica_stats[0]['state'] == 'dead'
+    assert scorer.replica_stats[1]['prompts'] >= 40 - 2 * sharded_scoring.PREFETCH
+    assert sum(stats['prompts'] for stats in scorer.replica_stats.values()) == 40
@@ -0,0 +1,81 @@
+# Skill extraction, and SkillIndex.features() against the per-job definition in skill_index.py.
+import pytest
+
+from skill_index import SkillIndex, YEARS_PENALTY, extract_skills, extract_years
+
+RESUME = "Backend developer: Python, Django, PostgreSQL and Docker on AWS. 4 years of experience."
+JOBS = [
+    # 4 skills, all on the resume
+    {'job_description': "Python/Django services on AWS with Postgres. 3+ years of experience."},
+    # 5 skills, 2 on the resume, asks for 6 years (2 more than the resume)
+    {'job_description': "Java and Spring Boot microservices, Docker, Python scripting. 6 years experience."},
+    # no known skill
+    {'job_description': "Great communicator who thrives in a fast-paced environment."},
+    # 2 skills, none on the resume
+    {'job_description': "React.js and TypeScript front end."},
+]
+
+
+@pytest.mark.parametrize('text, skills', [
+    ("Python/Django, node.js and C++", {'Python', 'Django', 'Node.js', 'C++'}),
+    ("Amazon Web Services, k8s, CI/CD", {'AWS', 'Kubernetes', 'CI/CD'}),
+    ("React to issues quickly", {'React'}),
+    ("react quickly, a swift response", set()),
+    ("REST APIs, not rest", {'REST APIs'}),
+    ("", set()),
+])
+def test_extract_skills(text, skills):
+    assert extract_skills(text) == skills
+
+
+@pytest.mark.parametrize('text, years', [
+    ("5+ years of experience", 5),
+    ("3-5 yrs professional software experience; 2 years of Python experience", 3),
+    ("over 40 years of experience serving customers", 0),
+    ("no years mentioned", 0),
+])
+def test_extract_years(text, years):
+    assert extract_years(text) == years
+
+
+@pytest.fixture
+def index():
+    pytest.importorskip("scipy")
+    index = SkillIndex()
+    index.add_jobs(JOBS)
+    return index
+
+
+def test_features_score_every_stored_job(index):
+    features = index.features(RESUME)
+
+    assert features['resume_skills'] == {'Python', 'Django', 'PostgreSQL', 'Docker', 'AWS'}
+    assert features['resume_years'] == 4
+    assert features['overlap'].tolist() == [4, 2, 0, 0]
+    assert features['skill_count'].tolist() == [4, 5, 0, 2]
+    assert features['job_coverage'].tolist() == pytest.approx([1.0, 0.4, 0.0, 0.0])
+    assert features['resume_coverage'].tolist() == pytest.approx([0.8, 0.4, 0.0, 0.0])
+    assert features['years_gap'].tolist() == [0, 2, 0, 0]
+    assert features['skill_score'].tolist() == [100, 40 - 2 * YEARS_PENALTY, 0, 0]
+
+
+def test_features_for_some_rows_match_the_full_pass(index):
+    full = index.features(RESUME)
+    subset = index.features(RESUME, rows=[3, 1])
+
+    for name in ('overlap', 'job_coverage', 'years_gap', 'skill_score', 'skill_count'):
+        assert subset[name].tolist() == pytest.approx([full[name][3], full[name][1]])
+
+
+def test_postings_follow_added_jobs(index):
+    assert index.jobs_with('Python').tolist() == [0, 1]
+    row = index.add({'job_description': "Python and Kafka"})
+    assert index.jobs_with('Python').tolist() == [0, 1, row]
+    assert index.job_skills(row) == ['Python', 'Kafka']
+    assert index.features(RESUME)['skill_score'].tolist()[row] == 50
+
+
+def test_resume_without_years_is_not_penalized(index):
+    features = index.features("Python, Docker")
+    assert features['years_gap'].tolist() == [0, 0, 0, 0]
+    assert features['skill_score'].tolist() == [25, 40, 0, 0]
@@ -0,0 +1,83 @@
+# Section classification, description compression and token budgeting of prompt inputs.
+import pytest
+
+from text_preprocessing import approx_token_count, budget_text, compress_job_description, split_sections
+
+DESCRIPTION = (
+    "We are a fast-growing health startup. "
+    "Responsibilities Build REST APIs in Django. Own the data pipeline. "
+    "Requirements 5+ years Python, experience with HIPAA and personal data handling for our dental clinics "
+    "network. SQL and AWS required. No visa sponsorship is available. Knowledge of GDPR and cookies consent flows. "
+    "Benefits We offer medical, dental and vision insurance. Generous PTO. "
+    "Equal Opportunity Employer We do not discriminate on the basis of race, color or religion."
+)
+
+
+def sections(text):
+    return {sentence: section for section, sentence in split_sections(text)}
+
+
+@pytest.mark.parametrize('sentence, section', [
+    ("Requirements 5+ years Python, experience with HIPAA and personal data handling for our dental clinics "
+     "network.", 'requirements'),
+    ("No visa sponsorship is available.", 'requirements'),
+    ("Knowledge of GDPR and cookies consent flows.", 'requirements'),
+    ("Build REST APIs in Django.", 'responsibilities'),
+    ("Responsibilities Build REST APIs in Django.", 'responsibilities'),
+    ("We are a fast-growing health startup.", 'overview'),
+    ("Benefits We offer medical, dental and vision insurance.", 'benefits'),
+    ("Equal Opportunity Employer We do not discriminate on the basis of race, color or religion.", 'eeo'),
+])
+def test_split_sections(sentence, section):
+    found = sections(DESCRIPTION)
+    key = next(s for s in found if s.endswith(sentence) or s == sentence)
+    assert found[key] == section
+
+
+@pytest.mark.parametrize('text, section', [
+    ("Great team. We offer dental and vision coverage for all staff.", 'benefits'),
+    ("Great team. Full 401(k) match.", 'benefits'),
+    ("Great team. We collect your personal information to process the application.", 'privacy'),
+    ("Great team. We are an equal opportunity employer.", 'eeo'),
+    ("Great team. Build software for dental clinics.", 'overview'),
+    ("Great team. Experience with GDPR compliance.", 'overview'),
+])
+def test_cues_outside_kept_headings(text, section):
+    assert split_sections(text)[-1][0] == section
+
+
+def test_compress_keeps_requirements_first_and_drops_boilerplate():
+    compressed = compress_job_description(DESCRIPTION, max_tokens=600)
+
+    assert compressed.startswith("Requirements 5+ years Python")
+    assert "HIPAA and personal data handling" in compressed
+    assert "No visa sponsorship" in compressed
+    assert "vision insurance" not in compressed
+    assert "discriminate" not in compressed
+    assert compressed.index("SQL and AWS") < compressed.index("Build REST APIs") < compressed.index("health startup")
+
+
+def test_compress_respects_the_budget():
+    compressed = compress_job_description(DESCRIPTION, max_tokens=20)
+    assert approx_token_count(compressed) <= 20
+    assert compressed.startswith("Requirements 5+ years Python")
+
+
+def test_compress_falls_back_to_plain_budgeting():
+    assert compress_job_description("CRITICAL FETCH ERROR") == "CRITICAL FETCH ERROR"
+    assert compress_job_description("") == ""
+
+
+def test_budget_text():
+    text = "one two three, four five"
+    assert budget_text(text, 100) == text
+    # "one two three ," is 4 tokens: the cut lands on a word boundary
+    assert budget_text(text, 4) == "one two three,"
+    assert budget_text(text, 3) == "one two"
+    assert budget_text(text, 0) == ""
+    assert budget_text("", 10) == ""
+
+
+def test_budget_text_uses_the_given_counter():
+    count_chars = lambda text: len(text)
+    assert budget_text("aaaa bbbb cccc", 9, count_chars) == "aaaa bbbb"
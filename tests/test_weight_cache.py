@@ -0,0 +1,68 @@
+# int8 weight cache round trip on a tiny randomly initialized Llama.
+import os
+
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('safetensors')
+transformers = pytest.importorskip('transformers')
+
+import weight_cache
+from weight_cache import load_int8_model, save_int8_model
+
+QUANTIZED_LINEAR = torch.ao.nn.quantized.dynamic.Linear
+
+
+@pytest.fixture
+def tiny_model(tmp_path, monkeypatch):
+    """(model_id, int8 model): a 2-layer Llama whose config is a local directory, quantized like the cpu backend."""
+    monkeypatch.setattr(weight_cache, 'WEIGHT_CACHE', True)
+    monkeypatch.setattr(weight_cache, 'WEIGHT_CACHE_DIR', str(tmp_path / 'weights'))
+    config = transformers.LlamaConfig(vocab_size=64, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                                      num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=64)
+    model_id = str(tmp_path / 'tiny-llama')
+    config.save_pretrained(model_id)
+    torch.manual_seed(0)
+    model = transformers.LlamaForCausalLM(config).eval()
+    return model_id, torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def test_int8_model_round_trip(tiny_model):
+    model_id, model = tiny_model
+    path = save_int8_model(model, model_id)
+    assert path == weight_cache.cache_path(model_id, 'int8') + '.safetensors' and os.path.exists(path)
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.tmp')] == []
+
+    loaded = load_int8_model(model_id)
+
+    layers = [name for name, module in model.named_modules() if isinstance(module, QUANTIZED_LINEAR)]
+    assert layers and layers == [name for name, module in loaded.named_modules()
+                                 if isinstance(module, QUANTIZED_LINEAR)]
+    for name in layers:
+        saved_weight, saved_bias = model.get_submodule(name)._packed_params._weight_bias()
+        weight, bias = loaded.get_submodule(name)._packed_params._weight_bias()
+        assert torch.equal(weight.int_repr(), saved_weight.int_repr())
+        assert (weight.q_scale(), weight.q_zero_point()) == (saved_weight.q_scale(), saved_weight.q_zero_point())
+        assert (bias is None) == (saved_bias is None)
+    # Nothing was left on the meta device
+    assert not any(tensor.is_meta for tensor in list(loaded.parameters()) + list(loaded.buffers()))
+
+    input_ids = torch.arange(12).unsqueeze(0)
+    with torch.no_grad():
+        assert torch.equal(loaded(input_ids).logits, model(input_ids).logits)
+
+
+def test_missing_or_outdated_entries_are_rebuilt(tiny_model, monkeypatch):
+    model_id, model = tiny_model
+    assert load_int8_model(model_id) is None
+
+    save_int8_model(model, model_id)
+    monkeypatch.setattr(weight_cache, 'FORMAT_VERSION', weight_cache.FORMAT_VERSION + 1)
+    assert load_int8_model(model_id) is None
+
+
+def test_cache_off(tiny_model, monkeypatch):
+    model_id, model = tiny_model
+    monkeypatch.setattr(weight_cache, 'WEIGHT_CACHE', False)
+    assert save_int8_model(model, model_id) is None
+    assert load_int8_model(model_id) is None
@@ -0,0 +1,189 @@
+# text_preprocessing.py
+# Prepares resume / job description text before it goes into a prompt:
+#   1. a rule-based section classifier drops boilerplate (EEO statements, benefits,
+#      privacy notices, "about us", application instructions) from job descriptions
+#      and moves requirements / skills to the front;
+#   2. every input is cut to a token budget (counted with the backend's tokenizer)
+#      on a word boundary instead of a fixed character slice.
+import functools
+import re
+
+# --- Token budgets per prompt input ---
+MATCH_RESUME_TOKENS = 900      # resume part of the matching prompt
+MATCH_JOB_TOKENS = 600         # job description part of the matching prompt
+TITLE_RESUME_TOKENS = 1500     # resume in the job-title prompt
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_token_count(text):
+    """Tokenizer-free estimate (words + punctuation), used when no tokenizer is available."""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+# =====================================================================
+# --- TOKEN BUDGETING ---
+# =====================================================================
+
+@functools.lru_cache(maxsize=256)
+def budget_text(text, max_tokens, count_tokens=approx_token_count):
+    """
+    Returns the longest word-aligned prefix of `text` that fits in `max_tokens`
+    according to `count_tokens`. Cached, so the same resume is only measured once
+    per run even though it goes into every matching prompt.
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    words = text.split()
+    low, high = 0, len(words)   # invariant: words[:low] fits, words[:high+1] does not
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:mid])) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low])
+
+
+# =====================================================================
+# --- SECTION CLASSIFIER ---
+# =====================================================================
+
+# Sections that are kept, in the order they are placed in the prompt
+KEEP_ORDER = ['requirements', 'skills', 'responsibilities', 'overview', 'compensation']
+# Sections that never reach the model
+BOILERPLATE = {'benefits', 'eeo', 'privacy', 'company', 'application'}
+
+# Headings that open a section. Descriptions are scraped as one flattened line,
+# so headings are matched inline and the text is split in front of them.
+SECTION_HEADINGS = {
+    'requirements': [r"requirements", r"qualifications", r"minimum qualifications",
+                     r"preferred qualifications", r"basic qualifications", r"what you(?:'|’)ll need",
+                     r"what you bring", r"what we(?:'|’)re looking for", r"who you are",
+                     r"about you", r"your background", r"must have", r"nice to have",
+                     r"education(?: and experience)?", r"experience required"],
+    'skills': [r"skills", r"required skills", r"technical skills", r"tech stack",
+               r"technologies", r"core competencies"],
+    'responsibilities': [r"responsibilities", r"key responsibilities", r"duties",
+                         r"what you(?:'|’)ll do", r"in this (?:position|role), you will",
+                         r"the role", r"job duties", r"day to day"],
+    'overview': [r"about (?:the|this) (?:role|position|job)", r"job summary",
+                 r"position summary", r"overview", r"job description"],
+    'compensation': [r"compensation", r"salary", r"pay range"],
+    'benefits': [r"benefits", r"perks", r"we offer", r"what we offer", r"why join us"],
+    'eeo': [r"equal (?:employment )?opportunity", r"eeo statement", r"diversity"],
+    'privacy': [r"privacy (?:notice|policy)", r"applicant privacy"],
+    'company': [r"about us", r"about (?!you\b|the role\b|the position\b|this role\b|this position\b)(?-i:[A-Z])[\w&.’'-]*",
+                r"who we are", r"our company", r"company overview"],
+    'application': [r"how to apply", r"application process", r"notes"],
+}
+
+# Sentence-level cues that mark boilerplate in text outside a kept heading. They are
+# narrow on purpose: a requirement may mention HIPAA, personal data or visa status.
+BOILERPLATE_CUES = {
+    'eeo': re.compile(r"equal (?:employment )?opportunity|without regard to|race, colou?r|"
+                      r"sexual orientation|gender identity|protected veteran|disability status|"
+                      r"reasonable accommodation|E-Verify|affirmative action", re.I),
+    'benefits': re.compile(r"401\(?k\)?|\b(?:medical|dental|vision)\b[\w ,&/]{0,40}?\b(?:insurance|coverage|"
+                           r"benefits?|plans?)\b|paid time off|\bPTO\b|parental leave|tuition reimbursement|"
+                           r"life insurance|employee assistance program|wellness program", re.I),
+    'privacy': re.compile(r"privacy (?:notice|policy)|(?:collect|process|use)s? (?:your |applicants?(?:'|’)? )?"
+                          r"personal (?:information|data)|applicant data|cookie (?:policy|notice|settings)", re.I),
+    'application': re.compile(r"no recruiters|(?:submit|include|attach) (?:a |your )?(?:resume and )?cover letter",
+                              re.I),
+}
+# Headed sections whose sentences are never moved out by a cue
+CUE_EXEMPT = {'requirements', 'skills', 'responsibilities'}
+
+# Headings must start with a capital letter and be followed by a capitalized word
+# (or a colon / bullet); the phrase itself is matched case-insensitively.
+_HEADING_PATTERN = re.compile(
+    r"(?<!\w)(?=[A-Z])((?i:" + "|".join(
+        p for patterns in SECTION_HEADINGS.values() for p in patterns
+    ) + r"))(?=\s*[:\-–]?\s+[A-Z0-9•·\-*])"
+)
+_HEADING_LOOKUP = [
+    (section, re.compile(r"^(?:" + "|".join(patterns) + r")$", re.I))
+    for section, patterns in SECTION_HEADINGS.items()
+]
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9•·\-*])")
+
+
+def _heading_section(heading):
+    for section, pattern in _HEADING_LOOKUP:
+        if pattern.match(heading):
+            return section
+    return None
+
+
+def split_sections(text):
+    """
+    Classifies a job description into (section, sentence) pairs, in original order.
+    A heading switches the current section; outside requirements / skills /
+    responsibilities, boilerplate cues override it per sentence.
+    """
+    # Put a break in front of every inline heading
+    marked = _HEADING_PATTERN.sub(lambda m: "\n" + m.group(1), text)
+
+    pieces = []
+    current = 'overview'
+    for block in marked.split("\n"):
+        block = block.strip()
+        if not block:
+            continue
+        heading = _HEADING_PATTERN.match(block)
+        if heading:
+            current = _heading_section(heading.group(1)) or current
+        for sentence in _SENTENCE_SPLIT.split(block):
+            section = current
+            if section not in BOILERPLATE and section not in CUE_EXEMPT:
+                for cue_section, cue in BOILERPLATE_CUES.items():
+                    if cue.search(sentence):
+                        section = cue_section
+                        break
+            pieces.append((section, sentence.strip()))
+    return pieces
+
+
+def compress_job_description(job_desc, max_tokens=MATCH_JOB_TOKENS, count_tokens=approx_token_count):
+    """
+    Drops boilerplate sections, puts requirements and skills first, and fills the
+    remaining token budget with responsibilities / overview / compensation text.
+    """
+    if not job_desc:
+        return ""
+
+    pieces = split_sections(job_desc)
+    kept = []
+    used = 0
+    for section in KEEP_ORDER:
+        for piece_section, sentence in pieces:
+            if piece_section != section:
+                continue
+            cost = count_tokens(sentence) + 1
+            if used + cost > max_tokens:
+                remaining = max_tokens - used - 1
+                if remaining > 8:
+                    kept.append(budget_text(sentence, remaining, count_tokens))
+                used = max_tokens
+                break
+            kept.append(sentence)
+            used += cost
+        if used >= max_tokens:
+            break
+
+    # Nothing recognisable left (e.g. an error string): fall back to plain budgeting
+    if not kept:
+        return budget_text(job_desc, max_tokens, count_tokens)
+    return budget_text(" ".join(kept), max_tokens, count_tokens)
+
+
+def prepare_match_inputs(resume_text, job_desc, count_tokens=approx_token_count):
+    """Returns (resume, job description) cut to the matching prompt budgets."""
+    return (
+        budget_text(resume_text, MATCH_RESUME_TOKENS, count_tokens),
+        compress_job_description(job_desc, MATCH_JOB_TOKENS, count_tokens),
+    )
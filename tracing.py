@@ -0,0 +1,208 @@
+# tracing.py
+# Lightweight span tracing for the scrape -> parse -> inference pipeline.
+#
+#   with span('get_dom', url=url) as s:
+#       ...
+#       s.set(outcome='timeout')
+#
+#   @traced('extract.get_job_title')
+#   def get_job_title(job): ...
+#
+# Tracing is off unless JOBMATCHER_TRACE=1 (or tracer.enabled = True). When off,
+# span() returns a shared no-op object and @traced calls straight through, so the
+# cost is one attribute check per call. JOBMATCHER_TRACE_FILE=<path> additionally
+# exports each run as Chrome trace JSON (open it in chrome://tracing or Perfetto).
+import functools
+import json
+import os
+import threading
+import time
+
+TRACING_ENABLED = os.environ.get("JOBMATCHER_TRACE", "0") == "1"
+TRACE_FILE = os.environ.get("JOBMATCHER_TRACE_FILE")
+
+
+class _NullSpan:
+    """Returned by span() while tracing is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'start', 'end', 'thread_id')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = self.end = 0.0
+        self.thread_id = threading.get_ident()
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._record(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class Tracer:
+    """Collects finished spans and named counters for one run."""
+
+    def __init__(self, enabled=TRACING_ENABLED):
+        self.enabled = enabled
+        self.spans = []
+        self.counters = {}
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.counters = {}
+            self.origin = time.perf_counter()
+
+    def _record(self, finished_span):
+        with self._lock:
+            self.spans.append(finished_span)
+
+    def add_spans(self, records, origin, thread_id=None):
+        """
+        Records spans timed in another process: `records` are (name, start offset s,
+        duration s, attrs) relative to `origin`, a perf_counter() value of this process.
+        """
+        if not self.enabled:
+            return
+        for name, offset, duration, attrs in records:
+            finished = Span(self, name, attrs)
+            finished.start = origin + offset
+            finished.end = finished.start + duration
+            if thread_id is not None:
+                finished.thread_id = thread_id
+            self._record(finished)
+
+    # --- Reporting ---
+
+    def summary(self):
+        """
+        Returns {'stages': {name: {count, total_s, p50_s, p95_s, max_s}}, 'counters': {...},
+        'tokens_per_sec': float or None} for the spans recorded since the last reset().
+        """
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        durations = {}
+        decode_tokens = 0
+        decode_seconds = 0.0
+        for s in spans:
+            durations.setdefault(s.name, []).append(s.duration)
+            if 'decode_tokens' in s.attrs and not s.attrs.get('cache_hit'):
+                decode_tokens += s.attrs['decode_tokens']
+                decode_seconds += s.duration
+
+        stages = {}
+        for name, values in durations.items():
+            values.sort()
+            stages[name] = {
+                'count': len(values),
+                'total_s': sum(values),
+                'p50_s': values[int(0.50 * (len(values) - 1))],
+                'p95_s': values[int(round(0.95 * (len(values) - 1)))],
+                'max_s': values[-1],
+            }
+        return {
+            'stages': stages,
+            'counters': counters,
+            'tokens_per_sec': decode_tokens / decode_seconds if decode_seconds else None,
+        }
+
+    def format_summary(self):
+        """Human-readable version of summary() for the console / progress panel."""
+        summary = self.summary()
+        lines = [f"{'stage':<32} {'n':>5} {'p50 s':>8} {'p95 s':>8} {'total s':>9}"]
+        for name, st in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_s']):
+            lines.append(f"{name:<32} {st['count']:>5} {st['p50_s']:>8.3f} {st['p95_s']:>8.3f} {st['total_s']:>9.2f}")
+        lines.append(f"driver restarts: {summary['counters'].get('driver_restarts', 0)}")
+        if summary['tokens_per_sec'] is not None:
+            lines.append(f"LLM decode tokens/sec: {summary['tokens_per_sec']:.1f}")
+        if summary['counters'].get('draft_tokens'):
+            rate = summary['counters'].get('draft_tokens_accepted', 0) / summary['counters']['draft_tokens']
+            lines.append(f"draft acceptance rate: {rate:.1%}")
+        for name, value in sorted(summary['counters'].items()):
+            if name != 'driver_restarts':
+                lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        """Writes the recorded spans as Chrome trace 'complete' events (microseconds)."""
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            'name': s.name,
+            'ph': 'X',
+            'ts': (s.start - self.origin) * 1e6,
+            'dur': s.duration * 1e6,
+            'pid': os.getpid(),
+            'tid': s.thread_id,
+            'args': {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                     for k, v in s.attrs.items()},
+        } for s in spans]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+# Process-wide tracer used by the scraper, worker and LLM code
+tracer = Tracer()
+
+
+def span(name, **attrs):
+    return tracer.span(name, **attrs)
+
+
+def traced(name=None):
+    """Decorator form of span(); `name` defaults to the function name."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,10 +1,7 @@
 # utils_constants.py
 import platform
-import re
-from PySide6.QtWidgets import QWidget
-from PySide6.QtPdf import QPdfDocument
-from PySide6.QtPdfWidgets import QPdfView
-from PySide6.QtCore import QThread, Signal
+# Re-exported for older imports; the prompt constants live in the Qt-free llm_constants module.
+from llm_constants import SYSTEM_PROMPT_MATCHING, SCORE_PATTERN
 
 # --- OS Specifics ---
 op_sys = platform.system()
@@ -15,20 +12,6 @@ if op_sys == 'Darwin':
     except ImportError:
         pass # Not critical if we're not running on MacOS
 
-# --- LLM Constants ---
-SYSTEM_PROMPT_MATCHING = (
-    "You are a professional job matching assistant. Your task is to analyze a candidate's "
-    "Resume against a Job Description. Your assessment must focus on three key areas: "
-    "1. **Skills Similarity** "
-    "2. **Work Experience Relevance** "
-    "3. **Project/Portfolio Similarity** "
-    "Your response MUST start with the FINAL MATCH SCORE on a single line, followed by your analysis. "
-    "Use the following STRICT output format for the score: **SCORE: [Integer from 0 to 100]**\n"
-    "Example of the required first line: **SCORE: 75**\n"
-    "Do NOT include the percent sign (%)."
-)
-SCORE_PATTERN = re.compile(r'SCORE:\s*(\d{1,3})')
-
 # --- Helper Functions ---
 def clear_layout(layout):
     """Helper function to remove widgets from a layout."""
@@ -0,0 +1,228 @@
+# weight_cache.py
+# On-disk cache of quantized model weights, so a new process does not reload and
+# requantize the full-precision checkpoint every time it starts.
+#
+#   cpu backend - the int8 dynamically-quantized model is written to one safetensors
+#                 file: int8 weight + scale / zero point per quantized Linear, and
+#                 every other tensor (embeddings, norms, buffers) as is. Loading
+#                 builds the model skeleton on the meta device and fills it tensor
+#                 by tensor from the open file; each int8 weight is requantized
+#                 from its stored values, scale and zero point, which reproduces it
+#                 exactly without loading or quantizing the float32 checkpoint.
+#   hf backend  - the 4-bit bitsandbytes model is saved with save_pretrained
+#                 (safetensors) and reloaded as a pre-quantized checkpoint. The
+#                 entry is keyed by the transformers and bitsandbytes versions, and
+#                 written to a temporary directory that is moved into place once
+#                 complete, so an interrupted save never looks like a cache hit.
+#
+# Entries live under $JOBMATCHER_WEIGHT_CACHE_DIR (default <cache dir>/weights);
+# JOBMATCHER_WEIGHT_CACHE=0 turns the cache off. torch / safetensors are only
+# imported by the functions that need them.
+import json
+import os
+import re
+import shutil
+import tempfile
+
+from cache_store import CACHE_DIR
+
+WEIGHT_CACHE = os.environ.get("JOBMATCHER_WEIGHT_CACHE", "1") != "0"
+WEIGHT_CACHE_DIR = os.environ.get("JOBMATCHER_WEIGHT_CACHE_DIR") or os.path.join(CACHE_DIR, "weights")
+
+# Bump when the file layout changes; older entries are then rebuilt
+FORMAT_VERSION = 1
+
+_BUFFER_PREFIX = "buffer:"
+_QUANTIZED_SUFFIXES = (".qweight", ".scale", ".zero_point")
+
+
+def cache_path(model_id, variant):
+    """Cache location for one model / quantization variant ('int8' file stem or 'nf4' directory)."""
+    safe_id = re.sub(r"[^A-Za-z0-9._-]+", "--", model_id)
+    return os.path.join(WEIGHT_CACHE_DIR, f"{safe_id}.{variant}")
+
+
+def _set_tensor(model, name, tensor, is_buffer):
+    import torch
+
+    module_name, _, attr = name.rpartition('.')
+    module = model.get_submodule(module_name) if module_name else model
+    if is_buffer:
+        module._buffers[attr] = tensor
+    else:
+        module._parameters[attr] = torch.nn.Parameter(tensor, requires_grad=False)
+
+
+# =====================================================================
+# --- INT8 (CPU BACKEND) ---
+# =====================================================================
+
+def save_int8_model(model, model_id):
+    """
+    Writes a quantize_dynamic()'d model to <cache_path>.safetensors. Returns the path,
+    or None when the cache is off or the model can't be stored.
+    """
+    if not WEIGHT_CACHE:
+        return None
+    import torch
+    from safetensors.torch import save_file
+
+    quantized_type = torch.ao.nn.quantized.dynamic.Linear
+    tensors = {}
+    linear_layers = {}
+    for name, module in model.named_modules():
+        if isinstance(module, quantized_type):
+            weight, bias = module._packed_params._weight_bias()
+            if weight.qscheme() not in (torch.per_tensor_affine, torch.per_tensor_symmetric):
+                print(f"Weight cache: {name} uses {weight.qscheme()} quantization; not caching {model_id}.")
+                return None
+            tensors[f"{name}.qweight"] = weight.int_repr()
+            tensors[f"{name}.scale"] = torch.tensor([weight.q_scale()], dtype=torch.float64)
+            tensors[f"{name}.zero_point"] = torch.tensor([weight.q_zero_point()], dtype=torch.int64)
+            if bias is not None:
+                tensors[f"{name}.bias"] = bias.detach()
+            linear_layers[name] = [module.in_features, module.out_features]
+    if not linear_layers:
+        return None
+
+    seen = set()
+    for name, tensor in model.named_parameters():
+        tensors[name] = tensor.detach()
+    # Non-persistent buffers (e.g. rotary inv_freq) are not in the state dict
+    for name, tensor in model.named_buffers():
+        tensors[_BUFFER_PREFIX + name] = tensor
+    for name, tensor in list(tensors.items()):
+        # safetensors refuses shared storage (tied weights): store a copy of repeats
+        tensor = tensor.contiguous()
+        if tensor.data_ptr() in seen:
+            tensor = tensor.clone()
+        seen.add(tensor.data_ptr())
+        tensors[name] = tensor
+
+    path = cache_path(model_id, "int8") + ".safetensors"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        save_file(tensors, tmp_path, metadata={
+            'format_version': str(FORMAT_VERSION),
+            'torch_version': torch.__version__,
+            'model_id': model_id,
+            'linear_layers': json.dumps(linear_layers),
+        })
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Disk full / no permission: the model is loaded, it just isn't cached
+        print(f"Weight cache: could not save the int8 weights of {model_id}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+    return path
+
+
+def load_int8_model(model_id, token=None):
+    """
+    Rebuilds the int8 model of `model_id` from its cache file. Returns None when
+    there is no usable entry (missing, older format or another torch version).
+    """
+    if not WEIGHT_CACHE:
+        return None
+    path = cache_path(model_id, "int8") + ".safetensors"
+    if not os.path.exists(path):
+        return None
+
+    import torch
+    from safetensors import safe_open
+    from transformers import AutoConfig, AutoModelForCausalLM, GenerationConfig
+
+    # Tensors are read one at a time from the open file, so the whole checkpoint
+    # is never held in a dict next to the model it is being copied into
+    with safe_open(path, framework="pt") as f:
+        metadata = f.metadata() or {}
+        if (metadata.get('format_version') != str(FORMAT_VERSION)
+                or metadata.get('torch_version') != torch.__version__):
+            print(f"Weight cache entry {path} is from another version; rebuilding it.")
+            return None
+
+        config = AutoConfig.from_pretrained(model_id, token=token)
+        with torch.device("meta"):
+            model = AutoModelForCausalLM.from_config(config, torch_dtype=torch.float32)
+
+        linear_layers = json.loads(metadata['linear_layers'])
+        layer_keys = {f"{name}{suffix}" for name in linear_layers for suffix in _QUANTIZED_SUFFIXES + (".bias",)}
+        keys = set(f.keys())
+        for name, (in_features, out_features) in linear_layers.items():
+            scale = float(f.get_tensor(f"{name}.scale")[0])
+            zero_point = int(f.get_tensor(f"{name}.zero_point")[0])
+            # Requantizing the exact dequantized values with the same scale / zero point
+            # gives back the stored int8 values
+            int_repr = f.get_tensor(f"{name}.qweight")
+            qweight = torch.quantize_per_tensor((int_repr.to(torch.float32) - zero_point) * scale,
+                                                scale, zero_point, torch.qint8)
+            del int_repr
+            bias = f.get_tensor(f"{name}.bias") if f"{name}.bias" in keys else None
+            layer = torch.ao.nn.quantized.dynamic.Linear(in_features, out_features, bias_=bias is not None,
+                                                         dtype=torch.qint8)
+            layer.set_weight_bias(qweight, bias)
+            parent_name, _, attr = name.rpartition('.')
+            setattr(model.get_submodule(parent_name) if parent_name else model, attr, layer)
+
+        for name in keys - layer_keys:
+            if name.startswith(_BUFFER_PREFIX):
+                _set_tensor(model, name[len(_BUFFER_PREFIX):], f.get_tensor(name), is_buffer=True)
+            else:
+                _set_tensor(model, name, f.get_tensor(name), is_buffer=False)
+    # Rotary embeddings keep a plain-attribute alias of their (meta-built) buffer
+    for module in model.modules():
+        if hasattr(module, 'original_inv_freq') and 'inv_freq' in module._buffers:
+            module.original_inv_freq = module.inv_freq
+
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(model_id, token=token)
+    except OSError:
+        pass
+    model.eval()
+    return model
+
+
+# =====================================================================
+# --- 4-BIT (HF BACKEND) ---
+# =====================================================================
+
+def _nf4_variant():
+    """Cache variant of 4-bit checkpoints: the serialized format changes with these libraries."""
+    import bitsandbytes
+    import transformers
+    return f"nf4-transformers{transformers.__version__}-bnb{bitsandbytes.__version__}"
+
+
+def nf4_checkpoint(model_id):
+    """Directory of the cached pre-quantized 4-bit checkpoint, or None if there is none."""
+    if not WEIGHT_CACHE:
+        return None
+    path = cache_path(model_id, _nf4_variant())
+    if os.path.exists(os.path.join(path, "config.json")) and any(
+            name.endswith(".safetensors") for name in os.listdir(path)):
+        return path
+    return None
+
+
+def save_nf4_model(model, model_id):
+    """Saves a bitsandbytes 4-bit model as a pre-quantized safetensors checkpoint."""
+    if not WEIGHT_CACHE:
+        return None
+    path = cache_path(model_id, _nf4_variant())
+    os.makedirs(WEIGHT_CACHE_DIR, exist_ok=True)
+    partial = tempfile.mkdtemp(dir=WEIGHT_CACHE_DIR, prefix=os.path.basename(path) + ".partial-")
+    try:
+        model.save_pretrained(partial, safe_serialization=True)
+        # A leftover entry without weights (from before saves were atomic) is replaced
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(partial, path)
+    except Exception as e:
+        # Older bitsandbytes / transformers can't serialize 4-bit weights
+        print(f"Weight cache: could not save the 4-bit weights of {model_id}: {e}")
+        shutil.rmtree(partial, ignore_errors=True)
+        return None
+    return path